@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+__doc__ = """
+    Run the analysis service, or query a running one.
+
+    Implemented :
+
+        - serve   : mbqc.qcomp.AnalysisService until interrupted
+        - metrics : the latency percentiles, queue depth and cache counters
+        - flow    : flow and depth of a graph of example_graphstates or of a
+                    corpus record
+
+    """
+
+import asyncio
+import json
+import sys
+
+
+#non standard library
+import example_graphstates
+from mbqc.qcomp import AnalysisService, AnalysisClient
+from mbqc.lib import read_graphs
+
+
+def _address(address):
+    """ A Unix socket path, or host:port
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return {'host': host or '127.0.0.1', 'port': int(port)}
+    return {'path': address}
+
+
+def serve(address, max_batch=64, max_delay=0.002):
+    service = AnalysisService(max_batch=max_batch, max_delay=max_delay)
+    print('serving on %s'%address, flush=True)
+    try :
+        asyncio.run(service.serve(**_address(address)))
+    except KeyboardInterrupt :
+        pass
+
+
+def query(address, kind, graph=None):
+    with AnalysisClient(**_address(address)) as client :
+        if kind == 'metrics':
+            print(json.dumps(client.request('metrics'), indent=1, sort_keys=True))
+            return
+        if ':' in graph or graph.endswith('.json') or graph.endswith('.edgelist'):
+            path, _, record = graph.partition(':')
+            G, I, O, _ = next(read_graphs(path, start=int(record or 0)))
+        else :
+            G, I, O = getattr(example_graphstates, graph)()
+        print(client.request('flow', G, I, O))
+
+
+if __name__ == "__main__" :
+    args = sys.argv[1:]
+
+    err_message = """
+    You did it wrong, try this:
+
+        analysis_service.py serve address [max_batch] [max_delay]
+        analysis_service.py metrics address
+        analysis_service.py flow address graph
+
+    where address is a Unix socket path, e.g. /tmp/mbqc.sock, or host:port,
+    e.g. :8765, and graph is a function of example_graphstates, e.g. graph_H,
+    or a corpus file with an optional record, e.g. out/122/random_graphs.json:5
+    """
+    try :
+        kind, address = args[0], args[1]
+        if kind == 'serve':
+            max_batch = int(args[2]) if len(args) > 2 else 64
+            max_delay = float(args[3]) if len(args) > 3 else 0.002
+        elif kind == 'flow':
+            graph = args[2]
+        elif kind != 'metrics':
+            sys.exit(err_message)
+    except (IndexError, ValueError) :
+        sys.exit(err_message)
+
+    if kind == 'serve':
+        serve(address, max_batch, max_delay)
+    else :
+        query(address, kind, graph if kind == 'flow' else None)
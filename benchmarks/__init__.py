@@ -0,0 +1,11 @@
+"""
+Benchmarks of the mbqc package. Run from the repository root, e.g.
+
+    python -m benchmarks.bench_stabilizer
+
+The regression suite of the core algorithms compares against the stored
+baseline benchmarks/baselines/baseline.json:
+
+    python -m benchmarks.suite run -o benchmarks/baselines/baseline.json
+    python -m benchmarks.suite compare
+"""
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Cost of the blind-QC keys and masked angles on H x W brickworks.
+
+    build   : the array brickwork with its flow and dependency CSR
+    keygen  : theta and r of every node
+    encrypt : delta of every node from a full transcript, in one call
+    rounds  : delta and decryption round by round, as the client does
+    batch   : encrypt for B patterns at once
+
+usage:
+    python -m benchmarks.bench_bqc_crypto [H] [W1,W2,..] [B]
+"""
+
+#standard libraries
+import sys
+from math import pi
+from time import perf_counter
+
+#non-standard libraries
+import numpy as np
+from mbqc.qres import brickwork
+from mbqc.bqc import BlindAngles
+
+
+def bench_brickwork(H, W, B=16, seed=1):
+    """
+    Times in milliseconds on a H x W brickwork
+
+    return
+        dict
+    """
+    t = perf_counter()
+    ag = brickwork(H, W)
+    deps = ag.dependencies()
+    build = perf_counter()-t
+
+    rs = np.random.RandomState(seed)
+    phi = rs.rand(len(ag))*2*pi
+    phi[ag.outputs] = np.nan
+    rounds = ag.rounds()
+    keys = BlindAngles(phi, *deps, random_seed=seed)
+    b = rs.randint(2, size=(1, len(ag)))
+
+    t0 = perf_counter()
+    keys.keygen(seed)
+    t1 = perf_counter()
+    s, _ = keys.run(b, rounds)
+    t2 = perf_counter()
+    keys.encrypt(s)
+    t3 = perf_counter()
+
+    batch = BlindAngles(phi, *deps, batch=B, random_seed=seed)
+    sb = rs.randint(2, size=(B, len(ag))).astype(np.uint8)
+    t4 = perf_counter()
+    batch.encrypt(sb)
+    t5 = perf_counter()
+
+    return {'nodes': len(ag), 'build_ms': build*1e3, 'keygen_ms': (t1-t0)*1e3, 'encrypt_ms': (t3-t2)*1e3,
+            'rounds_ms': (t2-t1)*1e3, 'batch_ms': (t5-t4)*1e3}
+
+
+if __name__ == "__main__" :
+    args = sys.argv[1:]
+    H = int(args[0]) if len(args) > 0 else 5
+    Ws = [int(w) for w in args[1].split(',')] if len(args) > 1 else [100, 10000, 200000]
+    B = int(args[2]) if len(args) > 2 else 16
+
+    print('%9s %10s %11s %12s %11s %10s'%('nodes', 'build[ms]', 'keygen[ms]', 'encrypt[ms]',
+                                          'rounds[ms]', 'batch[ms]'))
+    for W in Ws :
+        r = bench_brickwork(H, W, B)
+        print('%9i %10.1f %11.2f %12.2f %11.1f %10.1f'%(r['nodes'], r['build_ms'], r['keygen_ms'],
+                                                       r['encrypt_ms'], r['rounds_ms'], r['batch_ms']))
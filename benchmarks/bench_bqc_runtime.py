@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Throughput of the blind-QC runtime: one server, many concurrent clients on
+brickwork patterns, with the random device so only the protocol is measured.
+
+usage:
+    python -m benchmarks.bench_bqc_runtime [H] [W] [C1,C2,..] [unix socket path]
+"""
+
+#standard libraries
+import asyncio
+import sys
+
+#non-standard libraries
+import numpy as np
+from example_graphstates import graph_brickwork
+from mbqc.qcomp import Lazy1WQC
+from mbqc.bqc import run_local
+
+
+def bench_clients(H, W, nclient, path=None, seed=1):
+    """
+    Rounds per second and latency percentiles in milliseconds
+
+    return
+        dict
+    """
+    G, I, O = graph_brickwork(H, W)
+    phi = dict((n, 0.) for n in G.nodes if n not in O)
+    computations = [Lazy1WQC(*graph_brickwork(H, W), phi) for _ in range(nclient)]
+    stats, _ = asyncio.run(run_local(computations, path=path, seed=seed))
+    p50, p99 = np.percentile(stats['latency'], [50, 99])*1e3
+    return {'clients': nclient, 'rounds': stats['rounds'], 'rounds_per_s': stats['rounds_per_s'],
+            'p50_ms': p50, 'p99_ms': p99}
+
+
+if __name__ == "__main__" :
+    args = sys.argv[1:]
+    H = int(args[0]) if len(args) > 0 else 5
+    W = int(args[1]) if len(args) > 1 else 41
+    Cs = [int(c) for c in args[2].split(',')] if len(args) > 2 else [1, 10, 100]
+    path = args[3] if len(args) > 3 else None
+
+    print('%8s %8s %12s %9s %9s'%('clients', 'rounds', 'rounds/s', 'p50[ms]', 'p99[ms]'))
+    for C in Cs :
+        r = bench_clients(H, W, C, path)
+        print('%8i %8i %12.0f %9.3f %9.3f'%(r['clients'], r['rounds'], r['rounds_per_s'], r['p50_ms'], r['p99_ms']))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+__doc__="""
+DOT generation of OpenGraph.draw_graph on large brickworks, and the batch
+writer draw_graphs.
+
+    to_dot      : the DOT text, flow edges found by a set lookup
+    to_dot pos  : the same with the nodes pinned at positions(), for
+                  neato -n2 instead of the dot layout
+    draw_graphs : DOT files of many graphs on a process pool
+
+usage:
+    python -m benchmarks.bench_draw [H] [W1,W2,..] [ngraph] [ncpu]
+"""
+
+#standard libraries
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+#non-standard libraries
+from example_graphstates import graph_brickwork
+from mbqc.qres import OpenGraph, brickwork
+
+
+if __name__ == "__main__" :
+    H = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    Ws = [int(w) for w in sys.argv[2].split(',')] if len(sys.argv) > 2 else [100, 300, 1000]
+    ngraph = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+    ncpu = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    print('%8s %12s %12s'%('nodes', 'to_dot[s]', 'pos[s]'))
+    for W in Ws :
+        og = brickwork(H, W).to_opengraph()
+        t0 = perf_counter()
+        og.to_dot('bench')
+        t1 = perf_counter()
+        og.to_dot('bench', pos=True)
+        t2 = perf_counter()
+        print('%8i %12.4f %12.4f'%(H*W, t1-t0, t2-t1))
+
+    ogs = [OpenGraph(*graph_brickwork(5, 40)) for _ in range(ngraph)]
+    with tempfile.TemporaryDirectory() as tmp :
+        outs = [os.path.join(tmp, 'g%i.dot'%i) for i in range(ngraph)]
+        t0 = perf_counter()
+        OpenGraph.draw_graphs(ogs, outs, ncpu=1, pos=True)
+        t1 = perf_counter()
+        OpenGraph.draw_graphs(ogs, outs, ncpu=ncpu, pos=True)
+        t2 = perf_counter()
+    print('%i DOT files: serial %.3f s, pool %.3f s'%(ngraph, t1-t0, t2-t1))
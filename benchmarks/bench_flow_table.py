@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Flow of all (I, O) pairs of given sizes on one graph.
+
+    one by one : an OpenGraph per pair, FlowError for the pairs without flow
+    flow_table : shared bitmask adjacency and monotonicity pruning
+
+usage:
+    python -m benchmarks.bench_flow_table [H] [W] [n_I] [n_O]
+"""
+
+#standard libraries
+import sys
+from itertools import combinations
+from time import perf_counter
+
+#non-standard libraries
+from example_graphstates import graph_brickwork
+from mbqc.lib import FlowError
+from mbqc.qres import OpenGraph, flow_table
+
+
+def one_by_one(G, n_I, n_O):
+    """ Number of pairs with flow, an OpenGraph per pair
+    """
+    nflow = 0
+    for O in combinations(G.nodes, n_O):
+        for I in combinations(G.nodes, n_I):
+            try :
+                OpenGraph(G.copy(), set(I), set(O))
+                nflow += 1
+            except FlowError :
+                pass
+    return nflow
+
+
+if __name__ == "__main__" :
+    H = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    W = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    n_I = int(sys.argv[3]) if len(sys.argv) > 3 else H
+    n_O = int(sys.argv[4]) if len(sys.argv) > 4 else H
+    G, _, _ = graph_brickwork(H, W)
+
+    t0 = perf_counter()
+    table = flow_table(G, n_I=n_I, n_O=n_O)
+    t1 = perf_counter()
+    nflow = one_by_one(G, n_I, n_O)
+    t2 = perf_counter()
+
+    assert nflow == table.has_flow.sum()
+    print('brickwork %ix%i, %i pairs, %i with flow'%(H, W, len(table), nflow))
+    print('decided by', table.stats)
+    print('%-12s %10s'%('method', 'seconds'))
+    print('%-12s %10.4f'%('one by one', t2-t1))
+    print('%-12s %10.4f'%('flow_table', t1-t0))
+    print('speed-up %.0f'%((t2-t1)/(t1-t0)))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Inter-process traffic and time of OpenGraph.generate_all.
+
+    per-subset : one pickled (edges, G.nodes, I, O) task per edge subset and
+                 one pickled nx.Graph back per graph with flow, the payloads
+                 of the former Pool.starmap over _try_graph
+    executor   : the ranges of bitmasks sent by GraphExecutor and the lists of
+                 bitmasks it gets back
+    reuse      : time of the (I, O) sets in a row on one GraphExecutor, against
+                 a new pool per call
+
+usage:
+    python -m benchmarks.bench_generate_all [n_node] [ncpu]
+"""
+
+#standard libraries
+import pickle
+import sys
+from time import perf_counter
+
+#non-standard libraries
+import networkx as nx
+from mbqc.qres import OpenGraph, GraphExecutor
+
+
+def traffic(nodes, I, O, ncpu):
+    """
+    Bytes sent to and received from the workers
+
+    return
+        dict
+    """
+    G = nx.complete_graph(nodes)
+    sent = sum(len(pickle.dumps((edges, G.nodes, I, O))) for edges in OpenGraph.get_power_set(G.edges))
+    graphs = OpenGraph.generate_all(nodes, I, O, ncpu=ncpu)
+    received = sum(len(pickle.dumps(g)) for g, _, _ in graphs)
+
+    with GraphExecutor(ncpu) as ex :
+        _, ranges = ex.tasks(nodes, I, O)
+        _, masks = ex.flow_masks(nodes, I, O)
+    ex_sent = sum(len(pickle.dumps(r)) for r in ranges)
+    ex_received = len(pickle.dumps([int(m) for m in masks])) + len(ranges)*len(pickle.dumps([]))
+    return {'ngraph': len(graphs), 'per-subset': sent + received, 'executor': ex_sent + ex_received}
+
+
+def reuse(nodes, io_sets, ncpu):
+    """ Seconds for io_sets with one executor and with a pool per call
+    """
+    t0 = perf_counter()
+    with GraphExecutor(ncpu) as ex :
+        for I, O in io_sets :
+            OpenGraph.generate_all(nodes, I, O, executor=ex, masks=True)
+    t1 = perf_counter()
+    for I, O in io_sets :
+        OpenGraph.generate_all(nodes, I, O, ncpu=ncpu, masks=True)
+    return t1-t0, perf_counter()-t1
+
+
+if __name__ == "__main__" :
+    nnode = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ncpu = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    nodes = list(range(nnode))
+    I, O = {0}, {nnode-2, nnode-1}
+
+    res = traffic(nodes, I, O, ncpu)
+    print('%i nodes, %i graphs with flow'%(nnode, res['ngraph']))
+    print('%-12s %14s'%('payload', 'bytes'))
+    for k in ['per-subset', 'executor']:
+        print('%-12s %14i'%(k, res[k]))
+    print('ratio %.0f'%(res['per-subset']/res['executor']))
+
+    io_sets = [({0}, {nnode-1}), ({0}, {nnode-2, nnode-1}), ({0, 1}, {nnode-2, nnode-1})]
+    shared, fresh = reuse(nodes, io_sets, ncpu)
+    print('%i calls: shared executor %.3f s, pool per call %.3f s'%(len(io_sets), shared, fresh))
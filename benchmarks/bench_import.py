@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Start-up cost of the package: every statement is run in a fresh interpreter,
+the time of the statement alone is measured and the heavy modules it loaded
+are listed.
+
+    import mbqc.qres, mbqc.qcomp : nothing but the package tables
+    flow                         : numpy, no networkx
+    OpenGraph, Lazy1WQC          : numpy and networkx, no pygraphviz
+
+A statement fails the guard when it loads a forbidden module or, with a
+budget, takes longer than budget milliseconds. The exit status is the
+number of failures.
+
+usage:
+    python -m benchmarks.bench_import [repeat] [budget_ms]
+"""
+
+#standard libraries
+import json
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+
+ROOT = dirname(dirname(abspath(__file__)))
+HEAVY = ['numpy', 'numpy.random', 'networkx', 'pygraphviz']
+
+#statement: the heavy modules it must not load
+CASES = [('import mbqc.qres, mbqc.qcomp, mbqc.lib', HEAVY),
+         ('from mbqc.qres import flow', ['networkx', 'pygraphviz']),
+         ('from mbqc.qres import OpenGraph', ['pygraphviz']),
+         ('from mbqc.qcomp import Lazy1WQC', ['pygraphviz']),
+         ('from mbqc.lib import FlowError, instrument', HEAVY)]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+%s
+t = time.perf_counter() - t0
+print(json.dumps([t, [m for m in %r if m in sys.modules]]))
+"""
+
+
+def import_time(statement, repeat=5):
+    """
+    Minimum time of statement in a fresh interpreter, in seconds, and the
+    heavy modules it loaded
+
+    return
+        (float, list(str))
+    """
+    best, loaded = float('inf'), []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _PROBE%(statement, HEAVY)], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        t, loaded = json.loads(out.strip().splitlines()[-1])
+        best = min(best, t)
+    return best, loaded
+
+
+if __name__ == "__main__" :
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    nfail = 0
+    print('%-44s %10s  %s'%('statement', 'ms', 'heavy modules'))
+    for statement, forbidden in CASES :
+        t, loaded = import_time(statement, repeat)
+        bad = [m for m in loaded if m in forbidden]
+        fail = bad or (budget is not None and 1e3*t > budget)
+        nfail += bool(fail)
+        print('%-44s %10.1f  %s%s'%(statement, 1e3*t, ' '.join(loaded) or '-',
+                                     '  FAIL' if fail else ''))
+    sys.exit(nfail)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Trajectories per second of simulate_noisy on a brickwork, by batch size and
+number of processes, and the fidelity of the lazy and the eager schedule.
+
+usage:
+    python -m benchmarks.bench_noise [H] [W] [ntrajectory]
+"""
+
+#standard libraries
+import sys
+from math import pi
+
+#non-standard libraries
+import numpy as np
+from example_graphstates import graph_brickwork
+from mbqc.qcomp import Lazy1WQC
+
+
+def lazy1wqc(H, W, seed=1):
+    G, I, O = graph_brickwork(H, W)
+    rs = np.random.RandomState(seed)
+    lazyc = Lazy1WQC(G, I, O, dict((n, rs.rand()*2*pi) for n in G.nodes if n not in O))
+    lazyc.set_total_order_random(seed)
+    return lazyc
+
+
+if __name__ == "__main__" :
+    H = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    W = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    ntrajectory = int(sys.argv[3]) if len(sys.argv) > 3 else 2048
+    lazyc = lazy1wqc(H, W)
+
+    print('%8s %6s %12s %10s %22s'%('batch', 'ncpu', 'traj/s', 'fidelity', '95% interval'))
+    for batch, ncpu in [(1, 1), (16, 1), (256, 1), (256, None)]:
+        n = ntrajectory if batch > 1 else ntrajectory//16
+        r = lazyc.simulate_noisy(0.005, 0.005, n, batch=batch, ncpu=ncpu, random_seed=1)
+        print('%8i %6s %12.0f %10.4f %10.4f %10.4f'%(batch, ncpu or 'all', n/r['seconds'],
+              r['fidelity'], *r['fidelity_ci']))
+
+    print('%8s %10s %10s'%('schedule', 'exposure', 'fidelity'))
+    for lazy in [True, False] if H*W <= 16 else [True]:
+        r = lazyc.simulate_noisy(0.005, 0.005, ntrajectory, batch=64, random_seed=1, lazy=lazy)
+        print('%8s %10i %10.4f'%('lazy' if lazy else 'eager', r['exposure'], r['fidelity']))
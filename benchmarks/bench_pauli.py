@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Lazy1WQC before and after eliminate_pauli, for angles drawn with a fraction
+of Pauli angles: nodes, physical qubits of one random ordering, and the time
+of simulate_batch on a batch of angle sets.
+
+usage:
+    python -m benchmarks.bench_pauli [fraction1,fraction2,..] [batch]
+"""
+
+#standard libraries
+import sys
+from math import pi
+from time import perf_counter
+
+#non-standard libraries
+import numpy as np
+from example_graphstates import graph_brickwork, graph_exact3grover
+from mbqc.qcomp import Lazy1WQC
+
+
+def _angles(G, O, fraction, seed=1):
+    rs = np.random.RandomState(seed)
+    return dict((n, rs.randint(4)*pi/2 if rs.rand() < fraction else rs.rand()*2*pi)
+                for n in G.nodes if n not in O)
+
+
+def _simulate(lazyc, batch):
+    phis = np.tile([lazyc.phi.get(n, 0.) for n in lazyc.G.nodes], (batch, 1))
+    t0 = perf_counter()
+    lazyc.simulate_batch(phis, random_seed=1)
+    return perf_counter()-t0
+
+
+def bench(G, I, O, fraction, batch=16):
+    """
+    return
+        dict
+    """
+    lazyc = Lazy1WQC(G, I, O, _angles(G, O, fraction))
+    t0 = perf_counter()
+    reduced, report = lazyc.eliminate_pauli()
+    seconds = perf_counter()-t0
+    return {'nnode': report['nnode'],
+            'nqubit': (lazyc.physical_qubit(random_seed=7), reduced.physical_qubit(random_seed=7)),
+            'simulate': (_simulate(lazyc, batch), _simulate(reduced, batch)),
+            'eliminate': seconds}
+
+
+if __name__ == "__main__" :
+    fractions = [float(f) for f in sys.argv[1].split(',')] if len(sys.argv) > 1 else [0.5, 0.8, 1.]
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    graphs = [('exact3grover', graph_exact3grover), ('brickwork-4x20', lambda: graph_brickwork(4, 20))]
+
+    print('%-16s %6s %11s %11s %21s %12s'%('graph', 'pauli', 'nodes', 'nqubit', 'simulate [s]', 'eliminate[s]'))
+    for name, func in graphs :
+        for fraction in fractions :
+            r = bench(*func(), fraction, batch)
+            print('%-16s %6.2f %5i %5i %5i %5i %10.2e %10.2e %12.2e'%(name, fraction, *r['nnode'],
+                  *r['nqubit'], *r['simulate'], r['eliminate']))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Feed-forward latency of the Pauli frame: for every measurement in flow
+order, the corrected angle is read and the outcome is recorded.
+
+    frame  : PauliFrame.angle + PauliFrame.record
+    parity : parity of the outcomes over the dependency sets of the node
+
+usage:
+    python -m benchmarks.bench_pauliframe [H] [W1,W2,..]
+"""
+
+#standard libraries
+import sys
+from math import pi
+from time import perf_counter
+
+#non-standard libraries
+import numpy as np
+from example_graphstates import graph_brickwork
+from mbqc.qres import OpenGraph
+from mbqc.qcomp import PauliFrame
+
+
+def bench_brickwork(H, W, seed=1):
+    """
+    Latency per measurement in nanoseconds, on a H x W brickwork
+
+    return
+        dict
+    """
+    G, I, O = graph_brickwork(H, W)
+    og = OpenGraph(G, I, O)
+    order = [n for k in sorted(og.ordering_class) for n in og.ordering_class[k] if n not in O]
+    rs = np.random.RandomState(seed)
+    phi = dict((n, rs.rand()*2*pi) for n in order)
+    outcomes = dict((n, int(s)) for n, s in zip(order, rs.randint(2, size=len(order))))
+
+    t0 = perf_counter()
+    frame = PauliFrame(G, og.f, phi)
+    t1 = perf_counter()
+    for node in order :
+        frame.angle(node)
+        frame.record(node, outcomes[node])
+    t2 = perf_counter()
+
+    deps = dict((n, frame.dependencies(n)) for n in order)
+    t3 = perf_counter()
+    for node in order :
+        xdep, zdep = deps[node]
+        x = sum(outcomes[j] for j in xdep) % 2
+        z = sum(outcomes[j] for j in zdep) % 2
+        (-1)**x*phi[node] + z*pi
+    t4 = perf_counter()
+
+    return {'nodes': len(G), 'precompute_s': t1-t0,
+            'frame_ns': (t2-t1)/len(order)*1e9, 'parity_ns': (t4-t3)/len(order)*1e9}
+
+
+if __name__ == "__main__" :
+    args = sys.argv[1:]
+    H = int(args[0]) if len(args) > 0 else 5
+    Ws = [int(w) for w in args[1].split(',')] if len(args) > 1 else [100, 1000, 10000, 40000]
+
+    print('%9s %14s %12s %12s'%('nodes', 'precompute[s]', 'frame[ns]', 'parity[ns]'))
+    for W in Ws :
+        r = bench_brickwork(H, W)
+        print('%9i %14.3f %12.0f %12.0f'%(r['nodes'], r['precompute_s'], r['frame_ns'], r['parity_ns']))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Time per flow query on random open graphs: a fresh interpreter per query,
+as the tools do now, against AnalysisService on a Unix socket with one
+request at a time, with pipelined requests that share batches, and with
+the answers in the cache.
+
+usage:
+    python -m benchmarks.bench_service [nquery] [nnode]
+"""
+
+#standard libraries
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+#non-standard libraries
+import networkx as nx
+from mbqc.qcomp import AnalysisService, AnalysisClient
+from benchmarks.bench_import import ROOT
+
+
+_COLD = """
+import networkx as nx
+from mbqc.qres import flow
+G = nx.gnp_random_graph(%i, 0.4, seed=%i)
+print(flow(G, {0}, {%i})[0])
+"""
+
+
+def _requests(nquery, nnode):
+    return [AnalysisClient.encode('flow', nx.gnp_random_graph(nnode, 0.4, seed=s), {0}, {nnode-1})
+            for s in range(nquery)]
+
+
+def cold(nquery, nnode):
+    t0 = perf_counter()
+    for s in range(nquery):
+        subprocess.run([sys.executable, '-c', _COLD%(nnode, s, nnode-1)], cwd=ROOT,
+                       capture_output=True, check=True)
+    return (perf_counter()-t0)/nquery
+
+
+def warm(nquery, nnode):
+    """
+    return
+        dict : seconds per query of 'sequential', 'pipelined' and 'cached',
+        and the metrics of the service
+    """
+    with tempfile.TemporaryDirectory() as tmp :
+        path = os.path.join(tmp, 'mbqc.sock')
+        service = AnalysisService()
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(service.start(path))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        res = dict()
+        with AnalysisClient(path) as client :
+            reqs = _requests(2*nquery, nnode)
+            t0 = perf_counter()
+            for req in reqs[:nquery]:
+                client.map([req])
+            res['sequential'] = (perf_counter()-t0)/nquery
+            t0 = perf_counter()
+            client.map(reqs[nquery:])
+            res['pipelined'] = (perf_counter()-t0)/nquery
+            t0 = perf_counter()
+            client.map(reqs)
+            res['cached'] = (perf_counter()-t0)/(2*nquery)
+            res['metrics'] = client.request('metrics')
+
+        asyncio.run_coroutine_threadsafe(service.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    return res
+
+
+if __name__ == "__main__" :
+    nquery = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    nnode = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    t_cold = cold(min(nquery, 10), nnode)
+    res = warm(nquery, nnode)
+    print('%-24s %12s'%('mode', 'ms/query'))
+    print('%-24s %12.3f'%('fresh interpreter', 1e3*t_cold))
+    for mode in ['sequential', 'pipelined', 'cached']:
+        print('%-24s %12.3f'%(mode, 1e3*res[mode]))
+    m = res['metrics']
+    print('mean batch %.1f, max queue %i, latency p50 %.2f ms p90 %.2f ms p99 %.2f ms'%(
+          m['mean_batch'], m['max_queue'], 1e3*m['p50'], 1e3*m['p90'], 1e3*m['p99']))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+__doc__="""
+The bounds of physical qubits of many graphs on a pool, with the graphs
+pickled to the workers against a SharedGraphBatch.
+
+    pickled : Pool.starmap over the Lazy1WQC objects, every worker runs
+              bound_physical_qubit_iotypes on its pickled networkx graph
+    shared  : Lazy1WQC.bound_physical_qubit_many, the workers get the handle
+              of the batch and count on its CSR and layer views; the time
+              includes building the batch, which is also given apart
+    bytes   : the pickled payload of one task
+
+usage:
+    python -m benchmarks.bench_shared [H] [W] [ngraph] [ncpu] [nsampling]
+"""
+
+#standard libraries
+import pickle
+import sys
+from multiprocessing import Pool
+from time import perf_counter
+
+#non-standard libraries
+from example_graphstates import graph_brickwork
+from mbqc.qres import SharedGraphBatch
+from mbqc.qcomp import Lazy1WQC
+from mbqc.qcomp._lazy1wqc import _bound_shared
+
+
+def _pickled(lazyc, nsampling, seeds):
+    return lazyc.bound_physical_qubit_iotypes(nsampling, hash_number=seeds)
+
+
+if __name__ == "__main__" :
+    H = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    W = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    ngraph = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    ncpu = int(sys.argv[4]) if len(sys.argv) > 4 else 2
+    nsampling = int(sys.argv[5]) if len(sys.argv) > 5 else 10
+    seeds = list(range(1, nsampling+1))
+
+    G, I, O = graph_brickwork(H, W)
+    graphs = [Lazy1WQC(G.copy(), set(I), set(O), dict()) for _ in range(ngraph)]
+    args = [(lazyc, nsampling, seeds) for lazyc in graphs]
+
+    t0 = perf_counter()
+    with Pool(ncpu) as pool :
+        pickled = pool.starmap(_pickled, args, chunksize=1)
+    t1 = perf_counter()
+    shared = Lazy1WQC.bound_physical_qubit_many(graphs, nsampling, hash_number=seeds, ncpu=ncpu)
+    t2 = perf_counter()
+    with SharedGraphBatch.create(graphs) as batch :
+        t3 = perf_counter()
+        handle = len(pickle.dumps((batch.handle, _bound_shared, 0, 1, (nsampling, seeds))))
+
+    print('%i graphs of %i nodes, %i samples, %i cpu'%(ngraph, len(G), nsampling, ncpu))
+    print('%10s %12s %14s'%('', 'seconds', 'bytes/task'))
+    print('%10s %12.3f %14i'%('pickled', t1-t0, len(pickle.dumps(args[0]))))
+    print('%10s %12.3f %14i'%('shared', t2-t1, handle))
+    print('%10s %12.3f'%('build', t3-t2))
+    upper = max(b[('quantum', 'quantum')][1] for b in pickled)
+    print('most qubits, quantum io: pickled %i, shared %i'%(upper, shared[('quantum', 'quantum')][:, 1].max()))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Scaling of the stabilizer tableau backend on brickwork graphs.
+
+    lazy : Lazy1WQC.run_clifford, the tableau is as wide as the number of
+           physical qubits
+    full : GraphState.init_stabilizer on the whole graph, then all Pauli
+           measurements in the total order (no feed-forward)
+
+usage:
+    python -m benchmarks.bench_stabilizer [H] [W1,W2,..] [full_max_nodes]
+"""
+
+#standard libraries
+import sys
+from math import pi
+from time import perf_counter
+
+#non-standard libraries
+import numpy as np
+from example_graphstates import graph_brickwork
+from mbqc.qcomp import Lazy1WQC
+
+
+def bench_brickwork(H, W, full_max_nodes, seed=1):
+    """
+    Time the tableau backend on a H x W brickwork with random Pauli angles
+
+    return
+        dict
+    """
+    G, I, O = graph_brickwork(H, W)
+    rs = np.random.RandomState(seed)
+    phi = dict((n, rs.randint(4)*pi/2) for n in G.nodes if n not in O)
+
+    t0 = perf_counter()
+    lazyc = Lazy1WQC(G, I, O, phi)
+    lazyc.set_total_order_random(random_seed=seed)
+    t1 = perf_counter()
+    _, tab, _ = lazyc.run_clifford(random_seed=seed)
+    t2 = perf_counter()
+    res = {'nodes': len(G), 'build_s': t1-t0, 'lazy_s': t2-t1, 'lazy_width': tab.n}
+
+    if len(G) <= full_max_nodes :
+        t2 = perf_counter()
+        lazyc.init_stabilizer()
+        rng = np.random.RandomState(seed)
+        for node in lazyc.sortedtot_nodes():
+            if node in phi :
+                lazyc.measure_pauli(node, phi[node], rng)
+        res['full_s'] = perf_counter()-t2
+    return res
+
+
+if __name__ == "__main__" :
+    args = sys.argv[1:]
+    H = int(args[0]) if len(args) > 0 else 5
+    Ws = [int(w) for w in args[1].split(',')] if len(args) > 1 else [100, 400, 1000, 2000, 4000, 8000]
+    full_max = int(args[2]) if len(args) > 2 else 2000
+
+    print('%8s %10s %10s %6s %10s'%('nodes', 'build[s]', 'lazy[s]', 'width', 'full[s]'))
+    for W in Ws :
+        r = bench_brickwork(H, W, full_max)
+        print('%8i %10.3f %10.3f %6i %10s'%(r['nodes'], r['build_s'], r['lazy_s'],
+              r['lazy_width'], '%.3f'%r['full_s'] if 'full_s' in r else '-'))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Throughput and memory of StreamingLazy1WQC on long brickworks streamed
+column by column: the nodes held and the traced peak memory stay flat while
+the length grows.
+
+usage:
+    python -m benchmarks.bench_streaming [H] [W1,W2,..]
+"""
+
+#standard libraries
+import sys
+import tracemalloc
+from time import perf_counter
+
+#non-standard libraries
+from mbqc.qres import brickwork_fragments
+from mbqc.qcomp import StreamingLazy1WQC
+
+
+def bench(H, W):
+    """
+    return
+        dict
+    """
+    t0 = perf_counter()
+    stats = StreamingLazy1WQC().run(brickwork_fragments(H, W, phi=lambda n: 0.1))
+    seconds = perf_counter()-t0
+
+    #a second run under tracemalloc, which slows it down
+    tracemalloc.start()
+    StreamingLazy1WQC().run(brickwork_fragments(H, W, phi=lambda n: 0.1))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats.update({'seconds': seconds, 'peak_kib': peak/1024})
+    return stats
+
+
+if __name__ == "__main__" :
+    H = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    Ws = [int(w) for w in sys.argv[2].split(',')] if len(sys.argv) > 2 else [1000, 10000, 50000]
+
+    print('%10s %8s %8s %12s %10s %10s'%('nodes', 'nqubit', 'held', 'nodes/s', 'seconds', 'peak KiB'))
+    for W in Ws :
+        r = bench(H, W)
+        print('%10i %8i %8i %12.0f %10.2f %10.1f'%(r['nnode'], r['nqubit'], r['max_memory'],
+                                                  r['nnode']/r['seconds'], r['seconds'], r['peak_kib']))
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Benchmark suite of the core algorithms, with JSON baselines.
+
+    flow/<graph>          : flow() on the example_graphstates graphs
+    flow/brickwork-HxW    : flow() on growing brickworks
+    generate_all/nI-nO-nA : OpenGraph.generate_all on 2 cpu
+    physical_qubit/..     : Lazy1WQC.physical_qubit, one random ordering
+    bound_physical_qubit/..: Lazy1WQC.bound_physical_qubit(10)
+    lemma2/.. to lemma4/..: the lemma checks
+    draw_graph/dot-..     : the DOT string of OpenGraph.draw_graph
+    draw_graph/agraph-..  : the DOT string parsed by pygraphviz, only where
+                            pygraphviz is installed
+    import/<statement>    : the statements of bench_import, in a fresh interpreter
+
+Every case is timed repeat times, each time over enough calls to last about
+MIN_TIME; the time per call is the median of the repeats.
+
+usage:
+    python -m benchmarks.suite run [-o results.json] [-k substring] [-r repeat]
+    python -m benchmarks.suite compare baseline.json [results.json] [-t 0.2] [-k ..]
+
+compare runs the suite unless results.json is given, prints the ratio to the
+baseline of every case and exits with 1 if a case is slower than
+(1 + threshold) times its baseline.
+"""
+
+#standard libraries
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from statistics import median
+from time import perf_counter
+
+#non-standard libraries
+import networkx as nx
+import numpy as np
+import example_graphstates
+from example_graphstates import graph_brickwork, graph_example_boqc
+from mbqc.qres import OpenGraph, flow
+from mbqc.qcomp import Lazy1WQC
+from benchmarks.bench_import import CASES as IMPORT_CASES, import_time
+
+
+MIN_TIME = 0.05
+BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'baseline.json')
+
+
+def _example_graphs():
+    """ The example graph functions that build without error
+    """
+    res = list()
+    for name in sorted(dir(example_graphstates)):
+        func = getattr(example_graphstates, name)
+        if name.startswith('graph_') and callable(func) and name != 'graph_brickwork':
+            try :
+                res.append((name, func()))
+            except Exception :
+                pass
+    return res
+
+
+def _lazy(G, I, O, seed=1):
+    lazyc = Lazy1WQC(G, I, O, dict())
+    lazyc.set_total_order_random(random_seed=seed)
+    return lazyc
+
+
+def cases():
+    """
+    The benchmark cases
+
+    return
+        list((str, callable)) : name and a setup function returning the
+        callable to time
+    """
+    res = list()
+    for name, (G, I, O) in _example_graphs():
+        res.append(('flow/%s'%name, lambda G=G, I=I, O=O: lambda: flow(G, I, O)))
+    for W in [50, 200, 800]:
+        res.append(('flow/brickwork-5x%i'%W,
+                    lambda W=W: (lambda G, I, O: lambda: flow(G, I, O))(*graph_brickwork(5, W))))
+
+    for nI, nO, nA in [(1, 1, 2), (1, 2, 2), (2, 2, 1)]:
+        def setup(nI=nI, nO=nO, nA=nA):
+            nodes = list(range(nI+nO+nA))
+            I, O = set(nodes[:nI]), set(nodes[len(nodes)-nO:])
+            return lambda: OpenGraph.generate_all(nodes, I, O, ncpu=2)
+        res.append(('generate_all/%i-%i-%i'%(nI, nO, nA), setup))
+
+    graphs = [('boqc', graph_example_boqc), ('brickwork-3x10', lambda: graph_brickwork(3, 10))]
+    for gname, gfunc in graphs :
+        res.append(('physical_qubit/%s'%gname,
+                    lambda gfunc=gfunc: (lambda L: lambda: L.physical_qubit(random_seed=7))(_lazy(*gfunc()))))
+        res.append(('bound_physical_qubit/%s'%gname,
+                    lambda gfunc=gfunc: (lambda L: lambda: L.bound_physical_qubit(10, hash_number=list(range(1, 11))))(_lazy(*gfunc()))))
+        for lemma in ['lemma2', 'lemma3', 'lemma4']:
+            res.append(('%s/%s'%(lemma, gname),
+                        lambda gfunc=gfunc, lemma=lemma: getattr(_lazy(*gfunc()), lemma)))
+
+    for H, W in [(3, 10), (5, 100)]:
+        res.append(('draw_graph/dot-%ix%i'%(H, W),
+                    lambda H=H, W=W: (lambda og: lambda: og.to_dot('bench'))(OpenGraph(*graph_brickwork(H, W)))))
+    if importlib.util.find_spec('pygraphviz') is not None :
+        res.append(('draw_graph/agraph-5x100', _agraph_setup))
+
+    for statement, _ in IMPORT_CASES :
+        res.append(('import/%s'%statement, lambda s=statement: lambda: import_time(s, 1)))
+    return res
+
+
+def _agraph_setup():
+    import pygraphviz as pgv
+    sdot = OpenGraph(*graph_brickwork(5, 100)).to_dot('bench')
+    return lambda: pgv.AGraph(sdot)
+
+
+def time_case(func, repeat=5):
+    """
+    Median and minimum time per call in seconds
+    """
+    t0 = perf_counter()
+    func()
+    first = perf_counter()-t0
+    number = max(1, int(MIN_TIME/first)) if first > 0 else 1000
+
+    times = list()
+    for _ in range(repeat):
+        t0 = perf_counter()
+        for _ in range(number):
+            func()
+        times.append((perf_counter()-t0)/number)
+    return {'median_s': median(times), 'min_s': min(times), 'number': number, 'repeat': repeat}
+
+
+def run(select=None, repeat=5, verbose=True):
+    """
+    Run the cases whose name contains select
+
+    return
+        dict{'meta', 'results'}
+    """
+    results = dict()
+    for name, setup in cases():
+        if select and select not in name :
+            continue
+        results[name] = time_case(setup(), repeat)
+        if verbose :
+            print('%-48s %12.3e s'%(name, results[name]['median_s']), flush=True)
+    meta = {'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'machine': platform.machine(),
+            'system': platform.system(), 'cpu_count': os.cpu_count(),
+            'numpy': np.__version__, 'networkx': nx.__version__}
+    return {'meta': meta, 'results': results}
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Ratio current/baseline of the median time of the common cases
+
+    return
+        (list((str, float, float, float)), list(str)) : (name, baseline,
+        current, ratio) and the names of the slowed-down cases
+    """
+    rows, slow = list(), list()
+    for name, cur in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        base = baseline['results'][name]['median_s']
+        ratio = cur['median_s']/base if base > 0 else float('inf')
+        rows.append((name, base, cur['median_s'], ratio))
+        if ratio > 1 + threshold :
+            slow.append(name)
+    return rows, slow
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    sub = parser.add_subparsers(dest='command', required=True)
+    prun = sub.add_parser('run')
+    prun.add_argument('-o', '--output', default=None, help='JSON results file')
+    pcmp = sub.add_parser('compare')
+    pcmp.add_argument('baseline', nargs='?', default=BASELINE)
+    pcmp.add_argument('current', nargs='?', default=None, help='results file, default run now')
+    pcmp.add_argument('-t', '--threshold', type=float, default=0.2)
+    for p in (prun, pcmp):
+        p.add_argument('-k', '--select', default=None, help='only the cases containing this')
+        p.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        res = run(args.select, args.repeat)
+        if args.output :
+            with open(args.output, 'w') as f :
+                json.dump(res, f, indent=1, sort_keys=True)
+        return 0
+
+    with open(args.baseline) as f :
+        baseline = json.load(f)
+    if args.current :
+        with open(args.current) as f :
+            current = json.load(f)
+    else :
+        current = run(args.select, args.repeat, verbose=False)
+    rows, slow = compare(baseline, current, args.threshold)
+    print('%-48s %12s %12s %8s'%('case', 'baseline[s]', 'current[s]', 'ratio'))
+    for name, base, cur, ratio in rows :
+        flag = '  SLOWER' if name in slow else ''
+        print('%-48s %12.3e %12.3e %8.2f%s'%(name, base, cur, ratio, flag))
+    if slow :
+        print('%i case(s) slower than %.0f%% over the baseline'%(len(slow), 100*args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == "__main__" :
+    sys.exit(main(sys.argv[1:]))
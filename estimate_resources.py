@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+__doc__ = """
+    Estimate the resources of a brute-force run before launching it.
+
+    Implemented :
+
+        - generate_all : OpenGraph.generate_all, time and memory per mode
+        - bound        : Lazy1WQC.bound_physical_qubit for a sample count
+
+    """
+
+import sys
+
+
+#non standard library
+import example_graphstates
+from mbqc.qcomp import Lazy1WQC, estimate_generate_all, estimate_bound_physical_qubit
+from mbqc.lib import read_graphs
+
+
+def _bytes(n):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if n < 1024 :
+            return '%.1f %s'%(n, unit)
+        n /= 1024
+    return '%.1f PB'%n
+
+
+def _seconds(s):
+    for unit, size in [('s', 60), ('min', 60), ('h', 24), ('d', 365)]:
+        if s < size :
+            return '%.1f %s'%(s, unit)
+        s /= size
+    return '%.1f y'%s
+
+
+def print_generate_all(nnode, I, O, ncpu=None, pilot=200):
+    est = estimate_generate_all(range(nnode), I, O, ncpu=ncpu, pilot=pilot)
+    print('edges of the complete graph  %i'%est['nedge'])
+    print('candidate edge subsets       %i'%est['ncandidate'])
+    print('share with flow (pilot %i)  %.4f  [%.4f, %.4f]'%(est['pilot'], est['flow_share'],
+                                                           *est['flow_share_ci']))
+    print('expected graphs with flow    %.0f'%est['nflow'])
+    print('time per candidate           %.2e s'%est['per_graph_s'])
+    print('wall-clock on %i cpu         %s'%(est['ncpu'], _seconds(est['seconds'])))
+    for mode, mem in est['memory'].items():
+        print('peak memory, %-8s        %s'%(mode, _bytes(mem)))
+
+
+def print_bound(graph, nsampling, pilot=3):
+    if ':' in graph or graph.endswith('.json') or graph.endswith('.edgelist'):
+        path, _, record = graph.partition(':')
+        G, I, O, _ = next(read_graphs(path, start=int(record or 0)))
+    else :
+        G, I, O = getattr(example_graphstates, graph)()
+    est = estimate_bound_physical_qubit(Lazy1WQC(G, I, O, dict()), nsampling, pilot=pilot)
+    print('nodes                        %i'%len(G))
+    print('time per sample              %.2e s'%est['per_sample_s'])
+    print('%8i samples              %s'%(nsampling, _seconds(est['seconds'])))
+
+
+if __name__ == "__main__" :
+    args = sys.argv[1:]
+
+    err_message = """
+    You did it wrong, try this:
+
+        estimate_resources.py generate_all n_node I O [ncpu] [pilot]
+        estimate_resources.py bound graph n_sampling [pilot]
+
+    where I and O are comma separated nodes in 0..n_node-1, e.g. 1 0,1,3
+    and graph is a function of example_graphstates, e.g. graph_H, or a
+    corpus file with an optional record, e.g. out/122/random_graphs.json:5
+    """
+    try :
+        kind = args[0]
+        if kind == 'generate_all':
+            nnode = int(args[1])
+            I, O = [set(int(n) for n in a.split(',')) for a in args[2:4]]
+            ncpu = int(args[4]) if len(args) > 4 else None
+            pilot = int(args[5]) if len(args) > 5 else 200
+        elif kind == 'bound':
+            graph, nsampling = args[1], int(args[2])
+            pilot = int(args[3]) if len(args) > 3 else 3
+        else :
+            sys.exit(err_message)
+    except (IndexError, ValueError) :
+        sys.exit(err_message)
+
+    if kind == 'generate_all':
+        print_generate_all(nnode, I, O, ncpu, pilot)
+    else :
+        print_bound(graph, nsampling, pilot)
@@ -0,0 +1,10 @@
+from mbqc.lib._lazyimport import lazy_exports
+
+#name: module, the modules are imported on first use of one of their names
+_exports = {'BlindAngles': '._crypto',
+            'QuantumChannel': '._runtime', 'RandomDevice': '._runtime',
+            'StateVectorDevice': '._runtime', 'BQCServer': '._runtime',
+            'BQCClient': '._runtime', 'run_local': '._runtime'}
+
+__all__ = list(_exports)
+__getattr__, __dir__ = lazy_exports(__name__, dict((k, (m, k)) for k, m in _exports.items()))
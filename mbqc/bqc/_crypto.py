@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Angle encryption of blind 1WQC over node-indexed arrays.
+
+implemented:
+
+    BlindAngles --- the keys theta = k pi/4 and r of every node, for a batch
+    of B patterns, as (B, n) uint8 arrays over list(G.nodes). The masked angle
+
+        delta_i = (-1)^{x_i} phi_i + z_i pi + theta_i + r_i pi
+
+    and the decrypted outcome s_i = b_i + r_i are computed for any set of
+    nodes at once. The byproducts x_i, z_i are the parities of the decrypted
+    outcomes over the flow dependency sets of PauliFrame, so the kernels are
+    gathers and prefix sums without a loop over nodes. The output nodes have
+    no angle (NaN) and their keys are 0.
+"""
+
+#standard libraries
+from math import pi
+
+#non-standard libraries
+import numpy as np
+from mbqc.qcomp import PauliFrame
+
+
+class BlindAngles:
+    """
+    Keys and masked angles of B blind patterns sharing one graph and flow.
+    """
+    def __init__(self, phi, x_deps, z_deps, batch=1, random_seed=None):
+        """
+        param
+            :phi: numpy.ndarray (n,) or (B, n), the angles, NaN for the nodes
+                  that are not measured
+            :x_deps: (ptr, idx), CSR of the nodes whose outcomes flip X of a
+                     node, see PauliFrame.x_ptr, PauliFrame.x_dep
+            :z_deps: (ptr, idx), the same for Z
+            :batch: int, the number of patterns B
+            :random_seed: int, the seed of the keys
+        """
+        self.phi = np.atleast_2d(np.asarray(phi, dtype=float))
+        if self.phi.shape[0] not in (1, batch):
+            raise ValueError('phi has a wrong batch size')
+        self.batch, self.nnode = batch, self.phi.shape[1]
+        self.measured = ~np.isnan(self.phi).all(axis=0)
+        self.x_ptr, self.x_dep = x_deps
+        self.z_ptr, self.z_dep = z_deps
+        self.keygen(random_seed)
+
+
+    @classmethod
+    def from_flow(cls, G, f, phi, batch=1, random_seed=None):
+        """
+        param
+            :G: networkx.Graph
+            :f: dict{node:node}, the flow
+            :phi: dict{node:float} or numpy.ndarray (n,) or (B, n) over
+                  list(G.nodes)
+
+        return
+            BlindAngles
+        """
+        if isinstance(phi, dict):
+            phi = np.array([phi.get(n, np.nan) for n in G.nodes], dtype=float)
+        frame = PauliFrame(G, f)
+        return cls(phi, (frame.x_ptr, frame.x_dep), (frame.z_ptr, frame.z_dep), batch, random_seed)
+
+
+    def keygen(self, random_seed=None):
+        """
+        Draw new keys: one random byte per node gives theta (3 bits) and r
+        (1 bit)
+        """
+        key = np.random.RandomState(random_seed).randint(16, size=(self.batch, self.nnode), dtype=np.uint8)
+        key *= self.measured
+        self.theta = key & np.uint8(7)
+        self.r = key >> np.uint8(3)
+
+
+    def thetas(self, idx=None):
+        """ The angles theta of the qubits |+_theta> sent to the server
+        """
+        idx = slice(None) if idx is None else idx
+        return self.theta[:, idx]*(pi/4)
+
+
+    def byproducts(self, s, idx=None):
+        """
+        The byproducts of the nodes idx
+
+        param
+            :s: numpy.ndarray (B, n) of int, the decrypted outcomes, 0 for the
+                nodes not measured yet
+            :idx: numpy.ndarray of int, node indices, default all nodes
+
+        return
+            (numpy.ndarray (B, k), numpy.ndarray (B, k)) : x and z as uint8
+        """
+        idx = None if idx is None else np.asarray(idx)
+        s = np.atleast_2d(s)
+        return (_parity(s, self.x_ptr, self.x_dep, idx), _parity(s, self.z_ptr, self.z_dep, idx))
+
+
+    def encrypt(self, s, idx=None):
+        """
+        The masked angles delta of the nodes idx, in [0, 2pi)
+
+        param
+            :s: numpy.ndarray (B, n), the decrypted outcomes so far, it must
+                hold the outcomes of every dependency of idx
+            :idx: numpy.ndarray of int, node indices, default all nodes
+
+        return
+            numpy.ndarray (B, k)
+        """
+        x, z = self.byproducts(s, idx)
+        idx = slice(None) if idx is None else idx
+        phi = self.phi[:, idx]
+        delta = np.where(x, -phi, phi) + (z + self.r[:, idx])*pi + self.theta[:, idx]*(pi/4)
+        return np.mod(delta, 2*pi)
+
+
+    def decrypt(self, b, idx=None):
+        """
+        The outcomes s = b + r of the nodes idx
+
+        param
+            :b: numpy.ndarray (B, k) of int, the outcomes from the server
+            :idx: numpy.ndarray of int, node indices, default all nodes
+
+        return
+            numpy.ndarray (B, k) of uint8
+        """
+        idx = slice(None) if idx is None else idx
+        return np.asarray(b, dtype=np.uint8) ^ self.r[:, idx]
+
+
+    def run(self, b, rounds):
+        """
+        Decrypt a whole transcript and the angles it was computed with. The
+        outcomes of an honest-but-blind server do not depend on delta, so a
+        recorded transcript is processed round by round without messages.
+
+        param
+            :b: numpy.ndarray (B, n), the outcomes from the server
+            :rounds: list(numpy.ndarray), node indices of the measurement rounds
+
+        return
+            (numpy.ndarray (B, n), numpy.ndarray (B, n)) : s and delta
+        """
+        s = np.zeros((self.batch, self.nnode), dtype=np.uint8)
+        delta = np.full((self.batch, self.nnode), np.nan)
+        for idx in rounds :
+            delta[:, idx] = self.encrypt(s, idx)
+            s[:, idx] = self.decrypt(b[:, idx], idx)
+        return s, delta
+
+
+def _parity(s, ptr, dep, idx):
+    """
+    Parity of s over the CSR segments dep[ptr[i]:ptr[i+1]] of the nodes idx
+    """
+    if idx is None :
+        offset, lengths, flat = ptr[:-1], np.diff(ptr), dep
+    else :
+        start = ptr[idx]
+        lengths = ptr[idx+1] - start
+        #positions of the segments in dep, concatenated
+        offset = np.cumsum(lengths) - lengths
+        flat = dep[np.arange(lengths.sum()) - np.repeat(offset - start, lengths)]
+    #a uint8 prefix sum wraps modulo 256, which keeps the parity
+    acc = np.zeros((s.shape[0], len(flat)+1), dtype=np.uint8)
+    np.cumsum(s[:, flat], axis=1, dtype=np.uint8, out=acc[:, 1:])
+    return (acc[:, offset+lengths] - acc[:, offset]) & np.uint8(1)
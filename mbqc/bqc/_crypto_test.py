@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.bqc._crypto.py
+"""
+
+from math import pi
+import numpy as np
+
+from example_graphstates import graph_brickwork
+from mbqc.qres import OpenGraph
+from mbqc.qcomp import PauliFrame
+from mbqc.bqc import BlindAngles
+
+
+def test_encrypt_matches_frame():
+    """
+    The masked angles of a transcript are the frame-corrected angles plus
+    theta + r pi, for every pattern of a batch; decrypt undoes the pad r
+    """
+    G, I, O = graph_brickwork(3, 25)
+    og = OpenGraph(G, I, O)
+    nodes = list(G.nodes)
+    col = dict((n, i) for i, n in enumerate(nodes))
+    rs = np.random.RandomState(4)
+    phi = rs.rand(3, len(nodes))*2*pi
+    phi[:, [col[o] for o in O]] = np.nan
+    rounds = [np.array([col[n] for n in og.ordering_class[k] if n not in O], dtype=np.int64)
+              for k in sorted(og.ordering_class)]
+
+    keys = BlindAngles.from_flow(G, og.f, phi, batch=3, random_seed=7)
+    b = rs.randint(2, size=(3, len(nodes)))
+    s, delta = keys.run(b, rounds)
+    assert np.allclose(np.mod(keys.encrypt(s), 2*pi)[:, keys.measured], delta[:, keys.measured])
+
+    for p in range(3):
+        frame = PauliFrame(G, og.f, dict(zip(nodes, phi[p])))
+        for idx in rounds :
+            for i in idx.tolist():
+                expected = frame.angle(nodes[i]) + keys.theta[p, i]*pi/4 + keys.r[p, i]*pi
+                assert np.isclose(np.mod(expected - delta[p, i] + pi, 2*pi), pi)
+                assert s[p, i] == b[p, i] ^ keys.r[p, i]
+                frame.record(nodes[i], s[p, i])
+        x, z = keys.byproducts(s[p:p+1])
+        for o in O :
+            assert frame.byproduct(o) == (x[0, col[o]], z[0, col[o]])
+
+
+def test_keys_of_outputs():
+    """
+    The outputs are not measured and get no keys
+    """
+    G, I, O = graph_brickwork(2, 9)
+    og = OpenGraph(G, I, O)
+    phi = dict((n, 0.3) for n in G.nodes if n not in O)
+    keys = BlindAngles.from_flow(G, og.f, phi, batch=4, random_seed=1)
+    out = [list(G.nodes).index(o) for o in O]
+    assert not keys.theta[:, out].any() and not keys.r[:, out].any()
+    assert keys.theta.max() < 8 and keys.r.max() < 2
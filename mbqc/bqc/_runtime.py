@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Asyncio runtime of the blind 1WQC protocol between a server (Bob) and
+clients with limited quantum power.
+
+implemented:
+
+    QuantumChannel --- in-memory stand-in for the quantum channel. The client
+                       puts prepared qubits, the server takes them; the
+                       payload is opaque to the server.
+
+    RandomDevice, StateVectorDevice --- the measurement devices of the
+                       server. The first one returns uniform bits, which is
+                       all the server sees of a blind computation; the second
+                       one simulates the qubits of every session.
+
+    BQCServer --- one process, many concurrent clients over a local socket
+                  (unix or 127.0.0.1). Every client has a session on the
+                  device.
+
+    BQCClient --- runs one Lazy1WQC: the qubits |+_theta> follow the lazy
+                  allocation A(i), the angles delta = phi' + theta + r pi are
+                  sent per round of measurements and the outcomes are
+                  decrypted s = b + r, with the kernels of BlindAngles.
+
+    Messages are length-prefixed JSON lists, so several messages travel in one
+    frame. The client pipelines: the allocation of round k+1 goes out with the
+    angles of round k, before the outcomes of round k are back. The nodes are
+    addressed by their index in list(G.nodes).
+"""
+
+#standard libraries
+import asyncio
+import json
+import struct
+from itertools import count
+from math import sqrt
+from time import perf_counter
+
+#non-standard libraries
+import numpy as np
+from mbqc.qres import BatchedStateVector
+from mbqc.bqc._crypto import BlindAngles
+
+
+_HEADER = struct.Struct('!I')
+
+
+async def send_frame(writer, messages):
+    """ Write a list of messages as a single frame
+    """
+    data = json.dumps(messages).encode()
+    writer.write(_HEADER.pack(len(data)) + data)
+    await writer.drain()
+
+
+async def read_frame(reader):
+    """ Read a frame, return the list of messages or None at end of stream
+    """
+    try :
+        header = await reader.readexactly(_HEADER.size)
+        data = await reader.readexactly(_HEADER.unpack(header)[0])
+    except asyncio.IncompleteReadError :
+        return None
+    return json.loads(data)
+
+
+class QuantumChannel:
+    """
+    In-memory quantum channel, one queue per session and direction.
+    """
+    def __init__(self):
+        self.queues = dict()
+
+    def _queue(self, session, direction):
+        return self.queues.setdefault((session, direction), asyncio.Queue())
+
+    async def send(self, session, qubits, direction='up'):
+        """ Put qubits [(node, payload)], 'up' is client to server
+        """
+        for qubit in qubits :
+            await self._queue(session, direction).put(qubit)
+
+    async def receive(self, session, n, direction='up'):
+        """ Take n qubits
+        """
+        return [await self._queue(session, direction).get() for _ in range(n)]
+
+    def close(self, session):
+        for direction in ('up', 'down'):
+            self.queues.pop((session, direction), None)
+
+
+class RandomDevice:
+    """
+    Stand-in device, the outcomes are uniform random bits.
+    """
+    def __init__(self, seed=None):
+        self.rng = np.random.RandomState(seed)
+        self.qubits = dict()
+
+    def open(self, session, nnode, edges):
+        self.qubits[session] = dict()
+
+    def allocate(self, session, node, payload):
+        self.qubits[session][node] = payload
+
+    def measure(self, session, node, delta):
+        del self.qubits[session][node]
+        return int(self.rng.randint(2))
+
+    def release(self, session):
+        """ The remaining qubits [(node, payload)], the session is closed
+        """
+        return list(self.qubits.pop(session).items())
+
+
+class StateVectorDevice(RandomDevice):
+    """
+    Device simulating the qubits of every session, the payload of a qubit is
+    the angle theta of |+_theta> = |0> + e^{i theta}|1>. The qubits are
+    entangled along the graph as soon as both ends are allocated.
+    """
+    def open(self, session, nnode, edges):
+        neighbors = [list() for _ in range(nnode)]
+        for a, b in edges :
+            neighbors[a].append(b)
+            neighbors[b].append(a)
+        self.qubits[session] = (BatchedStateVector(1), neighbors)
+
+    def allocate(self, session, node, payload):
+        reg, neighbors = self.qubits[session]
+        reg.allocate_state([node], np.array([1, np.exp(1j*payload)])/sqrt(2))
+        for b in neighbors[node]:
+            if b in reg.nodes and b != node :
+                reg.cz(node, b)
+
+    def measure(self, session, node, delta):
+        reg, _ = self.qubits[session]
+        return int(reg.measure(node, delta, self.rng)[0])
+
+    def release(self, session):
+        """ The state of the remaining qubits [(nodes, numpy.ndarray)]
+        """
+        reg, _ = self.qubits.pop(session)
+        return [(list(reg.nodes), reg.state()[0].tolist())]
+
+
+class BQCServer:
+    """
+    Server that measures the qubits of many clients.
+    """
+    def __init__(self, channel, device=None):
+        """
+        param
+            :channel: QuantumChannel
+            :device: RandomDevice or StateVectorDevice, default RandomDevice()
+        """
+        self.channel = channel
+        self.device = RandomDevice() if device is None else device
+        self.nrounds = 0
+        self._ids = count()
+        self._server = None
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """
+        Listen on a unix socket if path is given, else on host:port.
+
+        return
+            str or (host, port), the address to connect to
+        """
+        if path is not None :
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+            return path
+        self._server = await asyncio.start_server(self._handle, host=host, port=port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None :
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        session, opened = None, False
+        try :
+            while True :
+                messages = await read_frame(reader)
+                if messages is None :
+                    break
+                replies = list()
+                for msg in messages :
+                    session, reply = await self._dispatch(session, msg)
+                    opened = msg['type'] != 'bye'
+                    if reply is not None :
+                        replies.append(reply)
+                if replies :
+                    await send_frame(writer, replies)
+        finally :
+            if opened :
+                self.device.release(session)
+            writer.close()
+
+    async def _dispatch(self, session, msg):
+        """ Handle one message, return (session, reply or None)
+        """
+        kind = msg['type']
+        if kind == 'hello':
+            session = next(self._ids)
+            self.device.open(session, msg['nnode'], msg['edges'])
+            return session, {'type': 'welcome', 'session': session}
+        elif kind == 'alloc':
+            for node, payload in await self.channel.receive(session, len(msg['nodes'])):
+                self.device.allocate(session, node, payload)
+            return session, None
+        elif kind == 'measure':
+            outcomes = [self.device.measure(session, node, delta)
+                        for node, delta in zip(msg['nodes'], msg['deltas'])]
+            self.nrounds += 1
+            return session, {'type': 'outcomes', 'nodes': msg['nodes'], 'b': outcomes}
+        elif kind == 'bye':
+            qubits = self.device.release(session)
+            await self.channel.send(session, qubits, direction='down')
+            return session, {'type': 'done', 'nqubit': len(qubits)}
+        raise ValueError('unknown message type %s'%kind)
+
+
+class BQCClient:
+    """
+    Client of one blind computation of a Lazy1WQC. The input is |+> and the
+    output qubits are sent with theta = 0, only the measured qubits are
+    hidden. The byproducts of the outputs are given by byproducts().
+    """
+    def __init__(self, lazyc, channel, random_seed=None):
+        """
+        param
+            :lazyc: Lazy1WQC, the computation with its angles phi, the total
+                    order is set to follow the flow layers
+            :channel: QuantumChannel
+            :random_seed: int, seed of theta and r
+        """
+        self.lazyc = lazyc
+        self.channel = channel
+        self.nodes = list(lazyc.G.nodes)
+        self.index = dict((n, i) for i, n in enumerate(self.nodes))
+        self.keys = BlindAngles.from_flow(lazyc.G, lazyc.f, lazyc.phi_array())
+        self.random_seed = random_seed
+
+        #a round is a layer of the flow, the total order follows the layers
+        key = self.index.get
+        layers = [sorted(lazyc.ordering_class[k], key=key) for k in sorted(lazyc.ordering_class)]
+        lazyc.set_total_order(dict((n, t) for t, n in enumerate(n for l in layers for n in l)))
+        alloc = dict(lazyc.allocation_schedule())
+        self.rounds = [r for r in ([n for n in l if n not in lazyc.O] for l in layers) if r]
+
+        #the qubits of round k are A(i) of its nodes, the inputs come first
+        #and the late allocations of the outputs go with the last round
+        inputs = sorted(lazyc.I, key=key) if lazyc.I_type == 'quantum' else []
+        rest = [a for n in sorted(lazyc.O, key=key) for a in sorted(alloc[n], key=key)]
+        self.alloc = [[a for n in r for a in sorted(alloc[n], key=key)] for r in self.rounds] or [[]]
+        self.alloc[0] = inputs + self.alloc[0]
+        self.alloc[-1] += rest
+
+        self.rounds_idx = [np.array([self.index[n] for n in r], dtype=np.int64) for r in self.rounds]
+        self.s = np.zeros((1, len(self.nodes)), dtype=np.uint8)
+        self.latency = list()
+
+    async def _send_qubits(self, session, nodes):
+        """ Prepare |+_theta> for the nodes and push them into the channel
+        """
+        idx = [self.index[n] for n in nodes]
+        thetas = self.keys.thetas(np.array(idx, dtype=np.int64))[0].tolist()
+        await self.channel.send(session, list(zip(idx, thetas)))
+        return {'type': 'alloc', 'nodes': idx}
+
+    def byproducts(self):
+        """
+        The byproducts X^x Z^z left on the output qubits
+
+        return
+            dict{node:(int, int)}
+        """
+        outputs = np.array(sorted(self.index[n] for n in self.lazyc.O), dtype=np.int64)
+        x, z = self.keys.byproducts(self.s, outputs)
+        return dict((self.nodes[i], (int(a), int(b))) for i, a, b in zip(outputs, x[0], z[0]))
+
+    async def run(self, address):
+        """
+        Run the whole computation against a server.
+
+        param
+            :address: str (unix socket path) or (host, port)
+
+        return
+            dict{node:int} : the decrypted outcomes
+        """
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else :
+            reader, writer = await asyncio.open_connection(*address)
+
+        self.keys.keygen(self.random_seed)
+        self.s[:] = 0
+        await send_frame(writer, [{'type': 'hello', 'nnode': len(self.nodes),
+            'edges': [[self.index[a], self.index[b]] for a, b in self.lazyc.G.edges]}])
+        session = (await read_frame(reader))[0]['session']
+
+        pending = [await self._send_qubits(session, self.alloc[0])]
+        for k, idx in enumerate(self.rounds_idx):
+            deltas = self.keys.encrypt(self.s, idx)[0].tolist()
+            pending.append({'type': 'measure', 'nodes': idx.tolist(), 'deltas': deltas})
+            if k+1 < len(self.rounds):
+                pending.append(await self._send_qubits(session, self.alloc[k+1]))
+
+            t0 = perf_counter()
+            await send_frame(writer, pending)
+            reply = (await read_frame(reader))[0]
+            self.latency.append(perf_counter()-t0)
+            pending = list()
+
+            self.s[0, idx] = self.keys.decrypt([reply['b']], idx)[0]
+
+        await send_frame(writer, pending + [{'type': 'bye'}])
+        nqubit = (await read_frame(reader))[0]['nqubit']
+        self.output_qubits = await self.channel.receive(session, nqubit, direction='down')
+        self.channel.close(session)
+        writer.close()
+        measured = np.concatenate(self.rounds_idx) if self.rounds_idx else []
+        self.outcomes = dict((self.nodes[i], int(self.s[0, i])) for i in measured)
+        return self.outcomes
+
+
+async def run_local(computations, path=None, device=None, seed=None):
+    """
+    Serve many clients concurrently on one machine, through a local socket
+    and the in-memory quantum channel.
+
+    param
+        :computations: list(Lazy1WQC), one per client
+        :path: str, unix socket path, default a 127.0.0.1 port
+        :device: the measurement device, default RandomDevice(seed)
+        :seed: int
+
+    return
+        (dict, list(BQCClient)) : {'rounds', 'seconds', 'rounds_per_s',
+        'latency'} with the per-round latencies of all clients, and the
+        clients
+    """
+    channel = QuantumChannel()
+    server = BQCServer(channel, RandomDevice(seed) if device is None else device)
+    address = await server.start(path=path)
+    clients = [BQCClient(lazyc, channel, random_seed=None if seed is None else seed+i)
+               for i, lazyc in enumerate(computations)]
+    t0 = perf_counter()
+    await asyncio.gather(*[client.run(address) for client in clients])
+    seconds = perf_counter()-t0
+    await server.close()
+    stats = {'rounds': server.nrounds, 'seconds': seconds,
+             'rounds_per_s': server.nrounds/seconds if seconds > 0 else float('inf'),
+             'latency': np.array([t for client in clients for t in client.latency])}
+    return stats, clients
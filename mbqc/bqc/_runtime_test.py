@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.bqc._runtime.py
+"""
+
+import asyncio
+import os
+import tempfile
+from math import pi
+
+import numpy as np
+
+from example_graphstates import graph_1d, graph_brickwork
+from mbqc.qres import BatchedStateVector
+from mbqc.qcomp import Lazy1WQC
+from mbqc.bqc import StateVectorDevice, run_local
+
+
+def _overlap(a, b):
+    return abs(np.vdot(a/np.linalg.norm(a), b/np.linalg.norm(b)))
+
+
+def test_blind_output():
+    """
+    The output of the blind computation, after the byproducts, is the output
+    of the postselected pattern; for every client of a concurrent batch
+    """
+    rs = np.random.RandomState(5)
+    graphs = [graph_1d(), graph_brickwork(2, 5)]
+    computations = list()
+    for G, I, O in graphs :
+        phi = dict((n, rs.randint(8)*pi/4) for n in G.nodes if n not in O)
+        computations.append(Lazy1WQC(G, I, O, phi))
+
+    stats, clients = asyncio.run(run_local(computations, device=StateVectorDevice(1), seed=2))
+    assert stats['rounds'] == sum(len(c.rounds) for c in clients)
+    assert len(stats['latency']) == stats['rounds']
+
+    for lazyc, client in zip(computations, clients):
+        col = list(lazyc.G.nodes)
+        phis = np.array([lazyc.phi.get(n, 0) for n in col])
+        expected, outputs = lazyc.simulate_batch(phis)
+
+        [(nodes, psi)] = client.output_qubits
+        sv = BatchedStateVector(1)
+        sv.allocate_state([col[i] for i in nodes], np.array(psi))
+        for node, (x, z) in client.byproducts().items():
+            sv.x_gate(node, bool(x))
+            sv.z_gate(node, bool(z))
+        assert _overlap(sv.state(outputs)[0], expected[0]) > 1-1e-9
+
+
+def test_unix_socket_many_clients():
+    """
+    Many clients on one unix socket, every measured node gets one outcome
+    """
+    G, I, O = graph_brickwork(3, 9)
+    computations = [Lazy1WQC(*graph_brickwork(3, 9), dict((n, 0.1) for n in G.nodes if n not in O))
+                    for _ in range(8)]
+    with tempfile.TemporaryDirectory() as tmp :
+        stats, clients = asyncio.run(run_local(computations, path=os.path.join(tmp, 'bqc.sock'), seed=0))
+    for client in clients :
+        assert set(client.outcomes) == set(G.nodes) - set(O)
+        assert len(client.output_qubits) == len(O)
+    assert stats['rounds_per_s'] > 0
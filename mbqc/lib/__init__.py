@@ -1,6 +1,21 @@
 """ Contains general functions unrelated to quantum computation such as math or
 system problems
+
+The names are imported on first use, see _lazyimport.
 """
 
-from ._exceptions import FlowError
+from ._lazyimport import lazy_exports
+
+_exports = {'FlowError': ('._exceptions', 'FlowError'),
+            'ResourceError': ('._exceptions', 'ResourceError'),
+            'read_graphs': ('._corpus', 'read_graphs'),
+            'record_offsets': ('._corpus', 'record_offsets'),
+            'GraphStream': ('._corpus', 'GraphStream'),
+            'GraphWriter': ('._corpus', 'GraphWriter'),
+            'dedup_graphs': ('._dedup', 'dedup_graphs'),
+            'graph_key': ('._dedup', 'graph_key'),
+            'invariant_hash': ('._dedup', 'invariant_hash'),
+            'instrument': ('._instrument', None)}
 
+__all__ = list(_exports)
+__getattr__, __dir__ = lazy_exports(__name__, _exports)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Streaming reader and writer of open-graph corpora, one record in memory at a
+time.
+
+layouts:
+
+    json     --- a JSON array, as written by json.dump. A record is either a
+                 dict {'nodes', 'edges', 'I', 'O', ...} as out/*/random_graphs.json,
+                 or a list [nodes or edges, I, O] as opengraphs.json.
+    edgelist --- one record per line:  nodes | I | O | u,v u,v .. [| json]
+                 the labels are separated by spaces, the optional last field
+                 is a JSON object with the other fields of the record.
+
+implemented:
+
+    read_graphs --- yields (G, I, O, meta) from a record offset on, meta is the
+                    dict of the other fields, e.g. 'bound', 'nqubit'
+    record_offsets --- byte offsets of the records, to seek instead of scanning
+    GraphStream --- a re-iterable stream, for loops over the same corpus
+    GraphWriter --- writes records as they come, the JSON output is the same
+                    as json.dump of the whole list
+"""
+
+#standard libraries
+import codecs
+import json
+
+#non-standard libraries
+import networkx as nx
+
+
+_CHUNK = 1 << 16
+_WHITE = ' \t\n\r,'
+
+
+def _layout(path, layout=None):
+    if layout is not None :
+        return layout
+    return 'json' if str(path).endswith('.json') else 'edgelist'
+
+
+def _iter_json(path, start=0, offsets=None):
+    """
+    Yield (byte offset, element) of the top-level JSON array in path
+
+    param
+        :start: int, index of the first element
+        :offsets: sequence(int), byte offsets of the elements, see
+                  record_offsets(); the file is read from offsets[start]
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'rb') as f :
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        skip = start
+        if offsets is not None :
+            if start >= len(offsets):
+                return
+            f.seek(offsets[start])
+            byte, skip = offsets[start], 0
+        buf, pos, eof = '', 0, False
+
+        def nbyte(a, b):
+            return b-a if buf.isascii() else len(buf[a:b].encode())
+
+        def more():
+            #keep buf[pos:] and append the next chunk
+            data = f.read(_CHUNK)
+            return buf[pos:] + utf8.decode(data, final=not data), not data
+
+        if offsets is None :
+            buf, eof = more()
+            pos = len(buf) - len(buf.lstrip())
+            if buf[pos:pos+1] != '[':
+                raise ValueError('%s is not a JSON array'%path)
+            pos += 1
+            byte = nbyte(0, pos)
+
+        while True :
+            ws = pos
+            while pos < len(buf) and buf[pos] in _WHITE :
+                pos += 1
+            byte += nbyte(ws, pos)
+            if pos == len(buf):
+                if eof :
+                    raise ValueError('%s ends before the array is closed'%path)
+                buf, eof = more()
+                pos = 0
+                continue
+            if buf[pos] == ']':
+                return
+
+            try :
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError :
+                end = None
+            if end is None or (end == len(buf) and not eof):
+                if eof :
+                    raise ValueError('%s has an incomplete record'%path)
+                buf, eof = more()
+                pos = 0
+                continue
+
+            if skip :
+                skip -= 1
+            else :
+                yield byte, obj
+            byte += nbyte(pos, end)
+            pos = end
+
+
+def _iter_lines(path, start=0, offsets=None):
+    """ Yield (byte offset, line) of the non-empty lines of path
+    """
+    with open(path, 'rb') as f :
+        index, offset = 0, 0
+        if offsets is not None :
+            if start >= len(offsets):
+                return
+            offset = offsets[start]
+            f.seek(offset)
+            index = start
+        for line in f :
+            if line.strip():
+                if index >= start :
+                    yield offset, line.decode()
+                index += 1
+            offset += len(line)
+
+
+def _label(token):
+    try :
+        return int(token)
+    except ValueError :
+        return token
+
+
+def _parse_line(line):
+    fields = line.rstrip('\n').split('|', 4)
+    if len(fields) < 4 :
+        raise ValueError('an edgelist record needs nodes | I | O | edges')
+    nodes, I, O = [[_label(t) for t in field.split()] for field in fields[:3]]
+    edges = [tuple(_label(t) for t in e.split(',')) for e in fields[3].split()]
+    meta = json.loads(fields[4]) if len(fields) > 4 and fields[4].strip() else dict()
+    return {'nodes': nodes, 'edges': edges, 'I': I, 'O': O}, meta
+
+
+def _to_graph(record):
+    """ (G, I, O, meta) of a parsed record
+    """
+    if isinstance(record, dict):
+        record = dict(record)
+        nodes, edges = record.pop('nodes', []), record.pop('edges', [])
+        I, O = record.pop('I'), record.pop('O')
+        meta = record
+    else :
+        first, I, O = record[:3]
+        meta = dict()
+        #the graph of opengraphs.json is a list of nodes or a list of edges
+        if first and all(isinstance(e, list) and len(e) == 2 for e in first):
+            nodes, edges = [], first
+        else :
+            nodes, edges = first, []
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(tuple(e) for e in edges)
+    return G, set(I), set(O), meta
+
+
+def read_graphs(path, start=0, stop=None, offsets=None, layout=None):
+    """
+    Stream the open graphs of a corpus.
+
+    param
+        :path: str, the corpus file
+        :start: int, index of the first record
+        :stop: int, index after the last record, default the end
+        :offsets: sequence(int), from record_offsets(), to seek to start
+        :layout: str('json'|'edgelist'), default from the file extension
+
+    return
+        generator((networkx.Graph, set, set, dict)) : G, I, O and the other
+        fields of the record
+    """
+    layout = _layout(path, layout)
+    if layout == 'json':
+        records = (obj for _, obj in _iter_json(path, start, offsets))
+    elif layout == 'edgelist':
+        records = (_parse_line(line) for _, line in _iter_lines(path, start, offsets))
+    else :
+        raise ValueError('layout must be json or edgelist')
+
+    for index, record in enumerate(records, start):
+        if stop is not None and index >= stop :
+            return
+        if layout == 'edgelist':
+            record, meta = record
+            G, I, O, _ = _to_graph(record)
+            yield G, I, O, meta
+        else :
+            yield _to_graph(record)
+
+
+def record_offsets(path, layout=None):
+    """
+    The byte offset of every record, in one pass
+
+    return
+        list(int)
+    """
+    if _layout(path, layout) == 'json':
+        return [offset for offset, _ in _iter_json(path)]
+    return [offset for offset, _ in _iter_lines(path)]
+
+
+class GraphStream:
+    """
+    Re-iterable stream of (G, I, O, meta), every loop reads the file again.
+    """
+    def __init__(self, path, start=0, stop=None, offsets=None, layout=None):
+        self.path, self.start, self.stop = path, start, stop
+        self.offsets, self.layout = offsets, layout
+
+    def __iter__(self):
+        return read_graphs(self.path, self.start, self.stop, self.offsets, self.layout)
+
+
+class GraphWriter:
+    """
+    Write open graphs one by one.
+
+        with GraphWriter('out/random_graphs.json') as out :
+            out.write(G, I, O, bound=3, nqubit=3)
+    """
+    def __init__(self, path, layout=None):
+        self.path = path
+        self.layout = _layout(path, layout)
+        if self.layout not in ('json', 'edgelist'):
+            raise ValueError('layout must be json or edgelist')
+        self.nrecord = 0
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'w')
+        if self.layout == 'json':
+            self._f.write('[')
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._f is not None :
+            if self.layout == 'json':
+                self._f.write(']')
+            self._f.close()
+            self._f = None
+
+    def write(self, G, I, O, **meta):
+        """ Append the open graph (G, I, O) with the fields meta
+        """
+        if self.layout == 'json':
+            record = {'nodes': list(G.nodes()), 'edges': list(G.edges()), 'I': list(I), 'O': list(O)}
+            record.update(meta)
+            self._f.write((', ' if self.nrecord else '') + json.dumps(record))
+        else :
+            line = ' | '.join([' '.join(map(str, G.nodes())), ' '.join(map(str, I)), ' '.join(map(str, O)),
+                               ' '.join('%s,%s'%e for e in G.edges())])
+            if meta :
+                line += ' | ' + json.dumps(meta)
+            self._f.write(line + '\n')
+        self.nrecord += 1
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.lib._corpus.py
+"""
+
+import json
+import os
+
+import networkx as nx
+
+import mbqc.lib._corpus as corpus
+from mbqc.lib import read_graphs, record_offsets, GraphStream, GraphWriter
+
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', '..', 'out', '122', 'random_graphs.json')
+
+
+def _same(a, b):
+    return (list(a[0].nodes) == list(b[0].nodes) and
+            set(map(frozenset, a[0].edges)) == set(map(frozenset, b[0].edges)) and a[1:] == b[1:])
+
+
+def test_stream_matches_json_load(monkeypatch):
+    """
+    The stream gives the records of json.load, also when records cross the
+    chunks, and the offsets seek to the same records as scanning
+    """
+    full = json.load(open(CORPUS))
+    monkeypatch.setattr(corpus, '_CHUNK', 7)
+    graphs = list(read_graphs(CORPUS))
+    assert len(graphs) == len(full)
+    for (G, I, O, meta), rec in zip(graphs, full):
+        assert set(map(frozenset, G.edges)) == set(map(frozenset, rec['edges']))
+        assert (I, O, meta) == (set(rec['I']), set(rec['O']), {'bound': rec['bound'], 'nqubit': rec['nqubit']})
+
+    offsets = record_offsets(CORPUS)
+    for start in [0, 1, 50, len(full)-1, len(full)]:
+        scanned = list(read_graphs(CORPUS, start=start, stop=start+3))
+        seeked = list(read_graphs(CORPUS, start=start, stop=start+3, offsets=offsets))
+        assert len(scanned) == len(seeked) == min(3, len(full)-start)
+        assert all(_same(a, b) for a, b in zip(scanned, seeked))
+
+
+def test_writer_roundtrip(tmp_path):
+    """
+    Both layouts give back what was written, the JSON one is json.dump's
+    """
+    graphs = list(read_graphs(CORPUS, stop=20))
+    graphs.append((nx.Graph([('a', 'b'), ('b', 'c')]), {'a'}, {'c'}, dict()))
+    for name in ['corpus.json', 'corpus.edgelist']:
+        path = str(tmp_path/name)
+        with GraphWriter(path) as out :
+            for G, I, O, meta in graphs :
+                out.write(G, I, O, **meta)
+        stream = GraphStream(path, start=2)
+        for _ in range(2):
+            back = list(stream)
+            assert len(back) == len(graphs)-2
+            assert all(_same(a, b) for a, b in zip(back, graphs[2:]))
+        offsets = record_offsets(path)
+        assert _same(next(read_graphs(path, start=5, offsets=offsets)), graphs[5])
+
+    with GraphWriter(str(tmp_path/'part.json')) as out :
+        for G, I, O, meta in graphs[:20] :
+            out.write(G, I, O, **meta)
+    assert open(str(tmp_path/'part.json')).read() == json.dumps(json.load(open(CORPUS))[:20])
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Deduplication of open-graph corpora, in memory bounded by a partition of the
+corpus.
+
+implemented:
+
+    graph_key --- hash of the canonical form of a labelled open graph: the
+        sorted nodes, edges, I and O. Equal keys are exact duplicates.
+
+    invariant_hash --- Weisfeiler-Lehman hash of the graph with the nodes
+        labelled input, output, both or neither; invariant under the
+        isomorphisms that map I to I and O to O.
+
+    dedup_graphs --- streams a corpus (see read_graphs) and writes one record
+        per class of duplicates, with the fields
+
+            multiplicity : the number of records of the class, the sum of
+                           their multiplicity fields when they have one
+            first        : the index of the first record of the class
+
+        and the other fields of that first record, in the order of first.
+
+        pass 1: every record goes to the partition of its hash, a temporary
+                text file with a line per record, so that duplicates share
+                a partition.
+        pass 2: per partition, a record is compared with the representatives
+                of its hash bucket: by graph_key, then, with isomorphism, by
+                networkx.is_isomorphic with the io labels. Only hash
+                collisions get the full comparison.
+        merge : the partitions are merged by first, at most _FANIN files
+                at a time.
+
+        A representative is held as the JSON text of its record with the
+        digests of its key and hash, a few times the size of the record;
+        the networkx graphs are only built for the bucket being compared.
+        The number of partitions is the size of the corpus times that
+        expansion over the memory budget, so the memory stays at about
+        the budget as the corpus grows.
+"""
+
+#standard libraries
+import gc
+import hashlib
+import heapq
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+#non-standard libraries
+import networkx as nx
+from mbqc.lib._corpus import read_graphs, GraphWriter
+
+
+_RECENT = 256
+#bytes of the buffer of a temporary file, and most files merged at once
+_BUFFER = 1 << 12
+_FANIN = 16
+#records between full collections: networkx graphs are reference cycles, and
+#the old generation of the collector would keep their garbage for long
+_COLLECT = 512
+#bytes in memory per byte of the corpus, when all its records are unique:
+#about 3.5 measured on records of 8-node graphs, with a margin
+_EXPANSION = 6
+
+
+def _canonical(labels):
+    return sorted(json.dumps(n) for n in labels)
+
+
+def graph_key(nodes, edges, I=(), O=()):
+    """
+    Hash of the canonical form of a labelled open graph
+
+    param
+        :nodes: iterable, labels that JSON encodes, e.g. int or str
+        :edges: iterable((node, node))
+        :I: iterable
+        :O: iterable
+
+    return
+        str : hex digest
+    """
+    cedges = sorted(sorted([json.dumps(u), json.dumps(v)]) for u, v in edges)
+    text = json.dumps([_canonical(nodes), cedges, _canonical(I), _canonical(O)])
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _labelled(G, I, O):
+    """ G with the node attribute io
+    """
+    H = nx.Graph()
+    H.add_nodes_from((n, {'io': ('I' if n in I else '') + ('O' if n in O else '')}) for n in G.nodes)
+    H.add_edges_from(G.edges)
+    return H
+
+
+def invariant_hash(G, I, O, iterations=3):
+    """
+    Weisfeiler-Lehman hash of the io-labelled graph
+
+    return
+        str : hex digest
+    """
+    return nx.weisfeiler_lehman_graph_hash(_labelled(G, I, O), node_attr='io', iterations=iterations)
+
+
+def _same_io(a, b):
+    return a['io'] == b['io']
+
+
+def _compact(G, I, O, meta):
+    """ A record as JSON text, the form of a representative in memory
+    """
+    return json.dumps([list(G.nodes), [list(e) for e in G.edges], list(I), list(O), meta])
+
+
+def _expand(text):
+    """ The record (G, I, O, meta) of _compact
+    """
+    nodes, edges, I, O, meta = json.loads(text)
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    return G, set(I), set(O), meta
+
+
+def _dedup_partition(records, isomorphism, stats):
+    """
+    The representatives of a partition. A representative is kept as the
+    JSON text of its record and the digests of its key and hash; the graphs
+    are built only to compare a record with those of the same hash
+
+    param
+        :records: iterable((text, index, multiplicity, key, hash)), text
+                  from _compact, key the graph_key
+
+    return
+        list((first, multiplicity, text)) sorted by first
+    """
+    reps, exact, buckets = list(), dict(), dict()
+    for text, index, mult, key, h in records :
+        key = bytes.fromhex(key)
+        if key in exact :
+            reps[exact[key]][1] += mult
+            stats['exact'] += 1
+            continue
+
+        match = None
+        if isomorphism :
+            h = bytes.fromhex(h)
+            bucket = buckets.get(h, ())
+            if bucket :
+                H = _labelled(*_expand(text)[:3])
+                for r in bucket :
+                    R = _labelled(*_expand(reps[r][2])[:3])
+                    if R.number_of_edges() == H.number_of_edges() and nx.is_isomorphic(R, H, node_match=_same_io):
+                        match = r
+                        break
+                if match is None :
+                    stats['collision'] += 1
+        if match is not None :
+            reps[match][1] += mult
+            exact[key] = match
+            stats['isomorphic'] += 1
+            continue
+
+        exact[key] = len(reps)
+        if isomorphism :
+            buckets[h] = bucket + (len(reps),)
+        reps.append([index, mult, text])
+    return reps
+
+
+def _lines(path, nfield):
+    """ The lines of a temporary file of dedup_graphs, split in nfield
+    """
+    with open(path, 'rb', buffering=_BUFFER) as f :
+        for line in f :
+            yield line.decode().rstrip('\n').split(' ', nfield-1)
+
+
+def _reps(path):
+    """ The (first, multiplicity, text) of a file of representatives
+    """
+    return ((int(first), int(mult), text) for first, mult, text in _lines(path, 3))
+
+
+def _write_reps(path, reps):
+    with open(path, 'wb', buffering=_BUFFER) as f :
+        for first, mult, text in reps :
+            f.write(('%i %i %s\n'%(first, mult, text)).encode())
+
+
+def _append(paths, pending):
+    """ Append the pending lines of every partition to its file, and clear
+    """
+    for path, lines in zip(paths, pending):
+        if lines :
+            with open(path, 'ab') as f :
+                f.write(b''.join(lines))
+            lines.clear()
+
+
+def _merge_reps(paths, tmp):
+    """
+    Merge the files of representatives by first, _FANIN files at a time,
+    until _FANIN files are left
+
+    return
+        list(str) : the files left
+    """
+    paths, n = list(paths), 0
+    while len(paths) > _FANIN :
+        group, paths = paths[:_FANIN], paths[_FANIN:]
+        n += 1
+        path = os.path.join(tmp, 'merge%i'%n)
+        _write_reps(path, heapq.merge(*map(_reps, group)))
+        for p in group :
+            os.unlink(p)
+        paths.append(path)
+    return paths
+
+
+def dedup_graphs(inpath, outpath, isomorphism=True, npartition=None, memory=256 << 20,
+                 tmpdir=None, layout=None):
+    """
+    Write the corpus inpath without duplicates to outpath
+
+    param
+        :inpath: str, the corpus, .json or .edgelist
+        :outpath: str, the compacted corpus, its layout from the extension
+        :isomorphism: bool, also remove the duplicates up to an isomorphism
+                      that preserves I and O, else only the exact ones
+        :npartition: int, default from memory, see _EXPANSION
+        :memory: int, bytes for the representatives of one partition
+        :tmpdir: str, the directory of the partition files
+        :layout: str('json'|'edgelist'), of inpath, default from its extension
+
+    return
+        dict{'nrecord', 'nunique', 'exact', 'isomorphic', 'collision',
+        'npartition'} : the duplicates found by graph_key and by
+        isomorphism, and the records compared in vain with a bucket
+    """
+    if npartition is None :
+        npartition = max(1, -(-os.path.getsize(inpath)*_EXPANSION//memory))
+    stats = {'nrecord': 0, 'nunique': 0, 'exact': 0, 'isomorphic': 0, 'collision': 0,
+             'npartition': npartition}
+
+    def hashed():
+        #the hashes of recent keys, for runs of identical records
+        recent = OrderedDict()
+        for index, (G, I, O, meta) in enumerate(read_graphs(inpath, layout=layout)):
+            stats['nrecord'] += 1
+            key = graph_key(G.nodes, G.edges, I, O)
+            if key in recent :
+                recent.move_to_end(key)
+            else :
+                recent[key] = invariant_hash(G, I, O) if isomorphism else key
+                if len(recent) > _RECENT :
+                    recent.popitem(last=False)
+            mult = meta.pop('multiplicity', 1)
+            meta.pop('first', None)
+            yield _compact(G, I, O, meta), index, mult, key, recent[key]
+            if index % _COLLECT == _COLLECT-1 :
+                gc.collect()
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp :
+        if npartition == 1 :
+            parts = [_dedup_partition(hashed(), isomorphism, stats)]
+        else :
+            #pass 1, a line 'index multiplicity key hash text' per record,
+            #held until _FANIN buffers are full and appended then, so that
+            #the memory does not grow with the open files of npartition
+            paths = [os.path.join(tmp, 'part%i'%p) for p in range(npartition)]
+            pending, size = [list() for _ in paths], 0
+            for path in paths :
+                open(path, 'wb').close()
+            for text, index, mult, key, h in hashed():
+                line = ('%i %i %s %s %s\n'%(index, mult, key, h, text)).encode()
+                pending[int(h[:15], 16) % npartition].append(line)
+                size += len(line)
+                if size > _FANIN*_BUFFER :
+                    _append(paths, pending)
+                    size = 0
+            _append(paths, pending)
+
+            #pass 2, one partition in memory at a time, its representatives
+            #as lines 'first multiplicity text' in the order of first
+            outs = list()
+            for p, path in enumerate(paths):
+                records = ((text, int(index), int(mult), key, h) for index, mult, key, h, text in _lines(path, 5))
+                reps = _dedup_partition(records, isomorphism, stats)
+                gc.collect()
+                os.unlink(path)
+                outs.append(os.path.join(tmp, 'out%i'%p))
+                _write_reps(outs[-1], reps)
+                reps = None
+            parts = [_reps(path) for path in _merge_reps(outs, tmp)]
+
+        with GraphWriter(outpath) as out :
+            for first, mult, text in heapq.merge(*parts):
+                G, I, O, meta = _expand(text)
+                out.write(G, I, O, **dict(meta, multiplicity=mult, first=first))
+                stats['nunique'] += 1
+                if stats['nunique'] % _COLLECT == 0 :
+                    gc.collect()
+    return stats
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.lib._dedup.py
+"""
+
+import gc
+import os
+import random
+import tracemalloc
+
+import networkx as nx
+
+from example_graphstates import graph_example_boqc
+from mbqc.lib import dedup_graphs, graph_key, invariant_hash, read_graphs, GraphWriter
+
+
+OUT132 = os.path.join(os.path.dirname(__file__), '..', '..', 'out', '132', 'opengraphs.json')
+
+
+def _path(n):
+    G = nx.path_graph(n)
+    return G, {0}, {n-1}
+
+
+def _corpus(path):
+    """
+    records: 0 path, 1 the same path, 2 the path relabelled, 3 the path with
+    I and O swapped (isomorphic by reversing it), 4 a star with I and O on
+    leaves, 5 the path with I and O on the same end, 6 the star again
+    """
+    G, I, O = _path(4)
+    R = nx.relabel_nodes(G, {0: 3, 1: 2, 2: 1, 3: 0})
+    S = nx.star_graph(3)
+    records = [(G, I, O), (G.copy(), I, O), (nx.relabel_nodes(G, {0: 10, 1: 11, 2: 12, 3: 13}), {10}, {13}),
+               (R, {3}, {0}), (S, {1}, {2}), (G, {0}, {0, 1}), (S, {1}, {2})]
+    with GraphWriter(path) as w :
+        for G, I, O in records :
+            w.write(G, I, O)
+
+
+def test_graph_key():
+    """ The key does not depend on the order of nodes and edges
+    """
+    G, I, O = graph_example_boqc()
+    H = nx.Graph()
+    H.add_nodes_from(reversed(list(G.nodes)))
+    H.add_edges_from((v, u) for u, v in reversed(list(G.edges)))
+    assert graph_key(G.nodes, G.edges, I, O) == graph_key(H.nodes, H.edges, I, O)
+    assert graph_key(G.nodes, G.edges, I, O) != graph_key(G.nodes, G.edges, O, I)
+    assert invariant_hash(G, I, O) == invariant_hash(H, I, O)
+
+
+def test_dedup(tmp_path):
+    """
+    Exact and isomorphic duplicates, for one and several partitions, and a
+    compacted corpus compacts to itself with the multiplicities kept
+    """
+    inpath = str(tmp_path/'corpus.json')
+    _corpus(inpath)
+
+    outs = dict()
+    for npartition in (1, 3):
+        outs[npartition] = str(tmp_path/('iso%i.json'%npartition))
+        stats = dedup_graphs(inpath, outs[npartition], npartition=npartition, tmpdir=str(tmp_path))
+        assert (stats['nrecord'], stats['nunique'], stats['exact'], stats['isomorphic']) == (7, 3, 2, 2)
+        res = [(m['first'], m['multiplicity']) for _, _, _, m in read_graphs(outs[npartition])]
+        assert res == [(0, 4), (4, 2), (5, 1)]
+    assert open(outs[1]).read() == open(outs[3]).read()
+
+    stats = dedup_graphs(inpath, str(tmp_path/'exact.edgelist'), isomorphism=False, npartition=2)
+    res = [(m['first'], m['multiplicity']) for _, _, _, m in read_graphs(str(tmp_path/'exact.edgelist'))]
+    assert stats['nunique'] == 5 and res == [(0, 2), (2, 1), (3, 1), (4, 2), (5, 1)]
+
+    stats = dedup_graphs(str(tmp_path/'exact.edgelist'), str(tmp_path/'again.json'))
+    res = [(m['first'], m['multiplicity']) for _, _, _, m in read_graphs(str(tmp_path/'again.json'))]
+    assert stats['nrecord'] == 5 and res == [(0, 4), (3, 2), (4, 1)]
+
+
+def test_dedup_corpus(tmp_path):
+    """ The records of out/132 are all the same open graph
+    """
+    stats = dedup_graphs(OUT132, str(tmp_path/'out.json'), npartition=2)
+    records = list(read_graphs(str(tmp_path/'out.json')))
+    assert stats['nrecord'] == 10476 and len(records) == 1
+    assert records[0][3]['multiplicity'] == 10476 and records[0][3]['first'] == 0
+
+
+def _peak(tmp_path, nrecord):
+    """ The peak of traced memory of dedup_graphs on nrecord random graphs
+    """
+    rs = random.Random(nrecord)
+    inpath = str(tmp_path/('random%i.json'%nrecord))
+    with GraphWriter(inpath) as w :
+        for _ in range(nrecord):
+            w.write(nx.gnp_random_graph(8, 0.5, seed=rs.randrange(1 << 30)), {0}, {6, 7})
+    gc.collect()
+    tracemalloc.start()
+    try :
+        stats = dedup_graphs(inpath, str(tmp_path/'out.json'), memory=64 << 10, tmpdir=str(tmp_path))
+        return stats, tracemalloc.get_traced_memory()[1]
+    finally :
+        tracemalloc.stop()
+
+
+def test_dedup_memory(tmp_path):
+    """ At a fixed budget, a corpus 4 times larger has more partitions, not
+    a larger peak
+    """
+    small, peak_small = _peak(tmp_path, 600)
+    large, peak_large = _peak(tmp_path, 2400)
+    assert large['nunique'] > 3*small['nunique']
+    assert large['npartition'] > 3*small['npartition']
+    assert peak_large < 1.3*peak_small
@@ -22,3 +22,15 @@ class FlowError(Error):
     def __init__(self, message):
         self.message = message
 
+
+
+class ResourceError(Error):
+    """Exception raised when a computation would exceed the given resources,
+    it is raised before the computation starts.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
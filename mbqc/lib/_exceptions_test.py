@@ -4,7 +4,7 @@ __doc__="""
 Test for boqc.lib._exceptions.py
 """
 
-from boqc.lib import FlowError
+from mbqc.lib import FlowError
 
 def test_flowerror():
     """
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Named timers and counters for the hot paths, off by default.
+
+implemented:
+
+    enable, disable, reset --- the runtime switch and the registry of this
+                               process. MBQC_INSTRUMENT=1 in the environment
+                               switches it on at import.
+    timer(name)  --- context manager adding the elapsed time to a timer
+    timed(name)  --- decorator, the same for every call of a function
+    count(name)  --- add to a counter
+    snapshot, merge, export --- the report of the registry as a dict, merged
+                                reports of several processes, JSON export
+    starmap --- Pool.starmap in chunks, every chunk returns the report of its
+                worker, which is merged into the registry of the caller
+
+    When it is off, a timer or a counter costs one flag test.
+"""
+
+#standard libraries
+import json
+import os
+from functools import wraps
+from time import perf_counter
+
+
+_state = {'enabled': os.environ.get('MBQC_INSTRUMENT', '') not in ('', '0')}
+_timers = dict()      #name: [count, total, max]
+_counters = dict()    #name: int
+_pids = set()
+
+
+def enable(on=True):
+    _state['enabled'] = bool(on)
+
+
+def disable():
+    _state['enabled'] = False
+
+
+def is_enabled():
+    return _state['enabled']
+
+
+def reset():
+    """ Clear the timers and counters of this process
+    """
+    _timers.clear()
+    _counters.clear()
+    _pids.clear()
+
+
+def _add_time(name, elapsed, ncall=1, longest=None):
+    t = _timers.get(name)
+    if t is None :
+        _timers[name] = [ncall, elapsed, elapsed if longest is None else longest]
+    else :
+        t[0] += ncall
+        t[1] += elapsed
+        t[2] = max(t[2], elapsed if longest is None else longest)
+
+
+def count(name, n=1):
+    """ Add n to the counter name
+    """
+    if _state['enabled']:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class timer:
+    """
+    Context manager timing its block under name
+
+        with timer('flow'):
+            ...
+    """
+    __slots__ = ('name', 't0')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = perf_counter() if _state['enabled'] else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.t0 is not None :
+            _add_time(self.name, perf_counter()-self.t0)
+
+
+def timed(name=None):
+    """
+    Decorator timing every call of the function, under name or the
+    qualified name of the function
+    """
+    def decorator(func):
+        label = name if name is not None else func.__module__ + '.' + func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            t0 = perf_counter()
+            try :
+                return func(*args, **kwargs)
+            finally :
+                _add_time(label, perf_counter()-t0)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """
+    The report of this process, with what it has merged from workers
+
+    return
+        dict{'pids': list, 'timers': {name: {'count', 'total_s', 'max_s'}},
+             'counters': {name: int}}
+    """
+    return {'pids': sorted(_pids | {os.getpid()}),
+            'timers': dict((k, {'count': c, 'total_s': t, 'max_s': m}) for k, (c, t, m) in _timers.items()),
+            'counters': dict(_counters)}
+
+
+def merge(reports):
+    """
+    Combine the reports of several processes into one
+
+    param
+        :reports: iterable(dict), from snapshot()
+
+    return
+        dict, as snapshot()
+    """
+    pids, timers, counters = set(), dict(), dict()
+    for rep in reports :
+        pids.update(rep['pids'])
+        for k, t in rep['timers'].items():
+            acc = timers.setdefault(k, {'count': 0, 'total_s': 0., 'max_s': 0.})
+            acc['count'] += t['count']
+            acc['total_s'] += t['total_s']
+            acc['max_s'] = max(acc['max_s'], t['max_s'])
+        for k, c in rep['counters'].items():
+            counters[k] = counters.get(k, 0) + c
+    return {'pids': sorted(pids), 'timers': timers, 'counters': counters}
+
+
+def absorb(report):
+    """ Add a report, e.g. of a worker, to the registry of this process
+    """
+    _pids.update(report['pids'])
+    for k, t in report['timers'].items():
+        _add_time(k, t['total_s'], t['count'], t['max_s'])
+    for k, c in report['counters'].items():
+        _counters[k] = _counters.get(k, 0) + c
+
+
+def export(path, report=None):
+    """ Write a report, default snapshot(), as JSON
+    """
+    with open(path, 'w') as f :
+        json.dump(snapshot() if report is None else report, f, indent=1, sort_keys=True)
+
+
+def _run_chunk(func, chunk, enabled):
+    """ Worker side of starmap
+    """
+    enable(enabled)
+    if enabled :
+        reset()
+    results = [func(*args) for args in chunk]
+    return results, snapshot() if enabled else None
+
+
+def starmap(pool, func, iterable, chunksize=None):
+    """
+    pool.starmap(func, iterable), the timers and counters of the workers are
+    merged into this process when instrumentation is on
+
+    param
+        :pool: multiprocessing.Pool
+        :func: picklable callable
+        :iterable: iterable(tuple), the arguments
+        :chunksize: int, default as Pool.starmap
+
+    return
+        list
+    """
+    args = list(iterable)
+    if chunksize is None :
+        nproc = getattr(pool, '_processes', None) or os.cpu_count() or 1
+        chunksize, extra = divmod(len(args), nproc*4)
+        chunksize += bool(extra)
+    chunksize = max(chunksize, 1)
+    enabled = _state['enabled']
+    chunks = [(func, args[i:i+chunksize], enabled) for i in range(0, len(args), chunksize)]
+
+    results = list()
+    for res, report in pool.starmap(_run_chunk, chunks, chunksize=1):
+        results += res
+        if report is not None :
+            absorb(report)
+    return results
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.lib._instrument.py
+"""
+
+import json
+import os
+from multiprocessing import Pool
+
+import networkx as nx
+
+from example_graphstates import graph_H
+from mbqc.lib import instrument
+from mbqc.qres import OpenGraph
+from mbqc.qcomp import Lazy1WQC
+
+
+def test_switch_timer_counter(tmp_path):
+    """
+    Nothing is recorded when off; when on, the decorated hot paths and the
+    context manager fill the registry, which exports to JSON
+    """
+    instrument.disable()
+    instrument.reset()
+    lazyc = Lazy1WQC(*graph_H(), dict())
+    lazyc.physical_qubit(random_seed=1)
+    assert instrument.snapshot()['timers'] == {}
+
+    instrument.enable()
+    try :
+        lazyc = Lazy1WQC(*graph_H(), dict())
+        lazyc.physical_qubit(random_seed=1)
+        lazyc.lemma2()
+        with instrument.timer('block'):
+            instrument.count('things', 3)
+    finally :
+        instrument.disable()
+
+    rep = instrument.snapshot()
+    assert rep['timers']['flow']['count'] == 1
+    assert rep['counters']['flow.rounds'] >= 1
+    assert rep['timers']['lazy1wqc.physical_qubit']['count'] == 1
+    assert rep['timers']['lazy1wqc.A_i']['count'] >= len(lazyc.G)-len(lazyc.I)
+    assert rep['timers']['block']['total_s'] >= 0 and rep['counters']['things'] == 3
+
+    path = str(tmp_path/'report.json')
+    instrument.export(path)
+    with open(path) as f :
+        assert json.load(f)['counters'] == rep['counters']
+    instrument.reset()
+
+
+def test_pool_workers_are_merged():
+    """
+    The reports of the Pool workers add up in the caller
+    """
+    nodes, I, O = range(4), {0}, {3}
+    edges = list(nx.complete_graph(nodes).edges)
+    args = [(s, nodes, I, O) for s in OpenGraph.get_power_set(edges)]
+
+    instrument.reset()
+    instrument.enable()
+    try :
+        with Pool(2) as P :
+            results = instrument.starmap(P, OpenGraph._try_graph, args, chunksize=5)
+    finally :
+        instrument.disable()
+
+    rep = instrument.snapshot()
+    assert len(results) == len(args)
+    assert rep['timers']['opengraph._try_graph']['count'] == len(args)
+    assert rep['counters']['opengraph._try_graph.flow'] == sum(bool(r) for r in results)
+    assert len(rep['pids']) >= 2 and os.getpid() in rep['pids']
+
+    merged = instrument.merge([rep, rep])
+    assert merged['counters']['opengraph._try_graph.flow'] == 2*rep['counters']['opengraph._try_graph.flow']
+    instrument.reset()
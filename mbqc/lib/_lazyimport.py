@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Names of a package that are imported on first use.
+
+implemented:
+
+    lazy_exports --- the module __getattr__ and __dir__ of a package, from a
+                     table of its public names. `import mbqc.qres` then costs
+                     nothing; `from mbqc.qres import flow` imports the module
+                     of flow and what it needs, and nothing else.
+"""
+
+#standard libraries
+import importlib
+import sys
+
+
+def lazy_exports(package, table):
+    """
+    param
+        :package: str, the __name__ of the package
+        :table: dict{str: (str, str|None)}, name: (relative module, attribute),
+                attribute None exports the module itself
+
+    return
+        (function, function) : __getattr__ and __dir__ of the package
+    """
+    def __getattr__(name):
+        try :
+            module, attr = table[name]
+        except KeyError :
+            raise AttributeError('module %r has no attribute %r'%(package, name)) from None
+        value = importlib.import_module(module, package)
+        if attr is not None :
+            value = getattr(value, attr)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(table))
+
+    return __getattr__, __dir__
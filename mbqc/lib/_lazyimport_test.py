@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.lib._lazyimport.py
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import mbqc.lib
+import mbqc.qres
+
+
+def _loaded(statement):
+    """ The heavy modules in sys.modules after statement, in a fresh interpreter
+    """
+    code = statement + "\nimport sys\nprint(' '.join(m for m in ('numpy', 'networkx', 'pygraphviz') if m in sys.modules))"
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                          check=True).stdout.split()
+
+
+def test_import_is_light():
+    """
+    Importing the packages loads no heavy dependency, flow does not need
+    networkx and pygraphviz waits for draw_graph
+    """
+    assert _loaded('import mbqc.qres, mbqc.qcomp, mbqc.lib') == []
+    assert _loaded('from mbqc.qres import flow') == ['numpy']
+    assert 'pygraphviz' not in _loaded('from mbqc.qcomp import Lazy1WQC')
+
+
+def test_exports():
+    """
+    The names resolve to the objects of their modules, are cached on the
+    package and listed by dir(); unknown names raise AttributeError
+    """
+    from mbqc.qres._opengraph import OpenGraph
+
+    assert mbqc.qres.OpenGraph is OpenGraph
+    assert vars(mbqc.qres)['OpenGraph'] is OpenGraph
+    assert set(mbqc.qres.__all__) <= set(dir(mbqc.qres))
+    with pytest.raises(AttributeError):
+        mbqc.qres.NoSuchName
+    from mbqc.lib import _instrument
+    assert mbqc.lib.instrument is _instrument
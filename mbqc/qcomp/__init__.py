@@ -1 +1,16 @@
-from ._lazy1wqc import Lazy1WQC
+from mbqc.lib._lazyimport import lazy_exports
+
+#name: module, the modules are imported on first use of one of their names
+_exports = {'PauliFrame': '._pauliframe',
+            'Lazy1WQC': '._lazy1wqc',
+            'StreamingLazy1WQC': '._streaming',
+            'Pattern': '._pattern', 'compile_pattern': '._pattern',
+            'eliminate_pauli': '._pauli',
+            'simulate_noisy': '._noise',
+            'AnalysisService': '._service', 'AnalysisClient': '._service',
+            'estimate_generate_all': '._estimate',
+            'estimate_bound_physical_qubit': '._estimate',
+            'anneal_conj1': '._anneal', 'replay_conj1': '._anneal'}
+
+__all__ = list(_exports)
+__getattr__, __dir__ = lazy_exports(__name__, dict((k, (m, k)) for k, m in _exports.items()))
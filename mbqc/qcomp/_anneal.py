@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Guided search for counterexamples to Conjecture 1 of the BOQC paper: the
+number of physical qubits of Lazy 1WQC is at most |O|+1.
+
+implemented:
+
+    anneal_conj1 --- simulated annealing over open graphs on n_I + n_O + n_aux
+        nodes, maximising the physical qubits of the worst of a few total
+        orderings, over the four input/output types of test_conj1.
+        Independent restarts run on a worker pool.
+
+    A state is an open graph with flow and nsample orderings. The moves are
+
+        edge flip : add or remove one edge; rejected when the graph loses its
+                    flow, the layers follow the maximally delayed flow as in
+                    Lazy1WQC
+        swap      : exchange two nodes of one layer in one ordering
+
+    An ordering sorts the nodes by layer, then by a random key per node, so
+    that it survives a change of layers. The graph is kept as bitmasks: the
+    flow search is that of flow(), and the qubit count of an ordering is
+    recomputed only from the first position the move touches.
+
+    A graph above the bound is replayed with Lazy1WQC.count_physical_qubit
+    before it is reported, and written with its ordering, see replay_conj1.
+"""
+
+#standard libraries
+from math import exp
+from multiprocessing import Pool, cpu_count
+from time import perf_counter
+
+#non-standard libraries
+import networkx as nx
+import numpy as np
+from mbqc.lib import GraphWriter
+from mbqc.qres._flowtable import _bits
+from mbqc.qcomp._lazy1wqc import IOTYPES
+
+
+def _layers(adj, full, I, O):
+    """
+    The partial order classes of flow() on bitmasks
+
+    return
+        list(int) or None : the class of every node, None without flow
+    """
+    out, C, rounds = O, O & ~I, []
+    while True :
+        out2, c2 = 0, 0
+        for v in _bits(C):
+            u = adj[v] & ~out
+            if u and not u & (u-1):
+                out2 |= u
+                c2 |= 1 << v
+        if not out2 :
+            break
+        rounds.append(out2)
+        out |= out2
+        C = (C & ~c2) | (out2 & ~I)
+    if out != full :
+        return None
+    K = len(rounds) + 1
+    layer = [K]*len(adj)
+    for r, mask in enumerate(rounds, 1):
+        for v in _bits(mask):
+            layer[v] = K - r
+    return layer
+
+
+def _peaks(cn, order, I, O, start=0, prefix=None):
+    """
+    Physical qubits of an ordering for the four io types, as
+    Lazy1WQC.count_physical_qubit, from position start on
+
+    param
+        :cn: list(int), closed neighbourhoods as bitmasks
+        :order: list(int), the nodes in total order
+        :prefix: list, the running state of a previous call, the part before
+                 start is reused
+
+    return
+        (list(int), list) : the peak of every io type and the running state
+    """
+    nI = I.bit_count()
+    state = prefix[:start] if prefix else []
+    if start :
+        prev, alive, peak = state[-1]
+    else :
+        prev = [0, 0, I, I]
+        alive = [0, 0, nI, nI]
+        peak = [0, 0, 0, 0]
+    prev, alive, peak = list(prev), list(alive), list(peak)
+    for v in order[start:]:
+        bit = 1 << v
+        for k, (itype, otype) in enumerate(IOTYPES):
+            alive[k] += (cn[v] & ~prev[k]).bit_count()
+            prev[k] |= cn[v]
+            if alive[k] > peak[k]:
+                peak[k] = alive[k]
+            if not (O & bit and otype == 'quantum'):
+                alive[k] -= 1
+        state.append((tuple(prev), tuple(alive), tuple(peak)))
+    return peak, state
+
+
+class _Annealer:
+    """
+    One restart of the search
+    """
+    def __init__(self, n_I, n_O, n_aux, nsample, seed, bound):
+        self.n = n = n_I + n_O + n_aux
+        self.I = sum(1 << i for i in range(n_I))
+        self.O = sum(1 << i for i in range(n-n_O, n))
+        self.full = (1 << n) - 1
+        self.bound = bound
+        self.rng = np.random.default_rng(seed)
+
+        #|O| disjoint paths ending at the outputs, the first n_I from an input
+        paths = [[o] for o in range(n-n_O, n)]
+        for p, a in enumerate(range(n_I, n-n_O)):
+            paths[p % n_O].insert(0, a)
+        for i in range(n_I):
+            paths[i].insert(0, i)
+        self.adj = [0]*n
+        for path in paths :
+            for a, b in zip(path, path[1:]):
+                self.adj[a] |= 1 << b
+                self.adj[b] |= 1 << a
+        self.layer = _layers(self.adj, self.full, self.I, self.O)
+        self.keys = self.rng.random((nsample, n))
+        self.orders = [self._order(s, self.layer) for s in range(nsample)]
+        self.tables = [_peaks(self._cn(self.adj), o, self.I, self.O) for o in self.orders]
+
+
+    def _cn(self, adj):
+        return [a | 1 << v for v, a in enumerate(adj)]
+
+
+    def _order(self, s, layer, keys=None):
+        keys = self.keys[s] if keys is None else keys
+        return sorted(range(self.n), key=lambda v: (layer[v], keys[v]))
+
+
+    @staticmethod
+    def energy(tables):
+        """ The worst peak, ties broken by the mean peak
+        """
+        peaks = [p for peak, _ in tables for p in peak]
+        return max(peaks) + sum(peaks)/(len(peaks)*(max(peaks)+1))
+
+
+    def propose(self):
+        """
+        A random move
+
+        return
+            (adj, layer, keys, orders, tables) of the new state, or None when
+            the move breaks the flow
+        """
+        rng, n = self.rng, self.n
+        if rng.random() < 0.7 :
+            u, v = (int(x) for x in rng.choice(n, 2, replace=False))
+            adj = list(self.adj)
+            adj[u] ^= 1 << v
+            adj[v] ^= 1 << u
+            layer = _layers(adj, self.full, self.I, self.O)
+            if layer is None :
+                return None
+            cn, keys = self._cn(adj), self.keys
+            if layer == self.layer :
+                orders = self.orders
+                tables = list()
+                for order, (_, prefix) in zip(orders, self.tables):
+                    start = min(order.index(u), order.index(v))
+                    tables.append(_peaks(cn, order, self.I, self.O, start, prefix))
+            else :
+                orders = [self._order(s, layer) for s in range(len(self.orders))]
+                tables = [_peaks(cn, o, self.I, self.O) for o in orders]
+            return adj, layer, keys, orders, tables
+
+        s = rng.integers(len(self.orders))
+        sizes = np.bincount(self.layer)
+        candidates = np.flatnonzero(sizes > 1)
+        if len(candidates) == 0 :
+            return None
+        L = rng.choice(candidates)
+        u, v = (int(x) for x in rng.choice([x for x in range(n) if self.layer[x] == L], 2, replace=False))
+        keys = self.keys.copy()
+        keys[s, u], keys[s, v] = keys[s, v], keys[s, u]
+        orders = list(self.orders)
+        orders[s] = self._order(s, self.layer, keys[s])
+        start = min(orders[s].index(u), orders[s].index(v))
+        tables = list(self.tables)
+        tables[s] = _peaks(self._cn(self.adj), orders[s], self.I, self.O, start, self.tables[s][1])
+        return self.adj, self.layer, keys, orders, tables
+
+
+    def graph(self):
+        """ (G, I, O) of the current state
+        """
+        G = nx.Graph()
+        G.add_nodes_from(range(self.n))
+        G.add_edges_from((u, v) for u in range(self.n) for v in _bits(self.adj[u]) if u < v)
+        return G, set(_bits(self.I)), set(_bits(self.O))
+
+
+    def above_bound(self):
+        """ The (nqubit, io type, ordering) of the current state above the bound
+        """
+        res = list()
+        for order, (peak, _) in zip(self.orders, self.tables):
+            for k, p in enumerate(peak):
+                if p > self.bound :
+                    res.append((p, IOTYPES[k], order))
+        return res
+
+
+def replay_conj1(G, I, O, meta):
+    """
+    The physical qubits of a reported graph, from Lazy1WQC
+
+    param
+        :meta: dict, with 'order', 'i_type' and 'o_type' as written by
+               anneal_conj1
+
+    return
+        int
+    """
+    from mbqc.qcomp import Lazy1WQC
+
+    lazyc = Lazy1WQC(G, set(I), set(O), dict())
+    lazyc.set_io_type(meta['i_type'], meta['o_type'])
+    lazyc.set_total_order(dict((n, t) for t, n in enumerate(meta['order'])))
+    return lazyc.count_physical_qubit()
+
+
+def _restart(n_I, n_O, n_aux, nstep, nsample, T0, T1, seed, bound):
+    """
+    One annealing run
+
+    return
+        dict{'seed', 'best', 'best_graph', 'found', 'accepted', 'no_flow', 'seconds'}
+    """
+    t0 = perf_counter()
+    ann = _Annealer(n_I, n_O, n_aux, nsample, seed, bound)
+    energy = ann.energy(ann.tables)
+    best, best_graph = energy, ann.graph()
+    found, seen = list(), set()
+    accepted, no_flow = 0, 0
+
+    for step in range(nstep):
+        T = T0*(T1/T0)**(step/max(nstep-1, 1))
+        new = ann.propose()
+        if new is None :
+            no_flow += 1
+            continue
+        e = ann.energy(new[4])
+        if e >= energy or ann.rng.random() < exp((e-energy)/T):
+            ann.adj, ann.layer, ann.keys, ann.orders, ann.tables = new
+            energy = e
+            accepted += 1
+            if e > best :
+                best, best_graph = e, ann.graph()
+            for nqubit, (itype, otype), order in ann.above_bound():
+                G, I, O = ann.graph()
+                key = (tuple(sorted(G.edges)), tuple(order), itype, otype)
+                if key in seen :
+                    continue
+                seen.add(key)
+                meta = {'nqubit': nqubit, 'bound': bound, 'i_type': itype, 'o_type': otype,
+                        'order': order, 'seed': seed, 'step': step}
+                if replay_conj1(G, I, O, meta) != nqubit :
+                    raise RuntimeError('the replay of a reported graph disagrees')
+                found.append((G, I, O, meta))
+
+    return {'seed': seed, 'best': int(best), 'best_graph': best_graph, 'found': found,
+            'accepted': accepted, 'no_flow': no_flow, 'seconds': perf_counter()-t0}
+
+
+def anneal_conj1(n_I, n_O, n_aux, nrestart=None, nstep=2000, nsample=4, ncpu=None,
+                 random_seed=None, outpath=None, T0=1., T1=0.05, bound=None):
+    """
+    Search open graphs whose worst ordering needs more than |O|+1 physical
+    qubits.
+
+    param
+        :n_I: int, number of input nodes
+        :n_O: int, number of output nodes, n_I <= n_O
+        :n_aux: int, number of auxiliary nodes
+        :nrestart: int, independent runs, default ncpu
+        :nstep: int, moves per run
+        :nsample: int, orderings per graph
+        :ncpu: int, default cpu_count()
+        :random_seed: int, the runs use numpy.random.SeedSequence(random_seed).spawn
+        :outpath: str, JSON or edgelist file of the graphs above the bound,
+                  see mbqc.lib.GraphWriter; meta holds nqubit, bound, i_type,
+                  o_type and the order of the nodes
+        :T0: float, initial temperature, in physical qubits
+        :T1: float, final temperature
+        :bound: int, default |O|+1
+
+    return
+        list(dict) : per run 'seed', 'best' (the most qubits reached),
+        'best_graph' (G, I, O), 'found' [(G, I, O, meta)], 'accepted',
+        'no_flow' and 'seconds'
+    """
+    if n_I > n_O :
+        raise ValueError('an open graph with flow has n_I <= n_O')
+    ncpu = ncpu if ncpu else cpu_count()
+    nrestart = nrestart if nrestart else ncpu
+    bound = n_O + 1 if bound is None else bound
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(random_seed).spawn(nrestart)]
+    args = [(n_I, n_O, n_aux, nstep, nsample, T0, T1, seed, bound) for seed in seeds]
+
+    if ncpu == 1 or nrestart == 1 :
+        results = [_restart(*a) for a in args]
+    else :
+        with Pool(min(ncpu, nrestart)) as pool :
+            results = pool.starmap(_restart, args, chunksize=1)
+
+    if outpath is not None :
+        with GraphWriter(outpath) as out :
+            for res in results :
+                for G, I, O, meta in res['found']:
+                    out.write(G, I, O, **meta)
+    return results
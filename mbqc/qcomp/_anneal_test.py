@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._anneal.py
+"""
+
+import networkx as nx
+
+from mbqc.lib import read_graphs
+from mbqc.qcomp import anneal_conj1, replay_conj1
+from mbqc.qcomp._anneal import _layers
+from mbqc.qres import flow
+
+
+def test_layers():
+    """ The bitmask flow gives the partial order classes of flow()
+    """
+    for seed in range(50):
+        G = nx.gnp_random_graph(6, 0.5, seed=seed)
+        adj = [sum(1 << v for v in G.neighbors(u)) for u in range(6)]
+        layer = _layers(adj, 63, 0b11, 0b110000)
+        exists, _, poset = flow(G, {0, 1}, {4, 5})
+        assert exists == (layer is not None)
+        if exists :
+            assert poset == dict((k, set(v for v in range(6) if layer[v] == k)) for k in set(layer))
+
+
+def test_search_replay(tmp_path):
+    """
+    With the bound lowered, the reported graphs have flow and replay through
+    Lazy1WQC to the reported count; the restarts are reproducible
+    """
+    path = str(tmp_path/'found.json')
+    results = anneal_conj1(1, 2, 3, nrestart=2, nstep=200, ncpu=2, random_seed=5, outpath=path, bound=2)
+    assert len(results) == 2 and all(r['found'] for r in results)
+    assert all(r['best'] <= 3 for r in results)
+
+    records = list(read_graphs(path))
+    assert len(records) == sum(len(r['found']) for r in results)
+    for G, I, O, meta in records[:50]:
+        assert flow(G, I, O)[0]
+        assert replay_conj1(G, I, O, meta) == meta['nqubit'] > 2
+
+    again = anneal_conj1(1, 2, 3, nrestart=2, nstep=200, ncpu=1, random_seed=5, bound=2)
+    assert [r['seed'] for r in again] == [r['seed'] for r in results]
+    assert [len(r['found']) for r in again] == [len(r['found']) for r in results]
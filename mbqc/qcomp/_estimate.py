@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Resource estimates of the brute-force runs, before they are launched.
+
+implemented:
+
+    estimate_generate_all --- OpenGraph.generate_all tries every subset of the
+        edges of the complete graph. A pilot sample of random bitmasks, run
+        as the ranges of GraphExecutor, gives the time per candidate and the
+        share of candidates that are connected and have flow; the wall-clock
+        time and the peak memory follow for the two results of
+        generate_all:
+
+            masks  : masks=True, the integer bitmasks over the edges of the
+                     graphs with flow, from the ranges of the workers
+            graphs : masks=False, the bitmasks decoded to a networkx graph
+                     each
+
+    estimate_bound_physical_qubit --- the cost of
+        Lazy1WQC.bound_physical_qubit for a number of samples, from a few
+        timed samples.
+"""
+
+#standard libraries
+import random
+import sys
+from math import sqrt
+from multiprocessing import cpu_count
+from time import perf_counter
+
+#non-standard libraries
+import networkx as nx
+from mbqc.qres import GraphExecutor
+
+
+def _deep_sizeof(obj, seen=None):
+    """ Bytes of obj and the containers it holds
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen :
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(x, seen) for x in obj)
+    elif hasattr(obj, '__dict__'):
+        size += _deep_sizeof(vars(obj), seen)
+    return size
+
+
+def _wilson(k, n, z=1.96):
+    """ The 95% Wilson interval of a proportion k/n
+    """
+    if n == 0 :
+        return (0., 1.)
+    p = k/n
+    centre = (p + z*z/(2*n))/(1 + z*z/n)
+    half = z*sqrt(p*(1-p)/n + z*z/(4*n*n))/(1 + z*z/n)
+    return (max(0., centre-half), min(1., centre+half))
+
+
+def estimate_generate_all(nodes, I, O, ncpu=None, pilot=200, random_seed=None):
+    """
+    Predict the cost of OpenGraph.generate_all(nodes, I, O, ncpu).
+
+    param
+        :nodes: list(int, str), the complete list of nodes
+        :I: set
+        :O: set
+        :ncpu: int, default cpu_count()
+        :pilot: int, number of random edge subsets tried
+        :random_seed: int
+
+    return
+        dict{'nedge', 'ncandidate', 'pilot', 'flow_share', 'flow_share_ci',
+             'nflow', 'per_graph_s', 'seconds', 'ncpu', 'memory'}, memory is
+        dict{mode: bytes} for the modes masks and graphs
+    """
+    ncpu = ncpu if ncpu else cpu_count()
+    nodes = list(nodes)
+    G = nx.complete_graph(nodes)
+    edges = list(G.edges)
+    nedge = len(edges)
+    ncandidate = 2**nedge
+
+    #the pilot runs the ranges of GraphExecutor on single bitmasks
+    rs = random.Random(random_seed)
+    executor = GraphExecutor(1, parallel=False)
+    masks = [rs.getrandbits(nedge) for _ in range(pilot)]
+    executor.flow_masks_range(nodes, I, O, 0, 0)
+    t0 = perf_counter()
+    found = [m for m in masks if executor.flow_masks_range(nodes, I, O, m, m+1)]
+    per_graph = (perf_counter()-t0)/max(pilot, 1)
+
+    nflow = len(found)
+    graph_bytes = sum(_deep_sizeof(g) for g in GraphExecutor.decode(nodes, edges, found))
+
+    share = nflow/pilot if pilot else 0.
+    graph_bytes = graph_bytes/nflow if nflow else _deep_sizeof(G)
+    expected = share*ncandidate
+
+    #GraphExecutor sends about 8 ranges per worker, gathers the bitmasks
+    #with flow in a list and copies them in a uint64 array up to 64 edges;
+    #masks=False adds a (G, I, O) per bitmask
+    args_bytes = sys.getsizeof((None,)*4) + 3*8
+    mask_bytes = sys.getsizeof(ncandidate-1) + 8 + (8 if nedge <= 64 else 0)
+    entry_bytes = graph_bytes + sys.getsizeof((None,)*3) + 8
+    masks_memory = 8*ncpu*args_bytes + expected*mask_bytes
+    memory = {'masks': masks_memory, 'graphs': masks_memory + expected*entry_bytes}
+
+    return {'nedge': nedge, 'ncandidate': ncandidate, 'pilot': pilot,
+            'flow_share': share, 'flow_share_ci': _wilson(nflow, pilot),
+            'nflow': expected, 'per_graph_s': per_graph,
+            'seconds': ncandidate*per_graph/ncpu, 'ncpu': ncpu,
+            'memory': dict((k, int(v)) for k, v in memory.items())}
+
+
+def estimate_bound_physical_qubit(lazyc, nsampling, pilot=3):
+    """
+    Predict the cost of lazyc.bound_physical_qubit(nsampling); the total
+    ordering of lazyc is overwritten by the pilot samples.
+
+    param
+        :lazyc: Lazy1WQC
+        :nsampling: int, the planned number of samples
+        :pilot: int, number of timed samples
+
+    return
+        dict{'nsampling', 'pilot', 'per_sample_s', 'seconds'}
+    """
+    t0 = perf_counter()
+    for seed in range(1, pilot+1):
+        lazyc.physical_qubit(random_seed=seed)
+    per_sample = (perf_counter()-t0)/max(pilot, 1)
+    return {'nsampling': nsampling, 'pilot': pilot, 'per_sample_s': per_sample,
+            'seconds': nsampling*per_sample}
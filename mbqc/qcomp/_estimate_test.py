@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._estimate.py
+"""
+
+import networkx as nx
+
+from example_graphstates import graph_H
+from mbqc.qres import OpenGraph
+from mbqc.qcomp import Lazy1WQC, estimate_generate_all, estimate_bound_physical_qubit
+
+
+def test_generate_all_share():
+    """
+    The pilot share of graphs with flow covers the exact share of the
+    enumeration, and the bitmasks need less memory than the graphs
+    """
+    nodes, I, O = range(5), {0}, {3, 4}
+    edges = list(nx.complete_graph(nodes).edges)
+    subsets = OpenGraph.get_power_set(edges)
+    exact = sum(bool(OpenGraph._try_graph(s, nodes, I, O)) for s in subsets)/len(subsets)
+
+    est = estimate_generate_all(nodes, I, O, ncpu=2, pilot=400, random_seed=3)
+    assert est['ncandidate'] == len(subsets) == 2**10
+    low, high = est['flow_share_ci']
+    assert low <= exact <= high
+    assert est['seconds'] > 0
+    assert 0 < est['memory']['masks'] < est['memory']['graphs']
+
+
+def test_bound_physical_qubit_cost():
+    lazyc = Lazy1WQC(*graph_H(), dict())
+    est = estimate_bound_physical_qubit(lazyc, nsampling=50, pilot=2)
+    assert est['per_sample_s'] > 0
+    assert est['seconds'] == 50*est['per_sample_s']
@@ -21,19 +21,86 @@ __email__ = "cicagustiani@gmail.com"
 
 
 #standard library
-from numpy import random
+import numpy as np
 from time import time
 from multiprocessing import current_process
 import networkx as nx
 
 #self defined library
-from mbqc.qres import GraphState, OpenGraph
-
+from mbqc.qres import GraphState, OpenGraph, StabilizerTableau, BatchedStateVector, GraphTensorNetwork
+from mbqc.qres import SharedGraphBatch
+from mbqc.qres._stabilizer import pauli_index
+from mbqc.qcomp._pattern import compile_pattern
+from mbqc.qcomp._pauli import eliminate_pauli
+from mbqc.qcomp._noise import simulate_noisy
+from mbqc.qcomp._pauliframe import PauliFrame
+from mbqc.lib import instrument
+
+
+#(input type, output type), see Lazy1WQC.set_io_type
+IOTYPES = [('classical', 'classical'), ('classical', 'quantum'),
+           ('quantum', 'classical'), ('quantum', 'quantum')]
+
+
+def _random_order(layer, random_seed):
+    """
+    The random total ordering of set_total_order_random on the layers of an
+    ArrayOpenGraph, the nodes of a layer taken in increasing order
+
+    return
+        numpy.ndarray : the nodes in the order of measurement
+    """
+    rs = np.random.RandomState(random_seed)
+    nodes = np.argsort(layer, kind='stable')
+    _, start = np.unique(layer[nodes], return_index=True)
+    torder = np.empty(len(layer), dtype=np.int64)
+    for lo, hi in zip(start, list(start[1:]) + [len(layer)]):
+        torder[nodes[lo:hi]] = rs.permutation(range(lo, hi))
+    return np.argsort(torder)
+
+
+def _count_physical_qubit_arrays(graph, order):
+    """
+    count_physical_qubit_iotypes of an ArrayOpenGraph and a total ordering,
+    on its CSR arrays: node a is allocated at the first step of its closed
+    neighbourhood, and released at its own step unless it is a quantum
+    output
+
+    return
+        numpy.ndarray (4,) : the physical qubits in the order of IOTYPES
+    """
+    n = graph.nnode
+    pos = np.empty(n, dtype=np.int64)
+    pos[order] = np.arange(n)
+    alloc = pos.copy()
+    rows = np.flatnonzero(np.diff(graph.indptr))
+    if len(rows):
+        alloc[rows] = np.minimum(alloc[rows], np.minimum.reduceat(pos[graph.indices], graph.indptr[rows]))
+
+    measured = np.ones(n, dtype=bool)
+    measured[graph.outputs] = False
+    noinput = np.ones(n, dtype=bool)
+    noinput[graph.inputs] = False
+    added = {'classical': np.cumsum(np.bincount(alloc, minlength=n)),
+             'quantum': np.cumsum(np.bincount(alloc[noinput], minlength=n)) + len(graph.inputs)}
+    released = {'classical': np.arange(n),
+                'quantum': np.cumsum(np.bincount(pos[measured], minlength=n)) - measured[order]}
+    return np.array([(added[i] - released[o]).max() for i, o in IOTYPES])
+
+
+def _bound_shared(batch, k, nsampling, seeds):
+    """
+    Worker of Lazy1WQC.bound_physical_qubit_many, for graph k of batch; it
+    reads the views of the batch, no graph object is built
+    """
+    graph = batch.graph(k)
+    counts = np.array([_count_physical_qubit_arrays(graph, _random_order(graph.layer, seed)) for seed in seeds])
+    batch.result('bound')[k] = np.stack([counts.min(axis=0), counts.max(axis=0)], axis=1)
 
 
 class Lazy1WQC(GraphState):
 
-    def __init__(self, G, I, O, phi):
+    def __init__(self, G, I, O, phi, known_flow=None, check_flow=False):
         """ Instantiation of lazy1WQC object. This class corresponds to
         Algorithm 1 in BOQC paper.  It is a child of GraphState, which is also a
         grandchild of OpenGraph.
@@ -43,11 +110,13 @@ class Lazy1WQC(GraphState):
            :I: set, a set input nodes
            :O: set, a set of output nodes
            :phi: dict{node: float}, dict contains node and it's measurement angles
+           :known_flow: (dict, dict), the flow and its ordering_class, see OpenGraph
+           :check_flow: bool, check known_flow, see OpenGraph
         """
         if not isinstance(phi,dict):
             raise TypeError('phi must be dict type')
 
-        super().__init__(G, I, O)
+        super().__init__(G, I, O, known_flow, check_flow)
         self.phi = phi
         self.total_ordering = False
         self.I_type = 'quantum'
@@ -71,7 +140,7 @@ class Lazy1WQC(GraphState):
             random_seed=int(str(time()).replace('.',''))-hash(self.G)-proc.pid
             random_seed=random_seed%(2**32 - 1)
 
-        rs = random.RandomState(random_seed)
+        rs = np.random.RandomState(random_seed)
         for inset in self.ordering_class.values():
             ridx = rs.permutation(range(idx,idx+len(inset)))
             for n,i in zip(inset, ridx):
@@ -173,6 +242,7 @@ class Lazy1WQC(GraphState):
         return snodes
 
 
+    @instrument.timed('lazy1wqc.A_i')
     def A_i(self, node_i):
         """
         Equation (14) from BOQC paper. It returns the new qubits assigned
@@ -225,6 +295,7 @@ class Lazy1WQC(GraphState):
         return res
 
 
+    @instrument.timed('lazy1wqc.bound_physical_qubit')
     def bound_physical_qubit(self, nsampling, hash_number=False):
         """
         Calculate the bound of physical qubits number from nsampling samples.
@@ -237,18 +308,102 @@ class Lazy1WQC(GraphState):
         return
             (int, int): (lower bound, upper bound)
         """
-        #create equally-spaced non-overlaping seeds
-        if not random_seeds :
-            max_num = int(2147483647/nsampling)
-            ranstate = random.RandomState()
-            random_seeds = [i*ranstate.random_integers() for i in range(1,nsampling+1)]
-
         #sampling
-        number_physicalq = [self.physical_qubit(seed) for seed in random_seeds]
+        number_physicalq = [self.physical_qubit(seed) for seed in self._seeds(nsampling, hash_number)]
 
         return (min(number_physicalq),max(number_physicalq))
 
 
+    @staticmethod
+    def _seeds(nsampling, hash_number=False):
+        """ hash_number, or equally-spaced non-overlaping seeds
+        """
+        if hash_number :
+            return hash_number
+        max_num = int(2147483647/nsampling)
+        offset = np.random.RandomState().randint(1, max_num)
+        return [offset + i*max_num for i in range(nsampling)]
+
+
+    @instrument.timed('lazy1wqc.bound_physical_qubit_iotypes')
+    def bound_physical_qubit_iotypes(self, nsampling, hash_number=False):
+        """
+        bound_physical_qubit of the four io types on the same nsampling
+        orderings, see count_physical_qubit_iotypes
+
+        return
+            dict{(str, str): (int, int)} : (input type, output type): (lower
+            bound, upper bound)
+        """
+        samples = [self.physical_qubit_iotypes(seed) for seed in self._seeds(nsampling, hash_number)]
+        return dict((t, (min(s[t] for s in samples), max(s[t] for s in samples))) for t in IOTYPES)
+
+
+    @classmethod
+    def bound_physical_qubit_many(cls, graphs, nsampling, hash_number=False, ncpu=None):
+        """
+        bound_physical_qubit_iotypes of many open graphs on a process pool;
+        the graphs go to the workers in a SharedGraphBatch, not pickled, the
+        workers count on its CSR and layer arrays, and the bounds come back
+        in its result array. Every graph gets the same seeds, and is
+        numbered 0..n-1 in the order of its nodes; the nodes of a layer are
+        permuted in increasing order, see _random_order.
+
+        param
+            :graphs: iterable, of Lazy1WQC, OpenGraph, ArrayOpenGraph or
+                     (G, I, O), see SharedGraphBatch.create
+            :nsampling: int, number of sampling
+            :hash_number: list(int), the seeds
+            :ncpu: int, default cpu_count()
+
+        return
+            dict{(str, str): numpy.ndarray (ngraph, 2)} : (input type, output
+            type): (lower bound, upper bound) of every graph
+        """
+        seeds = cls._seeds(nsampling, hash_number)
+        with SharedGraphBatch.create(graphs, results={'bound': ('int64', (len(IOTYPES), 2))}) as batch :
+            batch.map(_bound_shared, (nsampling, seeds), ncpu=ncpu)
+            bounds = batch.result('bound').copy()
+        return dict((t, bounds[:, i]) for i, t in enumerate(IOTYPES))
+
+
+    def physical_qubit_iotypes(self, random_seed=None):
+        """
+        physical_qubit of the four io types for one random ordering
+
+        return
+            dict{(str, str): int}
+        """
+        self.set_total_order_random(random_seed=random_seed)
+        return self.count_physical_qubit_iotypes()
+
+
+    def count_physical_qubit_iotypes(self):
+        """
+        count_physical_qubit of the current total ordering for the four io
+        types, in one pass: the A(i) of a quantum input are those of a
+        classical input minus I, and a quantum output is not released.
+        The io type set by set_io_type is ignored.
+
+        return
+            dict{(str, str): int} : (input type, output type): physical qubits
+        """
+        alive = dict((t, len(self.I) if t[0] == 'quantum' else 0) for t in IOTYPES)
+        peak = dict((t, 0) for t in IOTYPES)
+        allocated = set()
+        for node in self.sortedtot_nodes():
+            new = self.cneighbors(node).difference(allocated)
+            allocated.update(new)
+            nnew = {'classical': len(new), 'quantum': len(new.difference(self.I))}
+            for t in IOTYPES :
+                alive[t] += nnew[t[0]]
+                peak[t] = max(peak[t], alive[t])
+                if node not in self.O or t[1] == 'classical':
+                    alive[t] -= 1
+        return peak
+
+
+    @instrument.timed('lazy1wqc.physical_qubit')
     def physical_qubit(self, random_seed=None):
         """
         Explicitly calculate the number of physical qubit required, given
@@ -262,7 +417,17 @@ class Lazy1WQC(GraphState):
         """
         # sample from a random total ordering
         self.set_total_order_random(random_seed=random_seed)
+        return self.count_physical_qubit()
+
+
+    def count_physical_qubit(self):
+        """
+        The number of physical qubits required by the current total
+        ordering, e.g. to replay an ordering given to set_total_order.
 
+        return
+            int
+        """
         #"assigning" input state to input nodes at once of per time-step
         if self.I_type == 'classical':
             nodes = self.sortedtot_nodes()
@@ -287,28 +452,308 @@ class Lazy1WQC(GraphState):
         return max(qalive_i)
 
 
+    def allocation_schedule(self):
+        """
+        Return A(i) for every node, ordered by the total ordering, in a single
+        pass over the nodes. Equivalent to calling A_i() for all nodes.
+
+        return
+            list((node, set)) : (node i, A(i))
+        """
+        allocated = set(self.I) if self.I_type == 'quantum' else set()
+        schedule = list()
+        for node in self.sortedtot_nodes():
+            new = self.cneighbors(node).difference(allocated)
+            allocated.update(new)
+            schedule.append((node, new))
+        return schedule
+
+
+    def phi_array(self):
+        """
+        The angles as an array over list(G.nodes), NaN for the nodes without
+        angle, e.g. the outputs
+
+        return
+            numpy.ndarray (n,)
+        """
+        return np.array([self.phi.get(n, np.nan) for n in self.G.nodes], dtype=float)
+
+
+    ## Clifford simulation
+    def is_clifford(self):
+        """
+        Whether all measurement angles in phi are multiples of pi/2, i.e.
+        the pattern can be simulated with a stabilizer tableau.
+        """
+        return all(pauli_index(angle) is not None for angle in self.phi.values())
+
+
+    def run_clifford(self, random_seed=None):
+        """
+        Simulate the pattern with a stabilizer tableau, following the lazy
+        1WQC: qubits are allocated by A(i) and their slots are reused once
+        measured, so the tableau is only as wide as the number of physical
+        qubits. The byproducts are corrected with the flow. Inputs are |+>.
+        Output nodes without an angle are measured in Z if the output is
+        classical.
+
+        param
+            :random_seed: int, the seed for outcomes and for the total ordering
+                          if it has not been set yet
+
+        return
+            (dict{node:int}, StabilizerTableau, dict{node:qubit}) :
+                (outcomes, tableau, qubits of the remaining output nodes)
+        """
+        measured = set(self.G.nodes)
+        if self.O_type == 'quantum':
+            measured -= self.O
+        if not set(self.phi.keys()).issuperset(measured - self.O):
+            raise ValueError('phi must contain an angle for every measured node')
+        if not self.is_clifford():
+            raise ValueError('all angles must be multiple of pi/2')
+
+        if not self.total_ordering :
+            self.set_total_order_random(random_seed=random_seed)
+        schedule = self.allocation_schedule()
+
+        #the number of physical qubits sets the width of the tableau
+        prealloc = set(self.I) if self.I_type == 'quantum' else set()
+        qalive = nqubit = len(prealloc)
+        for node, new in schedule:
+            qalive += len(new)
+            nqubit = max(nqubit, qalive)
+            if node in measured :
+                qalive -= 1
+
+        rng = np.random.RandomState(random_seed)
+        tab = StabilizerTableau(nqubit)
+        free, qmap = list(range(nqubit-1, -1, -1)), dict()
+
+        def allocate(nodes):
+            for a in nodes :
+                q = free.pop()
+                tab.h(q)
+                for b in self.G.neighbors(a):
+                    if b in qmap :
+                        tab.cz(q, qmap[b])
+                qmap[a] = q
+
+        allocate(prealloc)
+        frame = PauliFrame(self.G, self.f, self.phi)
+        outcomes = dict()
+        for node, new in schedule:
+            allocate(new)
+            if node not in measured :
+                continue
+
+            q = qmap.pop(node)
+            if node in self.phi :
+                s, _ = tab.measure_angle(q, frame.angle(node), rng)
+            else :
+                s, _ = tab.measure_z(q, rng)
+                s ^= frame.byproduct(node)[0]
+            outcomes[node] = s
+            frame.record(node, s)
+            tab.reset(q, rng)
+            free.append(q)
+
+        for node, q in qmap.items():
+            x, z = frame.byproduct(node)
+            if x :
+                tab.x_gate(q)
+            if z :
+                tab.z_gate(q)
+
+        return outcomes, tab, qmap
+
+
+
+    ## statevector simulation
+    def simulate_batch(self, phis, random_seed=None, sample=False, psi_in=None):
+        """
+        Simulate the pattern for B sets of angles at once, with the lazy
+        allocation A(i). The graph-state preparation and entangling are shared
+        by the batch: they act on a single state until the first measurement.
+
+        param
+            :phis: numpy.ndarray (B, n) or (n,), the angles. The columns follow
+                   list(G.nodes); the columns of unmeasured nodes are ignored.
+            :random_seed: int, the seed of the total ordering if it has not
+                          been set yet, and of the outcomes if sample=True
+            :sample: bool, if False the outcomes 0 are postselected, which is
+                     the deterministic result of a pattern with flow. If True,
+                     outcomes are sampled and corrected with the flow.
+            :psi_in: numpy.ndarray (2**|I|,) or (B, 2**|I|), the input state
+                     for quantum input, ordered by sorted(I). Default |+>.
+
+        return
+            (numpy.ndarray (B, 2**|O|), list(node)) : the output states, or the
+            Z-basis outcome distributions for classical output, and the output
+            nodes from the most significant qubit.
+        """
+        nodelist = list(self.G.nodes)
+        col = dict((n, i) for i, n in enumerate(nodelist))
+        phis = np.atleast_2d(np.asarray(phis, dtype=float))
+        if phis.shape[1] != len(nodelist):
+            raise ValueError('phis must have one column per node')
+        batch = phis.shape[0]
+
+        if not self.total_ordering :
+            self.set_total_order_random(random_seed=random_seed)
+        schedule = self.allocation_schedule()
+        rng = np.random.RandomState(random_seed) if sample else None
+
+        reg = BatchedStateVector(batch)
+        if self.I_type == 'quantum':
+            inputs = sorted(self.I, key=lambda n: col[n])
+            if psi_in is None :
+                psi_in = np.ones(2**len(inputs))/np.sqrt(2**len(inputs))
+            reg.allocate_state(inputs, psi_in)
+            for a, b in self.G.subgraph(inputs).edges:
+                reg.cz(a, b)
+
+        frame = PauliFrame(self.G, self.f, batch=batch)
+        for node, new in schedule:
+            for a in new :
+                reg.allocate_plus(a)
+                for b in self.G.neighbors(a):
+                    if b in reg.nodes and b != a :
+                        reg.cz(a, b)
+            if node in self.O :
+                continue
+
+            s = reg.measure(node, frame.angle(node, phis[:, col[node]]), rng)
+            if sample :
+                frame.record(node, s)
+
+        outputs = sorted(self.O, key=lambda n: col[n])
+        if sample :
+            for node in outputs :
+                x, z = frame.byproduct(node)
+                reg.x_gate(node, x)
+                reg.z_gate(node, z)
+
+        psi = reg.state(outputs)
+        if self.O_type == 'classical':
+            return np.abs(psi)**2, outputs
+        return psi, outputs
+
+
+    def simulate_noisy(self, depolarizing=0., dephasing=0., ntrajectory=1000, **options):
+        """
+        Output fidelity under depolarising and dephasing noise per live qubit
+        and time step, from Pauli trajectories on a process pool, see
+        mbqc.qcomp._noise.simulate_noisy for the options
+
+        return
+            dict{'fidelity', 'fidelity_ci', 'stderr', 'ntrajectory',
+            'exposure', 'seconds'}
+        """
+        return simulate_noisy(self, depolarizing, dephasing, ntrajectory, **options)
+
+
+    ## tensor-network simulation
+    def plan_tensornetwork(self, lookahead=1):
+        """
+        Estimate the cost of simulate_tensornetwork() without contracting.
+
+        param
+            :lookahead: int, number of flow layers after the current one in
+                        which the greedy contraction order may pick a node
+
+        return
+            dict{'flops':int, 'memory':int, 'order':list} memory in bytes
+        """
+        tn = GraphTensorNetwork(self.G, self.I, self.O, self.phi)
+        order, flops, memory = tn.plan(self.ordering_class, lookahead=lookahead)
+        return {'flops': flops, 'memory': memory, 'order': order}
+
+
+    def simulate_tensornetwork(self, psi_in=None, max_memory=2**30, max_flops=2**40, lookahead=1):
+        """
+        Simulate the pattern by contracting its tensor network, the measured
+        nodes are projected onto |+_phi> (the deterministic branch of flow).
+        The cost is estimated first, and a ResourceError is raised if it is
+        above the limits.
+
+        param
+            :psi_in: numpy.ndarray (2**|I|,), the quantum input ordered as
+                     list(G.nodes). Default |+>.
+            :max_memory: int, bytes
+            :max_flops: int
+            :lookahead: int, see plan_tensornetwork()
+
+        return
+            (numpy.ndarray (2**|O|,), list(node), dict) : the output state, or
+            the Z-basis distribution for classical output, the output nodes
+            and the cost of the contraction
+        """
+        if self.I_type == 'classical':
+            psi_in = None
+        tn = GraphTensorNetwork(self.G, self.I, self.O, self.phi, psi_in=psi_in)
+        order, _, _ = tn.plan(self.ordering_class, lookahead=lookahead)
+        psi, report = tn.contract(order, max_memory=max_memory, max_flops=max_flops)
+        if self.O_type == 'classical':
+            psi = np.abs(psi)**2
+        return psi, tn.outputs, report
+
+
+    ## measurement calculus
+    def pattern(self, pauli=True):
+        """
+        Compile the computation into a standardized, signal-shifted pattern,
+        measured in the total ordering if it is set, else by flow layers.
+
+        param
+            :pauli: bool, simplify the domains of Pauli measurements
+
+        return
+            (Pattern, dict) : the pattern and the feed-forward depth report
+                              {'depth_flow', 'depth_shifted', 'ncommand'}
+        """
+        order = self.sortedtot_nodes() if self.total_ordering else None
+        return compile_pattern(self, self.phi, order=order, pauli=pauli)
+
+
+    def eliminate_pauli(self):
+        """
+        The computation without its Pauli-measured auxiliary nodes, see
+        mbqc.qcomp._pauli
+
+        return
+            (Lazy1WQC, dict) : the reduced computation and the report, its
+                               'output_phase' completes the reduced output
+        """
+        return eliminate_pauli(self)
+
 
     ## statements present in the BOQC paper
 
+    @instrument.timed('lazy1wqc.lemma2')
     def lemma2(self):
         """
         A(i) contains at least f(i), for all i in O^c.
         """
+        schedule = dict(self.allocation_schedule())
         subset = set(self.G.nodes).difference(self.O)
         for i in subset :
-            if not self.f[i] in self.A_i(i):
+            if not self.f[i] in schedule[i]:
                 return 'FAIL'
         return 'PASS'
 
 
+    @instrument.timed('lazy1wqc.lemma3')
     def lemma3(self):
         """
         If you collect all elements of every A(i), for all i in O^c, you
         will obtain I^c.
         """
+        schedule = dict(self.allocation_schedule())
         ai = list()
         for i in set(self.G.nodes).difference(self.O):
-            ai += list(self.A_i(i))
+            ai += list(schedule[i])
 
         if self.I_type == 'quantum':
             i_comp = set(self.G.nodes()).difference(self.I)
@@ -321,6 +766,7 @@ class Lazy1WQC(GraphState):
         return 'FAIL'
 
 
+    @instrument.timed('lazy1wqc.lemma4')
     def lemma4(self):
         """
         Sum of all E^>_{iNg} for all i, results in all edges E
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._lazy1wqc.py
+"""
+
+from math import pi
+import numpy as np
+import pytest
+
+import networkx as nx
+
+from example_graphstates import graph_1d, graph_brickwork, graph_example_boqc
+from mbqc.qcomp import Lazy1WQC
+from mbqc.lib import ResourceError
+
+
+def _output_observable(phi, seed):
+    """
+    Run the 1d chain and return the Pauli basis in which the output is an
+    eigenstate, with its eigenvalue
+    """
+    lazyc = Lazy1WQC(*graph_1d(), phi)
+    _, tab, qmap = lazyc.run_clifford(random_seed=seed)
+    for basis in 'XYZ':
+        s, rand = tab.copy().measure(qmap[4], basis)
+        if not rand :
+            return basis, s
+
+
+def test_run_clifford_deterministic():
+    """
+    With the flow corrections the output does not depend on the outcomes
+    """
+    rs = np.random.RandomState(3)
+    for trial in range(5):
+        phi = dict((n, rs.randint(4)*pi/2) for n in ['in', 1, 2, 3])
+        results = set(_output_observable(phi, seed) for seed in range(1, 20))
+        assert len(results) == 1
+
+
+def test_run_clifford_width():
+    """
+    The tableau is as wide as the number of physical qubits
+    """
+    G, I, O = graph_brickwork(3, 20)
+    lazyc = Lazy1WQC(G, I, O, dict((n, 0.) for n in G.nodes if n not in O))
+    lazyc.set_total_order_random(random_seed=5)
+    outcomes, tab, qmap = lazyc.run_clifford(random_seed=5)
+    assert set(qmap) == O
+    assert len(outcomes) == len(G) - len(O)
+    assert tab.n == lazyc.physical_qubit(random_seed=5)
+
+
+def test_simulate_batch_single_step():
+    """
+    Two nodes implement J(a) = H diag(1, e^{-ia}) on the input
+    """
+    G = nx.Graph([('a', 'b')])
+    lazyc = Lazy1WQC(G, {'a'}, {'b'}, dict())
+    psi = np.array([0.6, 0.8j])
+    angles = [0.3, 1.1, 2.5]
+    out, outputs = lazyc.simulate_batch([[a, 0.] for a in angles], psi_in=psi)
+    hadamard = np.array([[1, 1], [1, -1]])/np.sqrt(2)
+    assert outputs == ['b'] and out.shape == (3, 2)
+    for a, psi_out in zip(angles, out):
+        expected = hadamard @ np.diag([1, np.exp(-1j*a)]) @ psi
+        assert np.isclose(abs(np.vdot(expected, psi_out)), 1)
+
+
+def test_simulate_batch_sampled_outcomes():
+    """
+    Sampled outcomes corrected with the flow give the postselected states
+    """
+    G, I, O = graph_example_boqc()
+    lazyc = Lazy1WQC(G, I, O, dict())
+    lazyc.set_total_order_random(random_seed=2)
+    phis = np.random.RandomState(0).rand(16, len(G))*2*pi
+    post, _ = lazyc.simulate_batch(phis)
+    sampled, _ = lazyc.simulate_batch(phis, random_seed=9, sample=True)
+    assert np.allclose(np.abs(np.sum(post.conj()*sampled, axis=1)), 1)
+
+    lazyc.set_io_type('quantum', 'classical')
+    dist, _ = lazyc.simulate_batch(phis)
+    assert np.allclose(dist, np.abs(post)**2)
+
+
+def test_simulate_tensornetwork():
+    """
+    The contracted network equals the statevector simulation, and too
+    expensive contractions are rejected before they start
+    """
+    G, I, O = graph_brickwork(3, 8)
+    rs = np.random.RandomState(4)
+    phi = dict((n, rs.rand()*2*pi) for n in G.nodes if n not in O)
+    lazyc = Lazy1WQC(G, I, O, phi)
+    psi_sv, _ = lazyc.simulate_batch([phi.get(n, 0.) for n in G.nodes])
+    psi_tn, outputs, report = lazyc.simulate_tensornetwork()
+    assert outputs == sorted(O)
+    assert np.isclose(abs(np.vdot(psi_sv[0], psi_tn)), 1)
+    assert report == lazyc.plan_tensornetwork()
+
+    with pytest.raises(ResourceError):
+        lazyc.simulate_tensornetwork(max_memory=report['memory']-1)
+
+
+def test_physical_qubit_iotypes():
+    """
+    The four io types in one pass agree with count_physical_qubit per type,
+    on the same orderings
+    """
+    from mbqc.qcomp._lazy1wqc import IOTYPES
+
+    for G, I, O in [graph_example_boqc(), graph_brickwork(3, 5), graph_1d()]:
+        lazyc = Lazy1WQC(G, I, O, dict())
+        for seed in range(1, 6):
+            counts = lazyc.physical_qubit_iotypes(seed)
+            for i_type, o_type in IOTYPES :
+                lazyc.set_io_type(i_type, o_type)
+                assert counts[(i_type, o_type)] == lazyc.count_physical_qubit()
+
+        bounds = lazyc.bound_physical_qubit_iotypes(4, hash_number=[3, 5, 7, 11])
+        for i_type, o_type in IOTYPES :
+            lazyc.set_io_type(i_type, o_type)
+            assert bounds[(i_type, o_type)] == lazyc.bound_physical_qubit(4, hash_number=[3, 5, 7, 11])
+
+
+def test_bound_physical_qubit_many():
+    """
+    The bounds of the shared batch on a pool agree with
+    bound_physical_qubit_iotypes per graph, numbered 0..n-1
+    """
+    graphs = [graph_example_boqc(), graph_brickwork(3, 5), graph_1d()]*2
+    seeds = [3, 5, 7, 11]
+    bounds = Lazy1WQC.bound_physical_qubit_many(graphs, 4, hash_number=seeds, ncpu=2)
+    for k, (G, I, O) in enumerate(graphs):
+        index = dict((n, i) for i, n in enumerate(G.nodes))
+        lazyc = Lazy1WQC(nx.relabel_nodes(G, index), set(index[n] for n in I), set(index[n] for n in O), dict())
+        for t, (lower, upper) in lazyc.bound_physical_qubit_iotypes(4, hash_number=seeds).items():
+            assert tuple(bounds[t][k]) == (lower, upper)
+
+
+def test_count_physical_qubit_arrays():
+    """ The counts on the CSR arrays agree with count_physical_qubit_iotypes
+    """
+    from mbqc.qres import brickwork, cluster
+    from mbqc.qcomp._lazy1wqc import IOTYPES, _count_physical_qubit_arrays, _random_order
+
+    for ag in [brickwork(3, 9), brickwork(5, 13), cluster(4, 6)]:
+        lazyc = ag.to_opengraph(Lazy1WQC, dict())
+        for seed in range(1, 6):
+            order = _random_order(ag.layer, seed)
+            lazyc.set_total_order(dict((int(n), i) for i, n in enumerate(order)))
+            counts = lazyc.count_physical_qubit_iotypes()
+            assert list(_count_physical_qubit_arrays(ag, order)) == [counts[t] for t in IOTYPES]
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Noisy simulation of a Lazy 1WQC by stochastic Pauli trajectories, without
+the density matrix.
+
+implemented:
+
+    simulate_noisy --- output fidelity under depolarising and dephasing
+        noise, with its confidence interval.
+
+    A time step is the measurement of a node in the total ordering. At every
+    step the qubits of A(i) are prepared and entangled, then every live
+    qubit, the new ones included, goes through
+
+        depolarising  p : X, Y or Z with probability p/3 each
+        dephasing     q : Z with probability q
+
+    and node i is measured. The outcomes are sampled and corrected by
+    PauliFrame, as simulate_batch with sample=True. So a qubit is exposed for
+    as many steps as it is alive in the lazy schedule; with lazy=False every
+    qubit is prepared at the first step, as the 1WQC without A(i).
+
+    A batch of trajectories is one BatchedStateVector, the Pauli errors are
+    masks over the batch. The batches run on a pool of processes, batch k
+    with the k-th child of numpy.random.SeedSequence(random_seed), so the
+    result depends on the seed and the batch size, not on ncpu.
+
+    The fidelity of a trajectory is |<psi|psi_t>|^2 with the noiseless
+    output psi, or (sum_x sqrt(p(x) p_t(x)))^2 for a classical output; the
+    fidelity of the noisy channel is their mean.
+"""
+
+#standard libraries
+from math import sqrt
+from multiprocessing import Pool, cpu_count
+from time import perf_counter
+
+#non-standard libraries
+import numpy as np
+from mbqc.qres import BatchedStateVector
+from mbqc.qcomp._pauliframe import PauliFrame
+
+
+def _pauli_noise(reg, node, depolarizing, dephasing, rs):
+    """ One step of noise on node, for every trajectory of the register
+    """
+    B = reg.batch
+    x, z = np.zeros(B, dtype=bool), np.zeros(B, dtype=bool)
+    if depolarizing :
+        hit = rs.random_sample(B) < depolarizing
+        which = rs.randint(3, size=B)     #X, Y, Z
+        x = hit & (which != 2)
+        z = hit & (which != 0)
+    if dephasing :
+        z ^= rs.random_sample(B) < dephasing
+    if x.any():
+        reg.x_gate(node, x)
+    if z.any():
+        reg.z_gate(node, z)
+
+
+def _trajectories(lazyc, ideal, ntrajectory, depolarizing, dephasing, lazy, psi_in, seed):
+    """
+    One batch of trajectories
+
+    return
+        (numpy.ndarray (ntrajectory,), int) : the fidelities and the live
+        qubit steps, i.e. the noise exposure of one trajectory
+    """
+    rs = np.random.RandomState(np.random.MT19937(seed))
+    G, O = lazyc.G, lazyc.O
+    col = dict((n, i) for i, n in enumerate(G.nodes))
+    phis = np.nan_to_num(lazyc.phi_array())
+
+    reg = BatchedStateVector(ntrajectory)
+    if lazyc.I_type == 'quantum':
+        inputs = sorted(lazyc.I, key=lambda n: col[n])
+        reg.allocate_state(inputs, psi_in)
+        for a, b in G.subgraph(inputs).edges:
+            reg.cz(a, b)
+
+    schedule = lazyc.allocation_schedule()
+    if not lazy :
+        allnew = set().union(*[new for _, new in schedule])
+        schedule = [(node, allnew if k == 0 else set()) for k, (node, _) in enumerate(schedule)]
+
+    frame = PauliFrame(G, lazyc.f, batch=ntrajectory)
+    exposure = 0
+    for node, new in schedule :
+        for a in sorted(new, key=lambda n: col[n]):
+            reg.allocate_plus(a)
+            for b in G.neighbors(a):
+                if b in reg.nodes and b != a :
+                    reg.cz(a, b)
+        for q in list(reg.nodes):
+            _pauli_noise(reg, q, depolarizing, dephasing, rs)
+        exposure += len(reg.nodes)
+        if node in O :
+            continue
+        s = reg.measure(node, frame.angle(node, np.full(ntrajectory, phis[col[node]])), rs)
+        frame.record(node, s)
+
+    outputs = sorted(O, key=lambda n: col[n])
+    for node in outputs :
+        x, z = frame.byproduct(node)
+        reg.x_gate(node, x)
+        reg.z_gate(node, z)
+    psi = reg.state(outputs)
+    if lazyc.O_type == 'classical':
+        return np.sum(np.sqrt(np.abs(psi)**2*ideal), axis=1)**2, exposure
+    return np.abs(psi @ ideal.conj())**2, exposure
+
+
+def simulate_noisy(lazyc, depolarizing=0., dephasing=0., ntrajectory=1000, batch=256, ncpu=None,
+                   random_seed=None, psi_in=None, lazy=True, z=1.96):
+    """
+    Output fidelity of lazyc under Pauli noise per live qubit and time step
+
+    param
+        :lazyc: Lazy1WQC, the total ordering is set at random with
+                random_seed if it is not set yet
+        :depolarizing: float, probability of a depolarising error per step
+        :dephasing: float, probability of a Z error per step
+        :ntrajectory: int, number of trajectories
+        :batch: int, trajectories per statevector
+        :ncpu: int, default cpu_count(); 1 runs in this process
+        :random_seed: int, the seed of numpy.random.SeedSequence
+        :psi_in: numpy.ndarray (2**|I|,), the quantum input ordered as in
+                 simulate_batch, default |+>
+        :lazy: bool, prepare the qubits by A(i), else all at the first step
+        :z: float, the normal quantile of the interval, 1.96 for 95%
+
+    return
+        dict{'fidelity', 'fidelity_ci', 'stderr', 'ntrajectory', 'exposure',
+        'seconds'} : exposure is the number of (live qubit, step) pairs,
+        each one a chance of error
+    """
+    if not 0 <= depolarizing <= 1 or not 0 <= dephasing <= 1 :
+        raise ValueError('the error probabilities must be in [0, 1]')
+    t0 = perf_counter()
+    if not lazyc.total_ordering :
+        lazyc.set_total_order_random(random_seed=random_seed)
+    phis = lazyc.phi_array()
+    if psi_in is None and lazyc.I_type == 'quantum':
+        psi_in = np.ones(2**len(lazyc.I))/sqrt(2**len(lazyc.I))
+    ideal, _ = lazyc.simulate_batch(np.nan_to_num(phis), psi_in=psi_in)
+
+    sizes = [batch]*(ntrajectory//batch) + ([ntrajectory % batch] if ntrajectory % batch else [])
+    seeds = np.random.SeedSequence(random_seed).spawn(len(sizes))
+    args = [(lazyc, ideal[0], size, depolarizing, dephasing, lazy, psi_in, seed)
+            for size, seed in zip(sizes, seeds)]
+    ncpu = ncpu if ncpu else cpu_count()
+    if ncpu == 1 or len(args) == 1 :
+        results = [_trajectories(*a) for a in args]
+    else :
+        with Pool(min(ncpu, len(args))) as pool :
+            results = pool.starmap(_trajectories, args, chunksize=1)
+
+    fidelity = np.concatenate([f for f, _ in results])
+    mean = float(np.mean(fidelity))
+    stderr = float(np.std(fidelity, ddof=1)/sqrt(len(fidelity))) if len(fidelity) > 1 else 0.
+    return {'fidelity': mean, 'fidelity_ci': (max(0., mean-z*stderr), min(1., mean+z*stderr)),
+            'stderr': stderr, 'ntrajectory': len(fidelity), 'exposure': results[0][1],
+            'seconds': perf_counter()-t0}
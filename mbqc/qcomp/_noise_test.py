@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._noise.py
+"""
+
+from math import pi
+import numpy as np
+import networkx as nx
+
+from example_graphstates import graph_brickwork
+from mbqc.qcomp import Lazy1WQC, simulate_noisy
+
+
+def _brickwork(H, W, seed=1):
+    G, I, O = graph_brickwork(H, W)
+    rs = np.random.RandomState(seed)
+    lazyc = Lazy1WQC(G, I, O, dict((n, rs.rand()*2*pi) for n in G.nodes if n not in O))
+    lazyc.set_total_order_random(3)
+    return lazyc
+
+
+def test_noiseless():
+    """ Without noise every trajectory has fidelity 1, with any outcomes
+    """
+    res = simulate_noisy(_brickwork(3, 5), ntrajectory=100, batch=32, ncpu=1, random_seed=1)
+    assert np.isclose(res['fidelity'], 1) and res['ntrajectory'] == 100
+    assert np.isclose(res['fidelity_ci'][0], 1)
+
+
+def test_single_edge():
+    """
+    On the edge 0-1 a Z before the measurement of 0 is an X on the output,
+    and the output is exposed twice more to Z; the fidelity follows the
+    Pauli channel
+    """
+    G = nx.Graph([(0, 1)])
+    lazyc = Lazy1WQC(G, {0}, {1}, {0: 0.7})
+    lazyc.set_total_order_random(1)
+    q = 0.1
+    res = lazyc.simulate_noisy(dephasing=q, ntrajectory=20000, batch=1000, ncpu=1, random_seed=5)
+    assert res['exposure'] == 3
+
+    psi, _ = lazyc.simulate_batch([0.7, 0.])
+    psi = psi[0]
+    X, Z = np.array([[0, 1], [1, 0]]), np.diag([1, -1])
+    pz = 2*q*(1-q)
+    expected = ((1-q)*(1-pz) + q*(1-pz)*abs(psi.conj() @ X @ psi)**2
+                + (1-q)*pz*abs(psi.conj() @ Z @ psi)**2 + q*pz*abs(psi.conj() @ X @ Z @ psi)**2)
+    low, high = res['fidelity_ci']
+    assert low - 0.01 < expected < high + 0.01
+    assert res['fidelity'] < 1
+
+
+def test_seeds_and_schedule():
+    """
+    The result does not depend on the number of processes, and the
+    preparation of all qubits at once is exposed longer than the lazy one
+    """
+    lazyc = _brickwork(2, 4)
+    one = simulate_noisy(lazyc, 0.02, 0.01, ntrajectory=64, batch=16, ncpu=1, random_seed=7)
+    two = simulate_noisy(lazyc, 0.02, 0.01, ntrajectory=64, batch=16, ncpu=2, random_seed=7)
+    assert one['fidelity'] == two['fidelity']
+
+    eager = simulate_noisy(lazyc, 0.02, 0.01, ntrajectory=64, batch=16, ncpu=1, random_seed=7, lazy=False)
+    assert eager['exposure'] > one['exposure']
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Measurement-calculus patterns, see Danos, Kashefi and Panangaden at:
+https://arxiv.org/abs/0704.1263
+
+implemented:
+
+    Pattern --- a command sequence N, E, M, X, Z encoded in flat arrays.
+                The signal domains are in CSR form (ptr, idx) over node indices.
+
+    compile_pattern --- open graph with flow plus angles to a pattern, with the
+                        standardization and signal-shifting passes. It reports
+                        the feed-forward depth before and after.
+
+    A measurement M_i^{a}[s, t] is done at angle (-1)^{s} a + t pi, where s and
+    t are the parities of the outcomes in the s- and t-domain.
+"""
+
+#standard libraries
+from math import pi
+
+#non-standard libraries
+import numpy as np
+from mbqc.qres import BatchedStateVector
+from mbqc.qres._stabilizer import pauli_index
+
+
+#command kinds
+N, E, M, X, Z = 0, 1, 2, 3, 4
+KINDS = 'NEMXZ'
+
+
+class Pattern:
+    """
+    Array-encoded measurement pattern. Command c has kind[c] in {N,E,M,X,Z},
+    acts on node[c] (and node2[c] for E), has angle[c] for M, and the domains
+    s_idx[s_ptr[c]:s_ptr[c+1]] and t_idx[t_ptr[c]:t_ptr[c+1]]. The domain of a
+    correction is its s-domain.
+    """
+    def __init__(self, nodes, inputs, outputs, commands):
+        """
+        param
+            :nodes: list(node), node labels, the arrays refer to their index
+            :inputs: iterable(int), indices of the input nodes
+            :outputs: iterable(int), indices of the output nodes
+            :commands: list(tuple), (kind, node, node2, angle, sdomain, tdomain)
+                       with node indices and domains as iterables of indices
+        """
+        self.nodes = list(nodes)
+        self.inputs = np.array(sorted(inputs), dtype=np.int32)
+        self.outputs = np.array(sorted(outputs), dtype=np.int32)
+
+        ncmd = len(commands)
+        self.kind = np.array([c[0] for c in commands], dtype=np.uint8).reshape(ncmd)
+        self.node = np.array([c[1] for c in commands], dtype=np.int32).reshape(ncmd)
+        self.node2 = np.array([c[2] for c in commands], dtype=np.int32).reshape(ncmd)
+        self.angle = np.array([c[3] for c in commands], dtype=float).reshape(ncmd)
+        self.s_ptr, self.s_idx = _csr([c[4] for c in commands])
+        self.t_ptr, self.t_idx = _csr([c[5] for c in commands])
+
+
+    def __len__(self):
+        return len(self.kind)
+
+
+    def _tuples(self):
+        """ Commands as (kind, node, node2, angle, sdomain, tdomain)
+        """
+        return [(int(self.kind[c]), int(self.node[c]), int(self.node2[c]), float(self.angle[c]),
+                 set(self.s_idx[self.s_ptr[c]:self.s_ptr[c+1]].tolist()),
+                 set(self.t_idx[self.t_ptr[c]:self.t_ptr[c+1]].tolist()))
+                for c in range(len(self))]
+
+
+    def _new(self, commands):
+        return Pattern(self.nodes, self.inputs, self.outputs, commands)
+
+
+    def commands(self):
+        """
+        Return the readable command list with node labels, e.g.
+        ('N', 3), ('E', 1, 3), ('M', 1, 0.5, {..}, {..}), ('X', 3, {1})
+        """
+        res, lab = list(), self.nodes
+        for k, n, n2, a, sd, td in self._tuples():
+            if k == N :
+                res.append(('N', lab[n]))
+            elif k == E :
+                res.append(('E', lab[n], lab[n2]))
+            elif k == M :
+                res.append(('M', lab[n], a, set(lab[j] for j in sd), set(lab[j] for j in td)))
+            else :
+                res.append((KINDS[k], lab[n], set(lab[j] for j in sd)))
+        return res
+
+
+    def measurement_order(self):
+        """ Node labels in the order they are measured
+        """
+        return [self.nodes[n] for n in self.node[self.kind == M]]
+
+
+    def depth(self):
+        """
+        Feed-forward depth: the number of rounds of measurements, where a
+        measurement waits for every outcome in its s- and t-domain.
+
+        return
+            int
+        """
+        rounds = dict()
+        for c in np.flatnonzero(self.kind == M):
+            deps = np.concatenate([self.s_idx[self.s_ptr[c]:self.s_ptr[c+1]],
+                                   self.t_idx[self.t_ptr[c]:self.t_ptr[c+1]]])
+            rounds[int(self.node[c])] = 1 + max([rounds[int(j)] for j in deps], default=0)
+        return max(rounds.values(), default=0)
+
+
+    def standardize(self):
+        """
+        Return the standard form N E M C: preparations and entanglings first,
+        the corrections are pushed through E (X_i E_ij = E_ij X_i Z_j) and
+        absorbed into the domains of the measurements; only the corrections
+        of the outputs remain, at the end.
+        """
+        prep, ent, meas = list(), list(), list()
+        xdom = dict((n, set()) for n in range(len(self.nodes)))
+        zdom = dict((n, set()) for n in range(len(self.nodes)))
+        for cmd in self._tuples():
+            k, n, n2 = cmd[0], cmd[1], cmd[2]
+            if k == N :
+                prep.append(cmd)
+            elif k == E :
+                ent.append(cmd)
+                zdom[n2] ^= xdom[n]
+                zdom[n] ^= xdom[n2]
+            elif k == M :
+                meas.append((M, n, -1, cmd[3], cmd[4] ^ xdom[n], cmd[5] ^ zdom[n]))
+                xdom[n], zdom[n] = set(), set()
+            elif k == X :
+                xdom[n] ^= cmd[4]
+            else :
+                zdom[n] ^= cmd[4]
+
+        corr = list()
+        for n in self.outputs.tolist():
+            if xdom[n]:
+                corr.append((X, n, -1, np.nan, xdom[n], set()))
+        for n in self.outputs.tolist():
+            if zdom[n]:
+                corr.append((Z, n, -1, np.nan, zdom[n], set()))
+        return self._new(prep + ent + meas + corr)
+
+
+    def shift_signals(self, pauli=True):
+        """
+        Signal shifting: the t-domain t of M_i is removed, measuring at a
+        shifted angle a + t pi is measuring at a with the outcome flipped by t.
+        So the signal s_i is replaced with s_i + t in every later domain.
+
+        param
+            :pauli: bool, also simplify Pauli angles first, an X measurement
+                    (a = 0, pi) ignores its s-domain and for a Y measurement
+                    (a = +-pi/2) the s-domain is a t-domain.
+
+        return
+            Pattern
+        """
+        shift = dict()
+        def substitute(domain):
+            res = set()
+            for j in domain :
+                res ^= {j} ^ shift.get(j, set())
+            return res
+
+        commands = list()
+        for k, n, n2, a, sd, td in self._tuples():
+            if k == M :
+                sd, td = substitute(sd), substitute(td)
+                kp = pauli_index(a) if pauli else None
+                if kp is not None :
+                    td = td ^ sd if kp % 2 else td
+                    sd = set()
+                shift[n] = td
+                commands.append((M, n, n2, a, sd, set()))
+            elif k in (X, Z):
+                commands.append((k, n, n2, a, substitute(sd), set()))
+            else :
+                commands.append((k, n, n2, a, sd, td))
+        return self._new(commands)
+
+
+    def run(self, psi_in=None, rng=None):
+        """
+        Execute the pattern on a statevector, small patterns only.
+
+        param
+            :psi_in: numpy.ndarray (2**|I|,), ordered by the input indices
+            :rng: numpy.random.RandomState, the outcomes are sampled if given,
+                  otherwise 0 is postselected (before the domains are applied)
+
+        return
+            (numpy.ndarray (2**|O|,), dict{node:int}) : output state ordered by
+            the output indices, and the outcomes
+        """
+        reg = BatchedStateVector(1)
+        inputs = self.inputs.tolist()
+        if len(inputs):
+            psi_in = np.ones(2**len(inputs))/np.sqrt(2**len(inputs)) if psi_in is None else psi_in
+            reg.allocate_state(inputs, psi_in)
+
+        outcome = dict()
+        parity = lambda dom: sum(outcome[j] for j in dom) % 2
+        for k, n, n2, a, sd, td in self._tuples():
+            if k == N :
+                reg.allocate_plus(n)
+            elif k == E :
+                reg.cz(n, n2)
+            elif k == M :
+                angle = (-1)**parity(sd)*a + parity(td)*pi
+                outcome[n] = int(reg.measure(n, angle, rng)[0])
+            elif k == X :
+                reg.x_gate(n, bool(parity(sd)))
+            else :
+                reg.z_gate(n, bool(parity(sd)))
+
+        return reg.state(self.outputs.tolist())[0], dict((self.nodes[n], s) for n, s in outcome.items())
+
+
+    @classmethod
+    def from_flow(cls, G, I, O, f, phi, order):
+        """
+        The flow pattern, in the lazy form: before M_i only the qubits of A(i)
+        are prepared and entangled, then M_i, X_f(i)^{s_i} and
+        Z_k^{s_i} for k in N(f(i))-{i}. Since X_f(i) is corrected at once, a
+        Z correction is needed only where E_f(i)k has already been done.
+
+        param
+            :G: networkx.Graph
+            :I: set, input nodes
+            :O: set, output nodes
+            :f: dict{node:node}, the flow
+            :phi: dict{node:float}, the angles of the measured nodes
+            :order: list(node), a total order of all nodes consistent with f
+
+        return
+            Pattern
+        """
+        nodes = list(G.nodes)
+        idx = dict((n, i) for i, n in enumerate(nodes))
+        commands, alive, done = list(), set(I), set()
+
+        def allocate(new):
+            for a in new :
+                commands.append((N, idx[a], -1, np.nan, (), ()))
+                alive.add(a)
+            for a in new :
+                for b in G.neighbors(a):
+                    if b in alive and (b, a) not in done :
+                        commands.append((E, idx[a], idx[b], np.nan, (), ()))
+                        done.add((a, b))
+
+        for a, b in G.subgraph(I).edges :
+            commands.append((E, idx[a], idx[b], np.nan, (), ()))
+            done.add((a, b))
+        for node in order :
+            allocate([n for n in G.neighbors(node) if n not in alive] +
+                     ([node] if node not in alive else []))
+            if node in O :
+                continue
+            i = idx[node]
+            commands.append((M, i, -1, phi[node], (), ()))
+            commands.append((X, idx[f[node]], -1, np.nan, (i,), ()))
+            for k in G.neighbors(f[node]):
+                if k != node and k in alive :
+                    commands.append((Z, idx[k], -1, np.nan, (i,), ()))
+
+        return cls(nodes, [idx[n] for n in I], [idx[n] for n in O], commands)
+
+
+def compile_pattern(opengraph, phi, order=None, pauli=True):
+    """
+    Compile an open graph with flow and its angles into a standardized and
+    signal-shifted pattern.
+
+    param
+        :opengraph: OpenGraph, with the flow already found
+        :phi: dict{node:float}, angles of the measured nodes
+        :order: list(node), total order of the nodes, default the flow layers
+        :pauli: bool, simplify the domains of Pauli measurements
+
+    return
+        (Pattern, dict) : the pattern and {'depth_flow', 'depth_shifted',
+                          'ncommand'}
+    """
+    if order is None :
+        order = [n for k in sorted(opengraph.ordering_class)
+                   for n in sorted(opengraph.ordering_class[k], key=str)]
+    pattern = Pattern.from_flow(opengraph.G, opengraph.I, opengraph.O, opengraph.f, phi, order)
+    standard = pattern.standardize()
+    shifted = standard.shift_signals(pauli=pauli)
+    report = {'depth_flow': standard.depth(),
+              'depth_shifted': shifted.depth(),
+              'ncommand': len(shifted)}
+    return shifted, report
+
+
+def _csr(domains):
+    """ Sorted CSR arrays (ptr, idx) of a list of domains
+    """
+    lengths = [len(d) for d in domains]
+    ptr = np.zeros(len(domains)+1, dtype=np.int64)
+    ptr[1:] = np.cumsum(lengths)
+    idx = np.array([j for d in domains for j in sorted(d)], dtype=np.int32)
+    return ptr, idx
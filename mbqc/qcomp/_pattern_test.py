@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._pattern.py
+"""
+
+from math import pi
+import numpy as np
+
+from example_graphstates import graph_brickwork, graph_example_boqc
+from mbqc.qcomp import Lazy1WQC, Pattern
+from mbqc.qcomp._pattern import M, X, Z
+
+
+def _random_angles(G, O, seed):
+    """
+    Half Pauli angles, half arbitrary
+    """
+    rs = np.random.RandomState(seed)
+    return dict((n, rs.randint(4)*pi/2 if rs.rand() < 0.5 else rs.rand()*2*pi)
+                for n in G.nodes if n not in O)
+
+
+def test_passes_preserve_output():
+    """
+    The flow pattern, its standard form and its signal-shifted form give the
+    same output for any outcomes
+    """
+    for G, I, O in [graph_example_boqc(), graph_brickwork(3, 6)]:
+        phi = _random_angles(G, O, 1)
+        lazyc = Lazy1WQC(G, I, O, phi)
+        expected, _ = lazyc.simulate_batch([phi.get(n, 0.) for n in G.nodes])
+        order = [n for k in sorted(lazyc.ordering_class) for n in lazyc.ordering_class[k]]
+
+        wild = Pattern.from_flow(G, I, O, lazyc.f, phi, order)
+        standard = wild.standardize()
+        for pattern in [wild, standard, standard.shift_signals(), standard.shift_signals(False)]:
+            for seed in range(3):
+                psi, _ = pattern.run(rng=np.random.RandomState(seed))
+                assert np.isclose(abs(np.vdot(expected[0], psi)), 1)
+
+
+def test_standard_form():
+    """
+    N and E first, no t-domain after shifting, corrections only on outputs
+    """
+    G, I, O = graph_brickwork(3, 6)
+    lazyc = Lazy1WQC(G, I, O, _random_angles(G, O, 2))
+    pattern, report = lazyc.pattern()
+    kinds = pattern.kind.tolist()
+    assert kinds == sorted(kinds, key=lambda k: min(k, M))
+    assert len(pattern.t_idx) == 0
+    outputs = set(pattern.outputs.tolist())
+    assert set(pattern.node[(pattern.kind == X) | (pattern.kind == Z)].tolist()) <= outputs
+    assert report['depth_shifted'] <= report['depth_flow'] == len(lazyc.ordering_class)-1
+    assert report['depth_shifted'] == pattern.depth()
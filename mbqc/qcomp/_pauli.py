@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Removal of the Pauli-measured nodes of a pattern before it is simulated.
+
+implemented:
+
+    eliminate_pauli --- rewrite a Lazy1WQC into a smaller one on the nodes
+        that are not measured in a Pauli basis, with the same output up to a
+        phase gate diag(1, e^{i theta}) on some outputs.
+
+    The measurements of a pattern with flow are uniformly deterministic: the
+    branch where every outcome is 0 is the map of the pattern. In that branch
+    a Pauli-measured node a, which is neither an input nor an output, is
+    projected onto <+_phi(a)| right after its CZs, and the projection acts on
+    its neighbours as diagonal gates:
+
+        Y rule   : phi(a) = +-pi/2, the graph becomes tau_a(G) - a, i.e. the
+                   edges within N(a) are complemented, and every b in N(a)
+                   gets the phase gate P(+-pi/2)
+        pivot    : phi(a), phi(b) in {0, pi} on an edge ab, with
+                   A = N(a)-b and B = N(b)-a the graph becomes G - a - b
+                   with the edges between A and B toggled (pairs inside
+                   A & B twice, i.e. not at all), and Z on A & B, on B if
+                   phi(a) = pi and on A if phi(b) = pi. Two X-measured nodes
+                   in a wire are the identity removal.
+
+    A phase gate P(theta) before the measurement of a node is absorbed into
+    its angle, phi - theta, and on an output it is reported. A rewrite is kept
+    only if the new open graph has flow, so the reduced pattern is
+    deterministic with its own flow and byproducts, see PauliFrame.
+    X-measured nodes without an X-measured neighbour stay, the pivot would
+    move their neighbour out of the XY-plane.
+"""
+
+#standard libraries
+from math import pi
+
+#non-standard libraries
+import networkx as nx
+from mbqc.qres import flow
+from mbqc.qres._stabilizer import pauli_index
+
+
+def _y_rule(adj, a, k):
+    """
+    tau_a(G) - a
+
+    return
+        (dict, dict) : the new adjacency and the phase gate of the nodes
+    """
+    nbrs = adj[a]
+    new = dict((n, set(m)) for n, m in adj.items() if n != a)
+    for b in nbrs :
+        new[b].discard(a)
+        new[b] ^= nbrs - {b}
+    theta = pi/2 if k == 1 else -pi/2
+    return new, dict((b, theta) for b in nbrs)
+
+
+def _pivot(adj, a, b, ka, kb):
+    """
+    G - a - b with the pivot on ab
+
+    return
+        (dict, dict) : the new adjacency and the phase gate of the nodes
+    """
+    A, B = adj[a] - {b}, adj[b] - {a}
+    new = dict((n, set(m)) for n, m in adj.items() if n not in (a, b))
+    for c in A | B :
+        new[c] -= {a, b}
+    for c in A :
+        for d in B :
+            if c != d :
+                new[c] ^= {d}
+                new[d] ^= {c}
+    z = dict()
+    for c in A & B :
+        z[c] = z.get(c, 0) ^ 1
+    if ka == 2 :
+        for d in B :
+            z[d] = z.get(d, 0) ^ 1
+    if kb == 2 :
+        for c in A :
+            z[c] = z.get(c, 0) ^ 1
+    return new, dict((c, pi) for c, s in z.items() if s)
+
+
+def _graph(G, adj):
+    """ The networkx graph of adj, with the node order and data of G
+    """
+    H = nx.Graph()
+    H.add_nodes_from((n, dict((k, v) for k, v in d.items() if k not in ('ntypes', 'flow')))
+                     for n, d in G.nodes(data=True) if n in adj)
+    H.add_edges_from((u, v) for u in adj for v in adj[u])
+    return H
+
+
+def _bare(adj):
+    """ The networkx graph of adj, without node data, for flow()
+    """
+    H = nx.Graph()
+    H.add_nodes_from(adj)
+    H.add_edges_from((u, v) for u in adj for v in adj[u])
+    return H
+
+
+def eliminate_pauli(lazyc):
+    """
+    Remove the Pauli-measured nodes of a Lazy1WQC that are neither inputs
+    nor outputs, as far as the reduced open graph keeps a flow.
+
+    param
+        :lazyc: Lazy1WQC, with an angle for every measured node
+
+    return
+        (Lazy1WQC, dict) : the reduced computation, with the io types of
+        lazyc, and the report {'removed', 'rules', 'output_phase', 'nnode'};
+        'output_phase' {o: theta} holds the phase gates diag(1, e^{i theta})
+        that map the reduced output to the output of lazyc, 'rules' counts
+        the 'Y' and 'pivot' rewrites and those 'rejected' for lack of flow,
+        'nnode' is (before, after)
+    """
+    from mbqc.qcomp import Lazy1WQC
+
+    G, I, O = lazyc.G, lazyc.I, lazyc.O
+    adj = dict((n, set(G.neighbors(n))) for n in G.nodes)
+    phi = dict(lazyc.phi)
+    phase = dict((o, 0.) for o in O)
+    keep = I | O
+    removed, rules = list(), {'Y': 0, 'pivot': 0, 'rejected': 0}
+    order = dict((n, i) for i, n in enumerate(G.nodes))
+
+    def kind(n):
+        return None if n in keep or n not in phi else pauli_index(phi[n])
+
+    def trials(a, k):
+        #the rewrites of a, built one at a time and tried in the node order
+        if k in (1, 3):
+            yield 'Y', (a,), adj[a], lambda: _y_rule(adj, a, k)
+        elif k in (0, 2):
+            for b in sorted(adj[a], key=order.__getitem__):
+                kb = kind(b)
+                if kb in (0, 2):
+                    yield 'pivot', (a, b), (adj[a] | adj[b]) - {a, b}, lambda b=b, kb=kb: _pivot(adj, a, b, k, kb)
+
+    changed = True
+    while changed :
+        changed = False
+        for a in list(adj):
+            if a not in adj :
+                continue
+            for rule, gone, touched, rewrite in trials(a, kind(a)):
+                new, theta = rewrite()
+                #a flow maps every measured node to a neighbour that is not
+                #an input: only the touched nodes can lose theirs
+                if not all(n in O or new[n] - I for n in touched) or not flow(_bare(new), I, O)[0]:
+                    rules['rejected'] += 1
+                    continue
+                adj = new
+                for n, t in theta.items():
+                    if n in O :
+                        phase[n] = (phase[n] + t) % (2*pi)
+                    else :
+                        phi[n] = (phi[n] - t) % (2*pi)
+                for n in gone :
+                    phi.pop(n)
+                removed += gone
+                rules[rule] += 1
+                changed = True
+                break
+
+    reduced = Lazy1WQC(_graph(G, adj), set(I), set(O), dict((n, phi[n]) for n in adj if n in phi))
+    reduced.set_io_type(lazyc.I_type, lazyc.O_type)
+    report = {'removed': removed, 'rules': rules,
+              'output_phase': dict((o, t) for o, t in phase.items() if pauli_index(t) != 0),
+              'nnode': (G.number_of_nodes(), len(adj))}
+    return reduced, report
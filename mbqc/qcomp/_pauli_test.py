@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._pauli.py
+"""
+
+from math import pi
+import numpy as np
+
+from example_graphstates import graph_brickwork, graph_exact3grover, graph_example_boqc
+from mbqc.qcomp import Lazy1WQC, eliminate_pauli
+
+
+def _random_angles(G, O, seed, fraction=0.7):
+    rs = np.random.RandomState(seed)
+    return dict((n, rs.randint(4)*pi/2 if rs.rand() < fraction else rs.rand()*2*pi)
+                for n in G.nodes if n not in O)
+
+
+def _output(lazyc, psi_in, phase=dict(), outputs=None):
+    """ The output state ordered by outputs, with the phase gates applied
+    """
+    psi, order = lazyc.simulate_batch([lazyc.phi.get(n, 0.) for n in lazyc.G.nodes],
+                                      random_seed=1, psi_in=psi_in)
+    psi = psi[0].reshape([2]*len(order))
+    for o, theta in phase.items():
+        index = [slice(None)]*len(order)
+        index[order.index(o)] = 1
+        psi[tuple(index)] *= np.exp(1j*theta)
+    outputs = order if outputs is None else outputs
+    return np.transpose(psi, [order.index(o) for o in outputs]).ravel(), outputs
+
+
+def test_same_output():
+    """
+    The reduced computation with the output phases gives the output of the
+    original one, for a random input
+    """
+    for G, I, O in [graph_example_boqc(), graph_brickwork(3, 6), graph_exact3grover()]:
+        for seed in range(3):
+            lazyc = Lazy1WQC(G, I, O, _random_angles(G, O, seed))
+            reduced, report = eliminate_pauli(lazyc)
+            assert report['nnode'] == (G.number_of_nodes(), reduced.G.number_of_nodes())
+            assert set(report['removed']).isdisjoint(reduced.G.nodes)
+            assert not set(report['removed']) & (I | O)
+
+            rs = np.random.RandomState(seed)
+            psi_in = rs.randn(2**len(I)) + 1j*rs.randn(2**len(I))
+            psi_in /= np.linalg.norm(psi_in)
+            expected, outputs = _output(lazyc, psi_in)
+            psi, _ = _output(reduced, psi_in, report['output_phase'], outputs)
+            assert np.isclose(abs(np.vdot(expected, psi)), 1)
+
+
+def test_shrinks():
+    """
+    Without non-Pauli angles the grover graph shrinks to a few nodes, with
+    none nothing is removed
+    """
+    G, I, O = graph_exact3grover()
+    reduced, report = Lazy1WQC(G, I, O, _random_angles(G, O, 1, 1.)).eliminate_pauli()
+    assert report['nnode'][1] < report['nnode'][0]/4
+    assert report['rules']['Y'] > 0 and report['rules']['pivot'] > 0
+
+    reduced, report = Lazy1WQC(G, I, O, dict((n, 0.3) for n in G.nodes)).eliminate_pauli()
+    assert report['removed'] == [] and reduced.G.number_of_nodes() == G.number_of_nodes()
+    assert set(reduced.G.edges) == set(G.edges)
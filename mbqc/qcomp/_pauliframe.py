@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Pauli frame (byproduct) tracking for patterns with flow.
+
+implemented:
+
+    PauliFrame --- the X and Z byproducts of all nodes as packed uint64
+    bitsets. The outcome s_j = 1 of node j flips X on f(j) and Z on
+    N(f(j))-{j}; those flips are precomputed per node as a few (word, mask)
+    pairs, so recording an outcome is a handful of XORs and the corrected
+    angle (-1)^x phi + z pi of the next node is a bit lookup. Both are
+    independent of the size of the graph. A single frame is a list of Python
+    int words, which keeps the per-measurement path free of numpy overhead;
+    a batch of B independent frames is a (B, nword) uint64 array.
+"""
+
+#standard libraries
+from math import pi
+
+#non-standard libraries
+import numpy as np
+
+
+_WORD = 64
+
+
+class PauliFrame:
+    """
+    Byproduct frame of a pattern with flow f on graph G.
+    """
+    def __init__(self, G, f, phi=None, batch=1):
+        """
+        param
+            :G: networkx.Graph, the graph
+            :f: dict{node:node}, the flow
+            :phi: dict{node:float}, the angles, needed by angle()
+            :batch: int, the number of independent frames B
+        """
+        self.nodes = list(G.nodes)
+        self.index = dict((n, i) for i, n in enumerate(self.nodes))
+        self.batch = batch
+        self.nword = max(len(self.nodes)-1, 0)//_WORD + 1
+        phi = dict() if phi is None else phi
+        self.phi = np.array([phi.get(n, np.nan) for n in self.nodes], dtype=float)
+        self._phi = self.phi.tolist()
+
+        #propagation masks: whom the outcome of j flips
+        self._xprop = [tuple()]*len(self.nodes)
+        self._zprop = [tuple()]*len(self.nodes)
+        xdep = [list() for _ in self.nodes]
+        zdep = [list() for _ in self.nodes]
+        for j, fj in f.items():
+            jj = self.index[j]
+            ztargets = [self.index[k] for k in G.neighbors(fj) if k != j]
+            self._xprop[jj] = _masks([self.index[fj]])
+            self._zprop[jj] = _masks(ztargets)
+            xdep[self.index[fj]].append(jj)
+            for k in ztargets :
+                zdep[k].append(jj)
+
+        #dependency sets: whose outcomes flip the byproducts of i
+        self.x_ptr, self.x_dep = _csr(xdep)
+        self.z_ptr, self.z_dep = _csr(zdep)
+        self.reset()
+
+
+    def reset(self):
+        """ Clear the frame, no byproducts
+        """
+        if self.batch == 1 :
+            self.x, self.z = [0]*self.nword, [0]*self.nword
+        else :
+            self.x = np.zeros((self.batch, self.nword), dtype=np.uint64)
+            self.z = np.zeros((self.batch, self.nword), dtype=np.uint64)
+
+
+    def arrays(self):
+        """ The frame as two uint64 arrays (B, nword): (x, z)
+        """
+        if self.batch == 1 :
+            return (np.array([self.x], dtype=np.uint64), np.array([self.z], dtype=np.uint64))
+        return self.x, self.z
+
+
+    def dependencies(self, node):
+        """
+        The nodes whose outcomes decide the byproducts of node
+
+        return
+            (set, set) : (X dependencies, Z dependencies)
+        """
+        i = self.index[node]
+        return (set(self.nodes[j] for j in self.x_dep[self.x_ptr[i]:self.x_ptr[i+1]]),
+                set(self.nodes[j] for j in self.z_dep[self.z_ptr[i]:self.z_ptr[i+1]]))
+
+
+    def record(self, node, outcome):
+        """
+        Update the frame with the outcome of node
+
+        param
+            :node: node, the measured node
+            :outcome: int, or numpy.ndarray (B,) of int for a batch
+        """
+        i = self.index[node]
+        if self.batch == 1 :
+            if outcome :
+                x, z = self.x, self.z
+                for w, m in self._xprop[i]:
+                    x[w] ^= m
+                for w, m in self._zprop[i]:
+                    z[w] ^= m
+            return
+        flip = np.asarray(outcome).astype(bool)
+        for w, m in self._xprop[i]:
+            self.x[flip, w] ^= np.uint64(m)
+        for w, m in self._zprop[i]:
+            self.z[flip, w] ^= np.uint64(m)
+
+
+    def byproduct(self, node):
+        """
+        The byproduct X^x Z^z of node
+
+        return
+            (x, z) : int, or numpy.ndarray (B,) for a batch
+        """
+        i = self.index[node]
+        w, b = i//_WORD, i % _WORD
+        if self.batch == 1 :
+            return (self.x[w] >> b) & 1, (self.z[w] >> b) & 1
+        b = np.uint64(b)
+        return (((self.x[:, w] >> b) & np.uint64(1)).astype(np.int8),
+                ((self.z[:, w] >> b) & np.uint64(1)).astype(np.int8))
+
+
+    def angle(self, node, phi=None):
+        """
+        The corrected angle (-1)^x phi + z pi of node
+
+        param
+            :node: node
+            :phi: float or numpy.ndarray (B,), default the angle given at init
+
+        return
+            float, or numpy.ndarray (B,) for a batch
+        """
+        phi = self._phi[self.index[node]] if phi is None else phi
+        x, z = self.byproduct(node)
+        if self.batch == 1 :
+            return (-phi if x else phi) + z*pi
+        return np.where(x, -phi, phi) + z*pi
+
+
+def _masks(targets):
+    """ The bits of the targets grouped by word: ((word, mask), ..)
+    """
+    words = dict()
+    for t in targets :
+        words[t//_WORD] = words.get(t//_WORD, 0) | (1 << (t % _WORD))
+    return tuple(sorted(words.items()))
+
+
+def _csr(lists):
+    """ CSR arrays (ptr, idx) of a list of lists
+    """
+    ptr = np.zeros(len(lists)+1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(l) for l in lists])
+    idx = np.array([j for l in lists for j in l], dtype=np.int64)
+    return ptr, idx
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._pauliframe.py
+"""
+
+from math import pi
+import numpy as np
+
+from example_graphstates import graph_brickwork
+from mbqc.qres import OpenGraph
+from mbqc.qcomp import PauliFrame
+
+
+def test_frame_matches_dependency_parity():
+    """
+    The frame updated by XOR equals the parity of the outcomes over the
+    dependency sets, for a single frame and for a batch
+    """
+    G, I, O = graph_brickwork(4, 70)
+    og = OpenGraph(G, I, O)
+    order = [n for k in sorted(og.ordering_class) for n in og.ordering_class[k]]
+    rs = np.random.RandomState(0)
+    phi = dict((n, rs.rand()*2*pi) for n in G.nodes)
+    outcomes = rs.randint(2, size=(3, len(G)))
+
+    frames = [PauliFrame(G, og.f, phi) for _ in range(3)]
+    batch = PauliFrame(G, og.f, phi, batch=3)
+    for node in order :
+        i = batch.index[node]
+        xdep, zdep = frames[0].dependencies(node)
+        for b, frame in enumerate(frames):
+            x = sum(outcomes[b, batch.index[j]] for j in xdep) % 2
+            z = sum(outcomes[b, batch.index[j]] for j in zdep) % 2
+            assert frame.byproduct(node) == (x, z)
+            assert np.isclose(frame.angle(node), (-1)**x*phi[node] + z*pi)
+            assert np.isclose(batch.angle(node)[b], frame.angle(node))
+        if node not in O :
+            for b, frame in enumerate(frames):
+                frame.record(node, outcomes[b, i])
+            batch.record(node, outcomes[:, i])
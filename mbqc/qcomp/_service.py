@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Long-running local analysis service: the engines stay imported, requests are
+answered in micro-batches and repeated queries come from a result cache.
+
+implemented:
+
+    AnalysisService --- asyncio server on a local socket (unix or
+        127.0.0.1). The frames are those of mbqc.bqc._runtime, length-prefixed
+        JSON lists; a frame of requests is answered by one frame with the
+        responses in the same order:
+
+            request  {'id', 'op', 'nodes', 'edges', 'I', 'O', ...}
+            response {'id', 'ok', 'result', 'cached'} or {'id', 'ok', 'error'}
+
+        ops:
+            flow                  {'flow': bool, 'depth': int}, depth is the
+                                  number of flow layers, 0 without flow
+            bound_physical_qubit  {'lower', 'upper'} of
+                                  Lazy1WQC.bound_physical_qubit, with
+                                  'nsampling' (default 10), 'seeds' (default
+                                  1..nsampling), 'i_type' and 'o_type'
+            metrics               the counters, see AnalysisService.metrics
+
+        The requests wait in a queue and are taken in batches of up to
+        max_batch, or what arrived within max_delay seconds. In a batch, the
+        flow requests on the same graph go to flow_table in one call, and a
+        request equal to one already in flight waits for its result.
+
+        The cache is keyed by mbqc.lib.graph_key, a hash of the canonical
+        form of the labelled open graph (sorted nodes, edges, I and O), and
+        the op with its parameters, so the order of the nodes and edges of a
+        request does not matter. It is a LRU of cache_size entries.
+
+    AnalysisClient --- blocking client for scripts, request() and map(); map
+        sends its requests in one frame, so that they share batches.
+"""
+
+#standard libraries
+import asyncio
+import json
+import os
+import socket
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from time import perf_counter
+
+#non-standard libraries
+import networkx as nx
+import numpy as np
+from mbqc.lib import graph_key
+from mbqc.qres import flow_table
+from mbqc.bqc._runtime import _HEADER, read_frame, send_frame
+
+
+def _params(request):
+    """ The parameters of the op that the result depends on
+    """
+    op = request['op']
+    if op == 'flow':
+        return []
+    if op == 'bound_physical_qubit':
+        nsampling = int(request.get('nsampling', 10))
+        seeds = [int(s) for s in request.get('seeds', range(1, nsampling+1))]
+        return [nsampling, seeds, request.get('i_type', 'quantum'), request.get('o_type', 'quantum')]
+    raise ValueError('unknown op %r'%(op,))
+
+
+def _graph(request):
+    G = nx.Graph()
+    G.add_nodes_from(request['nodes'])
+    G.add_edges_from(request['edges'])
+    return G, set(request['I']), set(request['O'])
+
+
+def _compute(requests):
+    """
+    The results of a batch, in the worker thread
+
+    return
+        list(dict) : {'result': ...} or {'error': str}
+    """
+    from mbqc.qcomp import Lazy1WQC
+
+    results = [None]*len(requests)
+    groups = dict()         #graph key: rows of the flow requests
+    for row, req in enumerate(requests):
+        if req['op'] == 'flow':
+            groups.setdefault(graph_key(req['nodes'], req['edges']), []).append(row)
+
+    for rows in groups.values():
+        try :
+            G, _, _ = _graph(requests[rows[0]])
+            table = flow_table(G, [(set(requests[r]['I']), set(requests[r]['O'])) for r in rows])
+            for k, r in enumerate(rows):
+                results[r] = {'result': {'flow': bool(table.has_flow[k]), 'depth': int(table.depth[k])}}
+        except Exception as e :
+            for r in rows :
+                results[r] = {'error': '%s: %s'%(type(e).__name__, e)}
+
+    for row, req in enumerate(requests):
+        if results[row] is not None :
+            continue
+        try :
+            nsampling, seeds, i_type, o_type = _params(req)
+            lazyc = Lazy1WQC(*_graph(req), dict())
+            lazyc.set_io_type(i_type, o_type)
+            lower, upper = lazyc.bound_physical_qubit(nsampling, hash_number=seeds)
+            results[row] = {'result': {'lower': int(lower), 'upper': int(upper)}}
+        except Exception as e :
+            results[row] = {'error': '%s: %s'%(type(e).__name__, e)}
+    return results
+
+
+class AnalysisService:
+    """
+    Micro-batching analysis server with a result cache
+    """
+    def __init__(self, max_batch=64, max_delay=0.002, cache_size=100000, window=10000):
+        """
+        param
+            :max_batch: int, most requests computed together
+            :max_delay: float, seconds a batch waits for more requests
+            :cache_size: int, most cached results
+            :window: int, number of recent latencies in the percentiles
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.latency = deque(maxlen=window)
+        self.counts = {'request': 0, 'hit': 0, 'miss': 0, 'shared': 0, 'error': 0,
+                       'batch': 0, 'batched': 0, 'max_queue': 0}
+        self.queue = None
+        self.path = None
+        self._server = None
+        self._inflight = dict()
+        self._batcher = None
+        self._executor = ThreadPoolExecutor(1)
+
+
+    def metrics(self):
+        """
+        return
+            dict : the counters, 'queue' the current queue depth, 'max_queue'
+            its maximum, 'mean_batch' and the latency percentiles in seconds
+            'p50', 'p90', 'p99' over the last window requests
+        """
+        res = dict(self.counts)
+        res['queue'] = self.queue.qsize() if self.queue is not None else 0
+        res['cache'] = len(self.cache)
+        res['mean_batch'] = self.counts['batched']/self.counts['batch'] if self.counts['batch'] else 0.
+        lat = np.array(self.latency) if self.latency else np.zeros(1)
+        for p in (50, 90, 99):
+            res['p%i'%p] = float(np.percentile(lat, p))
+        return res
+
+
+    def _start_batcher(self):
+        if self._batcher is None :
+            self.queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._batches())
+
+
+    async def _batches(self):
+        loop = asyncio.get_running_loop()
+        while True :
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch :
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0 :
+                    break
+                try :
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError :
+                    break
+
+            self.counts['batch'] += 1
+            self.counts['batched'] += len(batch)
+            try :
+                results = await loop.run_in_executor(self._executor, _compute, [req for _, req, _ in batch])
+            except Exception as e :
+                results = [{'error': '%s: %s'%(type(e).__name__, e)}]*len(batch)
+            for (key, _, future), res in zip(batch, results):
+                if 'result' in res :
+                    self.cache[key] = res['result']
+                    if len(self.cache) > self.cache_size :
+                        self.cache.popitem(last=False)
+                del self._inflight[key]
+                future.set_result(res)
+
+
+    async def submit(self, request):
+        """
+        Answer one request, from the cache or through the queue
+
+        param
+            :request: dict, see the module documentation
+
+        return
+            dict : the response
+        """
+        t0 = perf_counter()
+        self._start_batcher()
+        self.counts['request'] += 1
+        rid = request.get('id')
+        if request.get('op') == 'metrics':
+            return {'id': rid, 'ok': True, 'result': self.metrics()}
+
+        try :
+            key = graph_key(request['nodes'], request['edges'], request['I'], request['O'])
+            key = json.dumps([request['op'], _params(request), key])
+        except (KeyError, TypeError, ValueError) as e :
+            self.counts['error'] += 1
+            return {'id': rid, 'ok': False, 'error': '%s: %s'%(type(e).__name__, e)}
+
+        cached = key in self.cache
+        if cached :
+            self.counts['hit'] += 1
+            self.cache.move_to_end(key)
+            res = {'result': self.cache[key]}
+        else :
+            self.counts['miss'] += 1
+            if key in self._inflight :
+                self.counts['shared'] += 1
+                future = self._inflight[key]
+            else :
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                self.queue.put_nowait((key, request, future))
+                self.counts['max_queue'] = max(self.counts['max_queue'], self.queue.qsize())
+            res = await future
+
+        self.latency.append(perf_counter()-t0)
+        if 'error' in res :
+            self.counts['error'] += 1
+            return {'id': rid, 'ok': False, 'error': res['error']}
+        return {'id': rid, 'ok': True, 'result': res['result'], 'cached': cached}
+
+
+    async def _handle(self, reader, writer):
+        try :
+            while True :
+                requests = await read_frame(reader)
+                if requests is None :
+                    break
+                await send_frame(writer, await asyncio.gather(*[self.submit(r) for r in requests]))
+        except ConnectionError :
+            pass
+        finally :
+            writer.close()
+
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """
+        Listen on a unix socket if path is given, else on host:port.
+
+        return
+            str or (host, port), the address to connect to
+        """
+        self._start_batcher()
+        if path is not None :
+            if os.path.exists(path):
+                os.unlink(path)
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+            self.path = path
+            return path
+        self._server = await asyncio.start_server(self._handle, host=host, port=port)
+        return self._server.sockets[0].getsockname()[:2]
+
+
+    async def serve(self, path=None, host='127.0.0.1', port=0):
+        """ start() and serve until cancelled
+        """
+        await self.start(path, host, port)
+        try :
+            await self._server.serve_forever()
+        finally :
+            await self.close()
+
+
+    async def close(self):
+        """ Stop listening and the batcher, remove the unix socket
+        """
+        if self._server is not None :
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._batcher is not None :
+            self._batcher.cancel()
+            try :
+                await self._batcher
+            except asyncio.CancelledError :
+                pass
+            self._batcher = None
+        self._executor.shutdown(wait=False)
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.path = None
+
+
+class AnalysisClient:
+    """
+    Blocking client of AnalysisService
+    """
+    def __init__(self, path=None, host='127.0.0.1', port=None, timeout=None):
+        """
+        param
+            :path: str, the unix socket, or
+            :host: str, with
+            :port: int
+            :timeout: float, seconds, None to wait forever
+        """
+        if path is not None :
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else :
+            self.sock = socket.create_connection((host, port))
+        self.sock.settimeout(timeout)
+        self._ids = count()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def close(self):
+        self.sock.close()
+
+
+    def _read(self, n):
+        data = bytearray()
+        while len(data) < n :
+            chunk = self.sock.recv(n - len(data))
+            if not chunk :
+                raise ConnectionError('the service closed the connection')
+            data += chunk
+        return bytes(data)
+
+
+    @staticmethod
+    def encode(op, G=None, I=(), O=(), **params):
+        """ The request of an open graph
+        """
+        req = {'op': op}
+        if G is not None :
+            req.update({'nodes': list(G.nodes), 'edges': [list(e) for e in G.edges],
+                        'I': list(I), 'O': list(O)})
+        req.update(params)
+        return req
+
+
+    def map(self, requests):
+        """
+        Send the requests in one frame and read the responses
+
+        param
+            :requests: iterable(dict), see encode
+
+        return
+            list(dict) : the responses in the order of the requests
+        """
+        data = json.dumps([dict(req, id=next(self._ids)) for req in requests]).encode()
+        self.sock.sendall(_HEADER.pack(len(data)) + data)
+        return json.loads(self._read(_HEADER.unpack(self._read(_HEADER.size))[0]))
+
+
+    def request(self, op, G=None, I=(), O=(), **params):
+        """
+        One request, e.g. request('flow', G, I, O)
+
+        return
+            dict : the result
+
+        raise
+            RuntimeError with the error of the service
+        """
+        res = self.map([self.encode(op, G, I, O, **params)])[0]
+        if not res['ok']:
+            raise RuntimeError(res['error'])
+        return res['result']
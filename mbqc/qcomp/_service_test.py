@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._service.py
+"""
+
+import asyncio
+import os
+import tempfile
+import networkx as nx
+
+from example_graphstates import graph_brickwork, graph_example_boqc
+from mbqc.qres import flow
+from mbqc.qcomp import AnalysisService, AnalysisClient, Lazy1WQC
+
+
+def _requests():
+    res = list()
+    for seed in range(6):
+        G = nx.gnp_random_graph(6, 0.5, seed=seed)
+        for I, O in [({0}, {5}), ({0, 1}, {4, 5}), (set(), {3, 4, 5})]:
+            res.append(AnalysisClient.encode('flow', G, I, O))
+    return res
+
+
+def test_submit():
+    """
+    The batched answers agree with flow() and Lazy1WQC, the repeats come
+    from the cache or share the computation in flight
+    """
+    async def run():
+        service = AnalysisService(max_batch=8, max_delay=0.01)
+        reqs = _requests()
+        first = await asyncio.gather(*[service.submit(r) for r in reqs + reqs])
+        second = await asyncio.gather(*[service.submit(r) for r in reqs])
+        G, I, O = graph_brickwork(2, 3)
+        bound = await service.submit(AnalysisClient.encode('bound_physical_qubit', G, I, O, nsampling=3))
+        bad = await service.submit({'op': 'nope', 'nodes': [0], 'edges': [], 'I': [], 'O': [0]})
+        await service.close()
+        return reqs, first, second, bound, bad, service.metrics()
+
+    reqs, first, second, bound, bad, metrics = asyncio.run(run())
+    for req, res in zip(reqs, first):
+        G = nx.Graph(req['edges'])
+        G.add_nodes_from(req['nodes'])
+        exists, _, poset = flow(G, set(req['I']), set(req['O']))
+        assert res['ok'] and res['result']['flow'] == bool(exists)
+        assert res['result']['depth'] == (len(poset) if exists else 0)
+    assert all(res['cached'] for res in second)
+    assert [r['result'] for r in second] == [r['result'] for r in first[:len(reqs)]]
+
+    G, I, O = graph_brickwork(2, 3)
+    assert bound['ok']
+    assert (bound['result']['lower'], bound['result']['upper']) == \
+        Lazy1WQC(G, I, O, dict()).bound_physical_qubit(3, hash_number=[1, 2, 3])
+    assert not bad['ok'] and 'unknown op' in bad['error']
+
+    n = len(reqs)
+    assert metrics['hit'] == n and metrics['shared'] == n and metrics['batched'] == n + 1
+    assert metrics['mean_batch'] > 1 and metrics['p99'] >= metrics['p50'] > 0
+
+
+def test_socket():
+    """ A client on the Unix socket, with map and request
+    """
+    async def run(path):
+        service = AnalysisService()
+        await service.start(path)
+        loop = asyncio.get_running_loop()
+
+        def client():
+            with AnalysisClient(path, timeout=30) as c :
+                G, I, O = graph_example_boqc()
+                return c.map(_requests()), c.request('flow', G, I, O), c.request('metrics')
+
+        res = await loop.run_in_executor(None, client)
+        await service.close()
+        return res
+
+    with tempfile.TemporaryDirectory() as tmp :
+        path = os.path.join(tmp, 'mbqc.sock')
+        responses, boqc, metrics = asyncio.run(run(path))
+        assert not os.path.exists(path)
+    assert all(r['ok'] for r in responses)
+    G, I, O = graph_example_boqc()
+    assert boqc == {'flow': True, 'depth': len(flow(G, I, O)[2])}
+    assert metrics['request'] == len(responses) + 2
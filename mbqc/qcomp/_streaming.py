@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Lazy 1WQC over a stream of graph fragments, in memory proportional to the
+window and not to the length of the computation.
+
+implemented:
+
+    StreamingLazy1WQC --- takes fragments {'nodes', 'edges', 'I', 'O', 'phi'}
+        from an iterable, e.g. mbqc.qres.brickwork_fragments. The edges of
+        a fragment may touch its own nodes and those of the window-1
+        fragments before it; a node is closed, i.e. its neighbourhood is
+        final, once window-1 more fragments have arrived.
+
+        The flow is fixed forward and greedily: the closed nodes are measured
+        in order of arrival, node i takes as f(i) its earliest unmeasured
+        neighbour k that is not an input, not the image of another node, and
+        whose neighbours other than i are all unmeasured. Every later node
+        comes after i, so f is a flow for the order of the measurements,
+        which is the total order. When no neighbour qualifies the greedy
+        choice fails, with FlowError, even if the graph may have a flow.
+
+        The events, in total order:
+
+            ('allocate', i, nodes)              A(i) of Lazy 1WQC, before i
+            ('measure', i, phi, f(i), xdeps, zdeps)
+            ('output', o, xdeps, zdeps)         a quantum output at the end
+
+        xdeps and zdeps are the earlier measurements that flip X and Z on
+        the node, as PauliFrame. A measured node is forgotten once all its
+        neighbours are measured.
+"""
+
+#standard libraries
+from collections import deque
+
+#non-standard libraries
+from mbqc.lib import FlowError
+
+
+class StreamingLazy1WQC:
+    """
+    Lazy 1WQC of a pattern that arrives fragment by fragment.
+    """
+    def __init__(self, window=2, input_type='quantum', output_type='quantum'):
+        """
+        param
+            :window: int, number of fragments the edges of a fragment may span
+            :input_type: str('quantum'|'classical'), as Lazy1WQC.set_io_type
+            :output_type: str('quantum'|'classical')
+        """
+        ioty = {'quantum', 'classical'}
+        if input_type not in ioty or output_type not in ioty :
+            raise ValueError('input and output type must be quantum or classical')
+        if window < 1 :
+            raise ValueError('window must be at least 1')
+        self.window = window
+        self.I_type = input_type
+        self.O_type = output_type
+
+
+    def _reset(self):
+        self.adj = dict()          #node: set of neighbours, the nodes in memory
+        self.fragment = dict()     #node: index of its fragment
+        self.arrival = dict()      #node: arrival number
+        self.inputs, self.outputs = set(), dict()
+        self.phi = dict()
+        self.allocated, self.measured = set(), set()
+        self.image = dict()        #f(j): j, for the images in memory
+        self.xdep, self.zdep = dict(), dict()
+        self.pending = deque()     #unmeasured non-output nodes, in arrival order
+        self.nnode, self.nmeasured = 0, 0
+        self.qalive, self.nqubit, self.max_memory = 0, 0, 0
+
+
+    def _add(self, index, frag):
+        """ Add a fragment, the edges update the Z dependencies of the images
+        """
+        inputs, outputs = set(frag.get('I', ())), set(frag.get('O', ()))
+        for node in frag['nodes']:
+            if node in self.adj :
+                raise ValueError('node %r arrives twice'%(node,))
+            self.adj[node] = set()
+            self.fragment[node] = index
+            self.arrival[node] = self.nnode
+            self.nnode += 1
+            if node in outputs :
+                self.outputs[node] = None
+            else :
+                self.pending.append(node)
+        self.inputs |= inputs
+        if self.I_type == 'quantum':
+            self.allocated |= inputs
+            self.qalive += len(inputs)
+        self.phi.update(frag.get('phi', dict()))
+
+        for a, b in frag['edges']:
+            for u in (a, b):
+                if u not in self.adj :
+                    raise ValueError('edge (%r, %r) to a forgotten node'%(a, b))
+                if u in self.measured or index - self.fragment[u] >= self.window :
+                    raise ValueError('edge (%r, %r) to a closed node'%(a, b))
+            self.adj[a].add(b)
+            self.adj[b].add(a)
+            for k, m in ((a, b), (b, a)):
+                if k in self.image :
+                    self.zdep.setdefault(m, []).append(self.image[k])
+
+
+    def _closed(self, node, index):
+        return index is None or index - self.fragment[node] >= self.window - 1
+
+
+    def _allocate(self, node):
+        new = [n for n in self.adj[node] | {node} if n not in self.allocated]
+        self.allocated.update(new)
+        self.qalive += len(new)
+        self.nqubit = max(self.nqubit, self.qalive)
+        return ('allocate', node, sorted(new, key=self.arrival.get))
+
+
+    def _measure(self, i):
+        """ Choose f(i) and measure i
+        """
+        measured = self.measured
+        candidates = [k for k in self.adj[i] if k not in measured and k not in self.inputs
+                      and k not in self.image and all(m == i or m not in measured for m in self.adj[k])]
+        if not candidates :
+            raise FlowError('the greedy forward flow fails at node %r'%(i,))
+        k = min(candidates, key=self.arrival.get)
+
+        events = [self._allocate(i)]
+        self.image[k] = i
+        self.xdep.setdefault(k, []).append(i)
+        for m in self.adj[k]:
+            if m != i :
+                self.zdep.setdefault(m, []).append(i)
+        events.append(('measure', i, self.phi.pop(i, None), k, self.xdep.pop(i, []), self.zdep.pop(i, [])))
+        measured.add(i)
+        self.qalive -= 1
+        self.nmeasured += 1
+        self._forget(self.adj[i] | {i})
+        return events
+
+
+    def _forget(self, nodes):
+        """ Drop the measured nodes whose neighbours are all measured
+        """
+        for n in list(nodes):
+            if n in self.measured and all(m in self.measured for m in self.adj[n]):
+                for m in self.adj[n]:
+                    self.adj[m].discard(n)
+                del self.adj[n], self.fragment[n], self.arrival[n]
+                self.measured.discard(n)
+                self.allocated.discard(n)
+                self.inputs.discard(n)
+                self.image.pop(n, None)
+
+
+    def _drain(self, index):
+        """ Measure the closed nodes at the head of the pending queue
+        """
+        events = list()
+        while self.pending and self._closed(self.pending[0], index):
+            events += self._measure(self.pending.popleft())
+        return events
+
+
+    def events(self, fragments):
+        """
+        The allocation and measurement events of the stream
+
+        param
+            :fragments: iterable(dict), with 'nodes' and 'edges', and
+                        optionally 'I', 'O' and 'phi'
+
+        return
+            generator(tuple)
+        """
+        self._reset()
+        for index, frag in enumerate(fragments):
+            self._add(index, frag)
+            self.max_memory = max(self.max_memory, len(self.adj))
+            yield from self._drain(index)
+
+        yield from self._drain(None)
+        for o in self.outputs :
+            yield self._allocate(o)
+            if self.O_type == 'classical':
+                self.measured.add(o)
+                self.qalive -= 1
+                self.nmeasured += 1
+                yield ('measure', o, self.phi.pop(o, None), None, self.xdep.pop(o, []), self.zdep.pop(o, []))
+            else :
+                yield ('output', o, self.xdep.pop(o, []), self.zdep.pop(o, []))
+
+
+    def run(self, fragments):
+        """
+        Consume the stream, count the events
+
+        return
+            dict{'nnode', 'nmeasured', 'nqubit', 'max_memory'} : nqubit is the
+            number of physical qubits of Lazy1WQC.count_physical_qubit,
+            max_memory the most nodes held at once
+        """
+        for _ in self.events(fragments):
+            pass
+        return {'nnode': self.nnode, 'nmeasured': self.nmeasured,
+                'nqubit': self.nqubit, 'max_memory': self.max_memory}
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qcomp._streaming.py
+"""
+
+from itertools import product
+
+import pytest
+
+from example_graphstates import graph_brickwork
+from mbqc.lib import FlowError
+from mbqc.qres import brickwork_fragments
+from mbqc.qres._flow_measurement import _criteria_f0, _criteria_f1, _criteria_f2
+from mbqc.qcomp import Lazy1WQC, PauliFrame, StreamingLazy1WQC
+
+
+def test_brickwork_against_lazy1wqc():
+    """
+    The stream of a brickwork gives a flow for its total order, and the
+    allocations, the qubit count and the dependencies of Lazy1WQC and
+    PauliFrame under that flow and order
+    """
+    H, W = 4, 11
+    G, I, O = graph_brickwork(H, W)
+    for i_type, o_type in product(['quantum', 'classical'], repeat=2):
+        stream = StreamingLazy1WQC(2, i_type, o_type)
+        events = list(stream.events(brickwork_fragments(H, W, phi=lambda n: n/10)))
+
+        order = [e[1] for e in events if e[0] != 'allocate']
+        assert sorted(order) == sorted(G.nodes)
+        f = dict((e[1], e[3]) for e in events if e[0] == 'measure' and e[3] is not None)
+        total = dict((n, t) for t, n in enumerate(order))
+        measured = set(G.nodes) - O
+        assert _criteria_f0(G, measured, f) and not I & set(f.values())
+        assert _criteria_f1(G, measured, f, total) and _criteria_f2(G, measured, f, total)
+
+        poset = dict((t+1, {n}) for t, n in enumerate(order[:len(measured)]))
+        poset[len(measured)+1] = set(O)
+        lazyc = Lazy1WQC(G, I, O, dict(), known_flow=(f, poset))
+        lazyc.set_io_type(i_type, o_type)
+        lazyc.set_total_order(total)
+        assert [(n, sorted(a)) for n, a in lazyc.allocation_schedule()] == \
+               [(e[1], sorted(e[2])) for e in events if e[0] == 'allocate']
+        assert lazyc.count_physical_qubit() == stream.nqubit
+
+        frame = PauliFrame(G, f, dict())
+        for e in events :
+            if e[0] == 'measure':
+                assert (sorted(e[4]), sorted(e[5])) == tuple(sorted(d) for d in frame.dependencies(e[1]))
+                assert e[2] == pytest.approx(e[1]/10)
+
+
+def test_memory_is_window():
+    """ The nodes held do not grow with the length of the stream
+    """
+    held = [StreamingLazy1WQC().run(brickwork_fragments(3, W))['max_memory'] for W in (10, 1000)]
+    assert held[0] == held[1] == 9
+    stats = StreamingLazy1WQC().run(brickwork_fragments(3, 1000))
+    assert stats['nnode'] == 3000 and stats['nmeasured'] == 2997
+
+
+def test_errors():
+    """ Edges to closed nodes and a failing greedy flow are reported
+    """
+    frags = [{'nodes': [0, 1], 'edges': [(0, 1)], 'I': [0]},
+             {'nodes': [2], 'edges': [(1, 2)]},
+             {'nodes': [3], 'edges': [(0, 3)], 'O': [3]}]
+    with pytest.raises(ValueError):
+        StreamingLazy1WQC(window=2).run(frags)
+
+    #a triangle has no flow: f(0) = 1, then 2 is a neighbour of the measured 0
+    frags = [{'nodes': [0, 1, 2], 'edges': [(0, 1), (1, 2), (0, 2)], 'I': [0], 'O': [2]}]
+    with pytest.raises(FlowError):
+        StreamingLazy1WQC(window=1).run(frags)
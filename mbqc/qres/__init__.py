@@ -1,3 +1,18 @@
-from ._flow_measurement import flow
-from ._opengraph import OpenGraph
-from ._graphstate import GraphState
+from mbqc.lib._lazyimport import lazy_exports
+
+#name: module, the modules are imported on first use of one of their names
+_exports = {'flow': '._flow_measurement', 'gflow': '._flow_measurement',
+            'flow_rounds': '._flow_measurement',
+            'flow_table': '._flowtable', 'FlowTable': '._flowtable',
+            'StabilizerTableau': '._stabilizer',
+            'BatchedStateVector': '._statevector',
+            'GraphTensorNetwork': '._tensornetwork',
+            'ArrayOpenGraph': '._generators', 'brickwork': '._generators',
+            'brickwork_fragments': '._generators', 'cluster': '._generators', 'chain': '._generators', 'grid': '._generators',
+            'GraphExecutor': '._executor',
+            'SharedGraphBatch': '._shared',
+            'OpenGraph': '._opengraph',
+            'GraphState': '._graphstate'}
+
+__all__ = list(_exports)
+__getattr__, __dir__ = lazy_exports(__name__, dict((k, (m, k)) for k, m in _exports.items()))
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+__doc__="""
+A worker pool for the brute-force search of open graphs with flow, kept alive
+across calls.
+
+implemented:
+
+    GraphExecutor --- the candidates of OpenGraph.generate_all are the edge
+        subsets of the complete graph on the nodes, an edge subset is the
+        integer bitmask over the edges in the order of
+        itertools.combinations(nodes, 2), the order of
+        networkx.complete_graph(nodes).edges. The workers get ranges of
+        bitmasks, not subsets, and return the bitmasks with flow.
+
+        The static context (nodes, I, O) travels with a range, never with a
+        candidate, and a worker prepares it once: the edge endpoints as node
+        indices, for the connectivity test on bitmasks. A graph object is
+        only built for the connected candidates, to run flow().
+"""
+
+#standard libraries
+from itertools import combinations
+from multiprocessing import Pool, cpu_count
+
+#non-standard libraries
+import networkx as nx
+import numpy as np
+from mbqc.lib import instrument
+from mbqc.qres import flow
+
+
+_context = {'key': None, 'prepared': None}     #the last context of this worker
+
+
+def _prepared(context):
+    """ The nodes, I, O, the edges and their endpoints as node indices
+    """
+    nodes, I, O = context
+    index = dict((n, i) for i, n in enumerate(nodes))
+    edges = list(combinations(nodes, 2))
+    ends = [(index[u], index[v]) for u, v in edges]
+    return nodes, set(I), set(O), edges, ends
+
+
+def _prepare(key, context):
+    if _context['key'] != key :
+        _context['key'], _context['prepared'] = key, _prepared(context)
+    return _context['prepared']
+
+
+def _connected(mask, ends, nnode):
+    """ Whether the edges of mask connect all nnode nodes
+    """
+    adj = [0]*nnode
+    bit = 0
+    while mask :
+        if mask & 1 :
+            u, v = ends[bit]
+            adj[u] |= 1 << v
+            adj[v] |= 1 << u
+        mask >>= 1
+        bit += 1
+    seen, front = 1, 1
+    while front :
+        nxt = 0
+        node = 0
+        while front :
+            if front & 1 :
+                nxt |= adj[node]
+            front >>= 1
+            node += 1
+        front = nxt & ~seen
+        seen |= front
+    return seen == (1 << nnode) - 1
+
+
+def _flow_range(key, context, lo, hi):
+    """
+    The bitmasks in [lo, hi) whose graph is connected and has flow, in a
+    worker
+
+    return
+        list(int)
+    """
+    return _search(_prepare(key, context), lo, hi)
+
+
+def _search(prepared, lo, hi):
+    """ The bitmasks in [lo, hi) with flow, on a context of _prepared
+    """
+    nodes, I, O, edges, ends = prepared
+    nnode = len(nodes)
+    found = list()
+    with instrument.timer('executor.flow_range'):
+        for mask in range(max(lo, 1), hi):
+            if not _connected(mask, ends, nnode):
+                instrument.count('executor.flow_range.disconnected')
+                continue
+            G = nx.Graph()
+            G.add_nodes_from(nodes)
+            G.add_edges_from(e for i, e in enumerate(edges) if mask >> i & 1)
+            if flow(G, I, O)[0]:
+                instrument.count('executor.flow_range.flow')
+                found.append(mask)
+    return found
+
+
+class GraphExecutor:
+    """
+    Persistent pool of workers for OpenGraph.generate_all, to share across
+    calls and close once.
+
+        with GraphExecutor(4) as ex :
+            for I, O in io_sets :
+                edges, masks = ex.flow_masks(nodes, I, O)
+    """
+    def __init__(self, ncpu=None, parallel=True):
+        """
+        param
+            :ncpu: int, number of workers, default cpu_count()
+            :parallel: bool, False runs the ranges in this process
+        """
+        self.ncpu = ncpu if ncpu else cpu_count()
+        self.parallel = parallel
+        self._pool = None
+        self._nkey = 0
+        self._local = None      #the context of flow_masks_range
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None :
+            self.close()
+        else :
+            self.terminate()
+
+
+    @property
+    def pool(self):
+        if self._pool is None :
+            self._pool = Pool(self.ncpu)
+        return self._pool
+
+
+    def close(self):
+        """ Let the workers finish and stop them
+        """
+        if self._pool is not None :
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+    def terminate(self):
+        """ Stop the workers now
+        """
+        if self._pool is not None :
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+    def tasks(self, nodes, I, O, chunksize=None):
+        """
+        The edges of the complete graph and the ranges of bitmasks for the
+        workers, the arguments of _flow_range
+
+        return
+            (list(tuple), list(tuple))
+        """
+        nodes = list(nodes)
+        edges = list(combinations(nodes, 2))
+        ncandidate = 1 << len(edges)
+        if chunksize is None :
+            chunksize = max(1, -(-ncandidate // (8*self.ncpu)))
+        self._nkey += 1
+        key = (id(self), self._nkey)
+        context = (nodes, set(I), set(O))
+        return edges, [(key, context, lo, min(lo+chunksize, ncandidate))
+                       for lo in range(0, ncandidate, chunksize)]
+
+
+    def flow_masks(self, nodes, I, O, chunksize=None):
+        """
+        The connected graphs with flow on nodes, as edge bitmasks
+
+        param
+            :nodes: list(int, str), the complete list of nodes
+            :I: set
+            :O: set
+            :chunksize: int, bitmasks per range, default about 8 ranges per
+                        worker
+
+        return
+            (list(tuple), numpy.ndarray(uint64) | list(int)) : the edges and
+            the bitmasks in increasing order, a list of int for more than 64
+            edges
+        """
+        edges, ranges = self.tasks(nodes, I, O, chunksize)
+        if self.parallel :
+            found = instrument.starmap(self.pool, _flow_range, ranges, chunksize=1)
+        else :
+            found = [_flow_range(*r) for r in ranges]
+        found = [m for part in found for m in part]
+        if len(edges) <= 64 :
+            found = np.array(found, dtype=np.uint64)
+        return edges, found
+
+
+    def flow_masks_range(self, nodes, I, O, lo, hi):
+        """
+        The bitmasks in [lo, hi) whose graph is connected and has flow, run
+        in this process as a worker runs a range; the context is prepared
+        once for consecutive calls on the same nodes, I and O
+
+        param
+            :nodes: list(int, str), the complete list of nodes
+            :I: set
+            :O: set
+            :lo: int, the first bitmask
+            :hi: int, after the last bitmask
+
+        return
+            list(int)
+        """
+        context = (list(nodes), set(I), set(O))
+        if self._local is None or self._local[0] != context :
+            self._local = (context, _prepared(context))
+        return _search(self._local[1], lo, hi)
+
+
+    @staticmethod
+    def decode(nodes, edges, masks):
+        """
+        The graphs of the bitmasks
+
+        return
+            generator(networkx.Graph)
+        """
+        for mask in masks :
+            mask = int(mask)
+            G = nx.Graph()
+            G.add_nodes_from(nodes)
+            G.add_edges_from(e for i, e in enumerate(edges) if mask >> i & 1)
+            yield G
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qres._executor.py
+"""
+
+import networkx as nx
+
+from mbqc.lib import instrument
+from mbqc.qres import OpenGraph, GraphExecutor
+
+
+def _reference(nodes, I, O):
+    """ The edge sets of _try_graph over the power set, in its order
+    """
+    G = nx.complete_graph(nodes)
+    res = list()
+    for edges in OpenGraph.get_power_set(G.edges):
+        graph = OpenGraph._try_graph(edges, G.nodes, I, O)
+        if graph :
+            res.append(sorted(tuple(sorted(e)) for e in graph.edges))
+    return res
+
+
+def test_generate_all():
+    """
+    generate_all returns the graphs with flow of the brute force, in the
+    same order, from a pool, in process, and on a shared executor, and a
+    single range in process finds the same bitmasks
+    """
+    nodes, I, O = list(range(5)), {0}, {3, 4}
+    ref = _reference(nodes, I, O)
+
+    graphs = OpenGraph.generate_all(nodes, I, O, ncpu=2)
+    assert [sorted(tuple(sorted(e)) for e in G.edges) for G, _, _ in graphs] == ref
+    assert all(set(G.nodes) == set(nodes) and gI == I and gO == O for G, gI, gO in graphs)
+
+    edges, masks = OpenGraph.generate_all(nodes, I, O, parallel=False, masks=True)
+    assert masks.dtype.name == 'uint64' and len(masks) == len(ref)
+    with GraphExecutor(2) as ex :
+        for io in [({0}, {3, 4}), ({0, 1}, {4}), ({0}, {3, 4})]:
+            _, shared = ex.flow_masks(nodes, *io)
+            assert [sorted(G.edges) for G in ex.decode(nodes, edges, shared)] == _reference(nodes, *io)
+        pool = ex.pool
+        part = ex.flow_masks_range(nodes, I, O, 100, 600)
+        assert part == [int(m) for m in masks if 100 <= m < 600]
+    assert ex._pool is None and pool._state != 'RUN'
+
+
+def test_counters():
+    """ The worker counters are merged into the caller
+    """
+    instrument.enable()
+    instrument.reset()
+    try :
+        with GraphExecutor(2) as ex :
+            _, masks = ex.flow_masks(range(4), {0}, {3})
+        counters = instrument.snapshot()['counters']
+        assert counters['executor.flow_range.flow'] == len(masks)
+        assert counters['executor.flow_range.disconnected'] > 0
+        assert 'opengraph._try_graph.flow' not in counters
+    finally :
+        instrument.disable()
+        instrument.reset()
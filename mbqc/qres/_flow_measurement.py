@@ -8,19 +8,23 @@ implemented:
     flow --- casual flow defined by Danos and Kashefi at:
     https://arxiv.org/abs/quant-ph/0506062
 
-future, maybe:
-    gflow --- generalized version of flow
+    gflow --- generalized flow (XY-plane), found by the maximally delayed
+    algorithm of Mhalla and Perdrix, arXiv:0709.2670
+
+    flow_rounds --- layers of parallel measurements and the critical
+    path of the dependencies induced by a flow or a gflow
 
 """
 
 #standard libraries
 
-
 #non-standard libraries
-from mbqc.lib import FlowError
+import numpy as np
+from mbqc.lib import FlowError, instrument
 
 
 
+@instrument.timed('flow')
 def flow(G, I, O):
     """Find flow by Mehdi Mhalla @ arXiv:0709.2670
     :G: nx.Graph(), the graph
@@ -77,22 +81,23 @@ def _flowaux(G, In, Out, C, k, g, l, Vs):
     :k:  int
     :Vs: dict
     """
-    V, Out2, C2 = set(G.nodes), set(), set()
-    for v in C :
-        u = set(G.neighbors(v)).intersection(V-Out)
-        if len(u)==1:
-            g[list(u)[0]] = v
-            l[v] = k
-            Out2 = Out2.union(u)
-            C2 = C2.union({v})
-    Vs[k]=Out2
-    if len(Out2)==0 :
-        if len(Out.intersection(V))== len(V):
-            return True
-        else :
-            return False
-    else :
-        return _flowaux(G,In,Out.union(Out2),(C-C2).union(Out2.intersection(V)-In),k+1,g,l,Vs)
+    Out, C = set(Out), set(C)
+    while True :
+        Out2, C2 = set(), set()
+        for v in C :
+            u = [w for w in G.neighbors(v) if w not in Out]
+            if len(u)==1:
+                g[u[0]] = v
+                l[v] = k
+                Out2.add(u[0])
+                C2.add(v)
+        Vs[k]=Out2
+        instrument.count('flow.rounds')
+        if len(Out2)==0 :
+            return len(Out) == G.number_of_nodes()
+        Out |= Out2
+        C = (C-C2).union(Out2-In)
+        k += 1
 
 
 def _criteria_f0(G, v_aux, f):
@@ -140,6 +145,152 @@ def _criteria_f2(G, v_aux, f, ordering):
     return True
 
 
+@instrument.timed('gflow')
+def gflow(G, I, O):
+    """Find a maximally delayed gflow by Mhalla and Perdrix @ arXiv:0709.2670.
+    At every round, each unsolved node u looks for K in the solved nodes
+    (minus inputs) such that Odd(K) meets the unsolved nodes exactly at u.
+    The linear systems of a round are solved together over GF(2), with the
+    rows of the adjacency as integer bitsets.
+
+    :G: nx.Graph(), the graph
+    :I: iter, the list of input nodes
+    :O: iter, the list of output nodes
+
+    :return:
+        (is_gflow_exist, g, Vs_sorted)
+
+    g defines the gflow map {node: set(nodes)}
+    Vs_sorted defines partial order classes, as in flow()
+    """
+    nodes = list(G.nodes)
+    idx = dict((n, i) for i, n in enumerate(nodes))
+    adj = [0]*len(nodes)
+    for a, b in G.edges :
+        adj[idx[a]] |= 1 << idx[b]
+        adj[idx[b]] |= 1 << idx[a]
+    inputs = set(idx[n] for n in I)
+
+    solved, g, Vs = set(idx[n] for n in O), dict(), dict()
+    k = 1
+    while len(solved) < len(nodes):
+        rows = [r for r in range(len(nodes)) if r not in solved]
+        cols = [c for c in solved if c not in inputs]
+        found = _solve_round(adj, rows, cols)
+        if not found :
+            break
+        for u, K in found.items():
+            g[nodes[u]] = set(nodes[c] for c in K)
+        Vs[k] = set(nodes[u] for u in found)
+        solved.update(found)
+        k += 1
+
+    is_gflow_exist = len(solved) == len(nodes)
+    Vs_sorted = dict((j, Vs[len(Vs)+1-j]) for j in range(1, len(Vs)+1))
+    Vs_sorted[len(Vs)+1] = set(O)
+    return (is_gflow_exist, g, Vs_sorted)
+
+
+def _solve_round(adj, rows, cols):
+    """ Solve A K = e_u over GF(2) for every u in rows at once, where
+    A[r][c] = adj(r,c). Gaussian elimination of [A | identity], the rows are
+    bitsets over cols with the row operations tracked as bitsets over rows.
+
+    :adj: list(int), adjacency bitsets
+    :rows: list(int), unsolved nodes
+    :cols: list(int), candidate nodes for K
 
+    :return:
+        dict{u: list(cols)} for every solvable u
+    """
+    colbit = dict((c, j) for j, c in enumerate(cols))
+    a = list()
+    for r in rows :
+        bits = 0
+        for c in cols :
+            if (adj[r] >> c) & 1 :
+                bits |= 1 << colbit[c]
+        a.append(bits)
+    track = [1 << i for i in range(len(rows))]
+
+    pivots, top = list(), 0
+    for j in range(len(cols)):
+        p = next((i for i in range(top, len(rows)) if (a[i] >> j) & 1), None)
+        if p is None :
+            continue
+        a[top], a[p] = a[p], a[top]
+        track[top], track[p] = track[p], track[top]
+        for i in range(len(rows)):
+            if i != top and (a[i] >> j) & 1 :
+                a[i] ^= a[top]
+                track[i] ^= track[top]
+        pivots.append(j)
+        top += 1
+
+    #e_u is consistent iff no zero row of A uses row u
+    inconsistent = 0
+    for i in range(top, len(rows)):
+        inconsistent |= track[i]
+
+    found = dict()
+    for ui, u in enumerate(rows):
+        if (inconsistent >> ui) & 1 :
+            continue
+        found[u] = [cols[pivots[i]] for i in range(top) if (track[i] >> ui) & 1]
+    return found
+
+
+def flow_rounds(G, O, g, ordering_class):
+    """
+    The measurement rounds of a (g)flow as arrays and its critical path.
+    Node i must wait for j when j is corrected by the outcome of i, i.e. j in
+    g(i) or j in Odd(g(i)), j != i.
 
+    :G: nx.Graph(), the graph
+    :O: iter, the list of output nodes
+    :g: dict{node: node or set}, the flow or the gflow
+    :ordering_class: dict{int: set}, partial order classes of the (g)flow
 
+    :return:
+        dict with
+        'round': numpy.ndarray(int), round of every node in list(G.nodes),
+                 the unmeasured outputs have round 0
+        'rounds': list(numpy.ndarray), node indices measured in each round
+        'depth': int, number of rounds
+        'critical_path': list(node), a longest chain of dependencies
+    """
+    nodes = list(G.nodes)
+    idx = dict((n, i) for i, n in enumerate(nodes))
+    rnd = np.zeros(len(nodes), dtype=np.int64)
+    k = 0
+    for key in sorted(ordering_class):
+        measured = [idx[n] for n in ordering_class[key] if n not in O]
+        if measured :
+            k += 1
+            rnd[measured] = k
+    rounds = [np.flatnonzero(rnd == j) for j in range(1, k+1)]
+
+    #longest chain in the dependency dag, nodes visited by round
+    succ = dict()
+    for i, gi in g.items():
+        K = gi if isinstance(gi, (set, frozenset)) else {gi}
+        odd = set()
+        for c in K :
+            odd ^= set(G.neighbors(c))
+        succ[i] = [j for j in (set(K) | odd) - {i} if j not in O]
+
+    length, nxt = dict(), dict()
+    for r in reversed(rounds):
+        for i in r.tolist():
+            node = nodes[i]
+            best = max(succ.get(node, []), key=lambda j: length[j], default=None)
+            length[node] = 1 + (length[best] if best is not None else 0)
+            nxt[node] = best
+
+    path = list()
+    node = max(length, key=lambda n: length[n], default=None)
+    while node is not None :
+        path.append(node)
+        node = nxt[node]
+
+    return {'round': rnd, 'rounds': rounds, 'depth': k, 'critical_path': path}
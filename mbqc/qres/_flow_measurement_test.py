@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qres._flow_measurement.py
+"""
+
+import random
+import networkx as nx
+
+from example_graphstates import graph_brickwork, graph_exact3grover
+from mbqc.qres import OpenGraph, flow, gflow
+
+
+def _check_gflow(G, I, O, g, layers):
+    """
+    The gflow conditions with the order given by the layers
+    """
+    layer = dict((n, k) for k, nset in layers.items() for n in nset)
+    for i, K in g.items():
+        odd = set()
+        for c in K :
+            odd ^= set(G.neighbors(c))
+        assert i not in O and i in odd and not K & I
+        for j in (K | odd) - {i}:
+            assert layer[j] > layer[i]
+
+
+def test_gflow_random_graphs():
+    """
+    Every graph with flow has a gflow, and the gflow found is valid
+    """
+    rs = random.Random(3)
+    for seed in range(400):
+        n = rs.randint(3, 8)
+        G = nx.gnp_random_graph(n, rs.random(), seed=seed)
+        if not nx.is_connected(G):
+            continue
+        I = set(rs.sample(list(G), rs.randint(1, n-1)))
+        O = set(rs.sample(list(G), rs.randint(1, n-1)))
+        has_gflow, g, layers = gflow(G, I, O)
+        if flow(G, I, O)[0]:
+            assert has_gflow
+        if has_gflow :
+            _check_gflow(G, I, O, g, layers)
+
+
+def test_measurement_rounds():
+    """
+    The critical path is as long as the number of rounds
+    """
+    for G, I, O in [graph_brickwork(3, 9), graph_exact3grover()]:
+        og = OpenGraph(G, I, O)
+        for kind in ['flow', 'gflow']:
+            res = og.measurement_rounds(kind)
+            assert len(res['critical_path']) == res['depth'] == len(res['rounds'])
+            assert sum(len(r) for r in res['rounds']) == len(G) - len(O)
+        assert og.measurement_rounds('gflow')['depth'] <= og.measurement_rounds('flow')['depth']
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Which input and output sets give a flow on a fixed graph.
+
+implemented:
+
+    flow_table --- the flow and its depth for many (I, O) on one graph G,
+        either a list of pairs or all pairs of sizes (n_I, n_O). The depth is
+        the number of partial order classes of flow(), i.e.
+        len(OpenGraph.ordering_class).
+
+    FlowTable --- the compact result: the I and O of every pair as bitmasks
+        over the nodes, whether it has flow and the depth.
+
+    The adjacency is built once as integer bitmasks and the search of
+    flow() runs on them. Monotonicity prunes most searches:
+
+        a flow of (I, O) is a flow of (I', O') for I' <= I and O' >= O,
+        since the conditions on f only get weaker, and a flow maps V-O into
+        V-I injectively, so |I| <= |O|.
+
+    For every output set the maximally delayed flow f0 of (empty, O) is
+    searched once. No f0 means no flow for any I. When I avoids the image of
+    f0, f0 is a flow of (I, O) and its depth is the minimum depth of
+    (I, O), since no flow of (I, O) can be shallower than the optimum of
+    (empty, O). Only the other pairs are searched, and an output set inside a
+    failed one is not searched at all.
+"""
+
+#standard libraries
+from itertools import combinations
+
+#non-standard libraries
+import numpy as np
+from mbqc.lib import instrument
+
+
+def _bits(mask):
+    """ The indices of the set bits of mask
+    """
+    res = list()
+    while mask :
+        low = mask & -mask
+        res.append(low.bit_length()-1)
+        mask ^= low
+    return res
+
+
+def _search(adj, full, I, O):
+    """
+    flow() on bitmasks
+
+    param
+        :adj: list(int), the neighbours of every node as a bitmask
+        :full: int, the mask of all nodes
+        :I: int, input mask
+        :O: int, output mask
+
+    return
+        (bool, int, int) : flow exists, depth and the image of f as a mask
+    """
+    out, C, image, k = O, O & ~I, 0, 1
+    while True :
+        out2, c2 = 0, 0
+        for v in _bits(C):
+            u = adj[v] & ~out
+            if u and not u & (u-1):
+                if not out2 & u :
+                    image |= 1 << v
+                out2 |= u
+                c2 |= 1 << v
+        if not out2 :
+            return out == full, k, image
+        out |= out2
+        C = (C & ~c2) | (out2 & ~I)
+        k += 1
+
+
+class FlowTable:
+    """
+    Flow of (I, O) pairs on one graph, the sets as bitmasks over nodes:
+    bit i is nodes[i].
+    """
+    def __init__(self, nodes, I, O, has_flow, depth, stats):
+        """
+        param
+            :nodes: list, the node of every bit
+            :I: numpy.ndarray(uint64) or list(int), input masks
+            :O: numpy.ndarray(uint64) or list(int), output masks
+            :has_flow: numpy.ndarray(bool)
+            :depth: numpy.ndarray(int16), 0 without flow
+            :stats: dict{str: int}, how every pair was decided
+        """
+        self.nodes = nodes
+        self.I, self.O = I, O
+        self.has_flow = has_flow
+        self.depth = depth
+        self.stats = stats
+
+
+    def __len__(self):
+        return len(self.has_flow)
+
+
+    def _set(self, mask):
+        return set(self.nodes[i] for i in _bits(int(mask)))
+
+
+    def pairs(self, with_flow=True):
+        """
+        The pairs with flow, or all of them
+
+        return
+            list((set, set, int)) : I, O and the depth
+        """
+        rows = np.flatnonzero(self.has_flow) if with_flow else range(len(self))
+        return [(self._set(self.I[r]), self._set(self.O[r]), int(self.depth[r])) for r in rows]
+
+
+@instrument.timed('flow_table')
+def flow_table(G, pairs=None, n_I=None, n_O=None, overlap=True):
+    """
+    Flow of every (I, O) pair on G.
+
+    param
+        :G: networkx.Graph
+        :pairs: iterable((set, set)), the pairs, or None for sizes
+        :n_I: int, with n_O, all inputs of n_I nodes and outputs of n_O nodes
+        :n_O: int
+        :overlap: bool, whether I and O may share nodes, with sizes only
+
+    return
+        FlowTable
+    """
+    nodes = list(G.nodes)
+    index = dict((n, i) for i, n in enumerate(nodes))
+    adj = [0]*len(nodes)
+    for u, v in G.edges :
+        adj[index[u]] |= 1 << index[v]
+        adj[index[v]] |= 1 << index[u]
+    full = (1 << len(nodes)) - 1
+
+    def mask(s):
+        m = 0
+        for n in s :
+            m |= 1 << index[n]
+        return m
+
+    if pairs is not None :
+        masks = [(mask(I), mask(O)) for I, O in pairs]
+    elif n_I is None or n_O is None :
+        raise ValueError('give pairs or both n_I and n_O')
+    else :
+        bit = [1 << i for i in range(len(nodes))]
+        outs = [sum(c) for c in combinations(bit, n_O)]
+        ins = [sum(c) for c in combinations(bit, n_I)]
+        masks = [(I, O) for O in outs for I in ins if overlap or not I & O]
+
+    stats = {'size': 0, 'output': 0, 'image': 0, 'search': 0}
+    base = dict()           #O: (exists, depth, image) of (empty, O)
+    failed = list()         #output masks without flow for I empty
+    has_flow = np.zeros(len(masks), dtype=bool)
+    depth = np.zeros(len(masks), dtype=np.int16)
+
+    for row, (I, O) in enumerate(masks):
+        if I.bit_count() > O.bit_count():
+            stats['size'] += 1
+            continue
+        if O not in base :
+            if any(not O & ~F for F in failed):
+                base[O] = (False, 0, 0)
+            else :
+                base[O] = _search(adj, full, 0, O)
+                if not base[O][0]:
+                    failed.append(O)
+        exists, d, image = base[O]
+        if not exists :
+            stats['output'] += 1
+        elif not I & image :
+            stats['image'] += 1
+            has_flow[row], depth[row] = True, d
+        else :
+            stats['search'] += 1
+            exists, d, _ = _search(adj, full, I, O)
+            has_flow[row], depth[row] = exists, d if exists else 0
+
+    if len(nodes) <= 64 :
+        Is = np.array([I for I, _ in masks], dtype=np.uint64)
+        Os = np.array([O for _, O in masks], dtype=np.uint64)
+    else :
+        Is, Os = [I for I, _ in masks], [O for _, O in masks]
+    return FlowTable(nodes, Is, Os, has_flow, depth, stats)
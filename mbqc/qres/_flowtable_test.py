@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qres._flowtable.py
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from example_graphstates import graph_example_boqc, graph_brickwork
+from mbqc.qres import flow, flow_table
+
+
+def _check(G, table):
+    """ Every pair against flow() one by one
+    """
+    for row, (I, O, depth) in enumerate(table.pairs(with_flow=False)):
+        exists, _, poset = flow(G, I, O)
+        assert bool(exists) == table.has_flow[row]
+        if exists :
+            assert depth == len(poset)
+
+
+def test_sizes():
+    """
+    All pairs of given sizes on random graphs and examples agree with
+    flow(), including the depth; the pruning leaves few searches
+    """
+    for seed in range(20):
+        G = nx.gnp_random_graph(6, 0.4, seed=seed)
+        for n_I, n_O in [(1, 1), (1, 2), (2, 2), (3, 2)]:
+            _check(G, flow_table(G, n_I=n_I, n_O=n_O))
+
+    G, _, _ = graph_brickwork(2, 4)
+    table = flow_table(G, n_I=2, n_O=2, overlap=False)
+    _check(G, table)
+    assert len(table) == 28*15
+    assert sum(table.stats.values()) == len(table)
+    assert table.stats['search'] < len(table)/4
+    assert ({0, 1}, {6, 7}, 4) in table.pairs()
+
+
+def test_pairs():
+    """ A list of pairs keeps its order and its own sizes
+    """
+    G, I, O = graph_example_boqc()
+    pairs = [(I, O), (O, I), (set(), O), (I, set(G.nodes))]
+    table = flow_table(G, pairs)
+    assert table.I.dtype == np.uint64
+    assert [(a, b) for a, b, _ in table.pairs(with_flow=False)] == pairs
+    _check(G, table)
+    assert table.has_flow[0]
+
+    with pytest.raises(ValueError):
+        flow_table(G, n_I=1)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Array-native open graphs with a known flow.
+
+implemented:
+
+    ArrayOpenGraph --- an open graph on the nodes 0..n-1 in CSR form
+    (indptr, indices), with the inputs, the outputs, the flow f (-1 for the
+    outputs) and the layer of every node as arrays. The layers follow the
+    keys of OpenGraph.ordering_class: 1 for the first measured nodes, the
+    outputs last.
+
+    brickwork(H, W) --- the brickwork of example_graphstates.graph_brickwork,
+                        with the same node numbering h + w*H.
+    grid(shape)     --- the lattice of any dimension, the flow goes along the
+                        last axis; cluster(H, W) is the 2D cluster state and
+                        chain(n) the 1D one. Node (h, .., w) has the number
+                        of numpy.ravel_multi_index(order='F').
+
+    brickwork_fragments(H, W) --- the same brickwork as a stream of columns,
+                        W may be None for an endless stream.
+
+    The generators compute the neighbours of every node per lattice direction
+    and pack them into CSR, without a loop over nodes and without a flow
+    search.
+"""
+
+#standard libraries
+
+#non-standard libraries
+import numpy as np
+
+
+class ArrayOpenGraph:
+    """
+    Open graph in compact array form, with its flow attached.
+    """
+    def __init__(self, indptr, indices, inputs, outputs, f, layer):
+        """
+        param
+            :indptr: numpy.ndarray (n+1,), CSR row pointers
+            :indices: numpy.ndarray, CSR neighbours, both directions of every edge
+            :inputs: numpy.ndarray, input nodes
+            :outputs: numpy.ndarray, output nodes
+            :f: numpy.ndarray (n,), the flow, -1 for the outputs
+            :layer: numpy.ndarray (n,), the partial order class of every node
+        """
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.nnode = len(self.indptr) - 1
+        self.inputs = np.sort(np.asarray(inputs, dtype=np.int64))
+        self.outputs = np.sort(np.asarray(outputs, dtype=np.int64))
+        self.f = np.asarray(f, dtype=np.int64)
+        self.layer = np.asarray(layer, dtype=np.int64)
+
+
+    def __len__(self):
+        return self.nnode
+
+
+    def neighbors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node+1]]
+
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+
+    def edges(self):
+        """ The edges as an array (m, 2) with a < b
+        """
+        src = np.repeat(np.arange(self.nnode), self.degree())
+        keep = src < self.indices
+        return np.stack([src[keep], self.indices[keep]], axis=1)
+
+
+    def ordering_class(self):
+        """ The layers as in OpenGraph.ordering_class, dict{int: set}
+        """
+        order = np.argsort(self.layer, kind='stable')
+        keys, start = np.unique(self.layer[order], return_index=True)
+        parts = np.split(order, start[1:])
+        return dict((int(k), set(p.tolist())) for k, p in zip(keys, parts))
+
+
+    def rounds(self):
+        """ The measured nodes of every layer, list(numpy.ndarray)
+        """
+        measured = np.flatnonzero(self.f >= 0)
+        order = measured[np.argsort(self.layer[measured], kind='stable')]
+        _, start = np.unique(self.layer[order], return_index=True)
+        return np.split(order, start[1:])
+
+
+    def dependencies(self):
+        """
+        The CSR of the outcomes that flip the byproducts of every node, the
+        same as PauliFrame.x_ptr, x_dep and z_ptr, z_dep: the outcome of j
+        flips X on f(j) and Z on N(f(j))-{j}.
+
+        return
+            ((x_ptr, x_dep), (z_ptr, z_dep))
+        """
+        j = np.flatnonzero(self.f >= 0)
+        fj = self.f[j]
+        x = _csr_from_pairs(fj, j, self.nnode)
+
+        deg = self.indptr[fj+1] - self.indptr[fj]
+        src = np.repeat(j, deg)
+        start = np.repeat(self.indptr[fj] - (np.cumsum(deg) - deg), deg)
+        tgt = self.indices[np.arange(deg.sum()) + start]
+        keep = tgt != src
+        return x, _csr_from_pairs(tgt[keep], src[keep], self.nnode)
+
+
+    def check_flow(self):
+        """
+        Whether f is a flow for the layers: i ~ f(i), i is in an earlier layer
+        than f(i), and than every neighbour of f(i) except i. The inputs are
+        not in the image of f.
+
+        return
+            bool
+        """
+        j = np.flatnonzero(self.f >= 0)
+        if len(j) + len(self.outputs) != self.nnode or np.isin(self.f[j], self.inputs).any():
+            return False
+        row = np.repeat(np.arange(self.nnode), self.degree())
+        hit = row[self.indices == self.f[row]]
+        if len(np.unique(hit)) != len(j) or (self.layer[j] >= self.layer[self.f[j]]).any():
+            return False
+        _, (z_ptr, z_dep) = self.dependencies()
+        tgt = np.repeat(np.arange(self.nnode), np.diff(z_ptr))
+        return bool((self.layer[z_dep] < self.layer[tgt]).all())
+
+
+    def to_networkx(self):
+        """
+        The networkx graph, its adjacency built from the edges in one pass,
+        every edge with one attribute dict for both directions as
+        networkx.Graph.add_edge does
+
+        return
+            (networkx.Graph, set, set) : G with the nodes 0..n-1, I and O
+        """
+        import gc
+        import networkx as nx
+
+        #millions of small dicts, the cyclic collector would scan them all
+        enabled = gc.isenabled()
+        gc.disable()
+        try :
+            adj = [dict() for _ in range(self.nnode)]
+            for u, v in self.edges().tolist():
+                adj[u][v] = adj[v][u] = {}
+            G = nx.Graph()
+            G._node = dict((n, dict()) for n in range(self.nnode))
+            G._adj = dict(enumerate(adj))
+        finally :
+            if enabled :
+                gc.enable()
+        return G, set(self.inputs.tolist()), set(self.outputs.tolist())
+
+
+    def to_opengraph(self, cls=None, *args, check_flow=False):
+        """
+        The OpenGraph (or a subclass) of this graph, with the known flow,
+        which is trusted unless check_flow
+
+        param
+            :cls: OpenGraph or a subclass, default OpenGraph
+            :args: the extra arguments of cls after G, I, O, e.g. phi
+            :check_flow: bool, ArrayOpenGraph.check_flow first, FlowError
+                         if it fails
+
+        return
+            cls
+        """
+        if cls is None :
+            from mbqc.qres import OpenGraph
+            cls = OpenGraph
+        if check_flow and not self.check_flow():
+            from mbqc.lib import FlowError
+            raise FlowError('the flow of the arrays is not a flow of the graph')
+        G, I, O = self.to_networkx()
+        j = np.flatnonzero(self.f >= 0)
+        f = dict(zip(j.tolist(), self.f[j].tolist()))
+        return cls(G, I, O, *args, known_flow=(f, self.ordering_class()))
+
+
+def _csr_from_pairs(row, col, n):
+    """ CSR (ptr, idx) of the pairs (row, col), col sorted within a row
+    """
+    order = np.lexsort((col, row))
+    ptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(row, minlength=n), out=ptr[1:])
+    return ptr, col[order].astype(np.int64)
+
+
+def _pack(neighbors):
+    """
+    CSR of the neighbour table (k, n), -1 for no neighbour, the neighbours of
+    a node in the order of the table rows
+    """
+    table = np.stack(neighbors, axis=1)
+    mask = table >= 0
+    indptr = np.zeros(table.shape[0]+1, dtype=np.int64)
+    np.cumsum(mask.sum(axis=1), out=indptr[1:])
+    return indptr, table[mask]
+
+
+def grid(shape):
+    """
+    The lattice of the given shape, the inputs are the nodes with last
+    coordinate 0 and the outputs those with last coordinate shape[-1]-1
+
+    param
+        :shape: tuple(int), e.g. (H, W) or (H, D, W)
+
+    return
+        ArrayOpenGraph
+    """
+    shape = tuple(int(s) for s in shape)
+    n = int(np.prod(shape))
+    coords = np.indices(shape).reshape(len(shape), -1, order='F')
+    node = np.arange(n, dtype=np.int64)
+    stride = np.cumprod((1,)+shape[:-1])
+
+    neighbors = list()
+    for axis, (s, st) in enumerate(zip(shape, stride)):
+        c = coords[axis]
+        neighbors.append(np.where(c > 0, node - st, -1))
+        neighbors.append(np.where(c < s-1, node + st, -1))
+    indptr, indices = _pack(neighbors)
+
+    w = coords[-1]
+    W, step = shape[-1], stride[-1]
+    f = np.where(w < W-1, node + step, -1)
+    return ArrayOpenGraph(indptr, indices, node[w == 0], node[w == W-1], f, w+1)
+
+
+def cluster(H, W):
+    """ The H x W cluster state, flow along the rows
+    """
+    return grid((H, W))
+
+
+def chain(n):
+    """ The 1D cluster state of n nodes
+    """
+    return grid((n,))
+
+
+def brickwork(H, W):
+    """
+    The brickwork state of example_graphstates.graph_brickwork(H, W): H rows,
+    W columns, node h + w*H
+
+    return
+        ArrayOpenGraph
+    """
+    n = H*W
+    node = np.arange(n, dtype=np.int64)
+    h, w = node % H, node // H
+
+    #vertical edges (h, h+1) in the even columns 2, 4, ..
+    m = w % 8
+    top = ((w % 2 == 0) & (w > 0) & (h < H-1) &
+           ((((m == 2) | (m == 4)) & (h % 2 == 0)) | (((m == 6) | (m == 0)) & (h % 2 == 1))))
+    bottom = np.zeros(n, dtype=bool)
+    bottom[1:] = top[:-1]
+
+    neighbors = [np.where(w > 0, node - H, -1),
+                 np.where(bottom, node - 1, -1),
+                 np.where(top, node + 1, -1),
+                 np.where(w < W-1, node + H, -1)]
+    indptr, indices = _pack(neighbors)
+
+    f = np.where(w < W-1, node + H, -1)
+    return ArrayOpenGraph(indptr, indices, node[w == 0], node[w == W-1], f, w+1)
+
+
+def brickwork_fragments(H, W=None, phi=None):
+    """
+    The brickwork of brickwork(H, W) column by column, for
+    mbqc.qcomp.StreamingLazy1WQC with window 2: the edges of a column touch
+    that column and the previous one.
+
+    param
+        :H: int, number of rows
+        :W: int, number of columns, None for an endless stream
+        :phi: callable(node) -> float, the angle of a node, default none
+
+    return
+        generator(dict{'nodes', 'edges', 'I', 'O', 'phi'})
+    """
+    w = 0
+    while W is None or w < W :
+        nodes = list(range(w*H, (w+1)*H))
+        edges = [(n - H, n) for n in nodes] if w > 0 else []
+        m = w % 8
+        if w % 2 == 0 and w > 0 :
+            parity = 0 if m in (2, 4) else 1
+            edges += [(h + w*H, h + 1 + w*H) for h in range(parity, H-1, 2)]
+        yield {'nodes': nodes, 'edges': edges,
+               'I': nodes if w == 0 else [],
+               'O': nodes if W is not None and w == W-1 else [],
+               'phi': dict((n, phi(n)) for n in nodes) if phi is not None else dict()}
+        w += 1
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qres._generators.py
+"""
+
+import numpy as np
+import networkx as nx
+import pytest
+
+from example_graphstates import graph_brickwork
+from mbqc.lib import FlowError
+from mbqc.qres import OpenGraph, brickwork, cluster, chain, grid
+from mbqc.qcomp import PauliFrame, Lazy1WQC
+
+
+def test_brickwork_matches_networkx():
+    """
+    Same graph, flow and layers as graph_brickwork with the flow search
+    """
+    for H, W in [(1, 6), (3, 2), (4, 9), (5, 17)]:
+        ag = brickwork(H, W)
+        G, I, O = graph_brickwork(H, W)
+        G2, I2, O2 = ag.to_networkx()
+        assert set(map(frozenset, G.edges)) == set(map(frozenset, G2.edges))
+        assert (I, O) == (I2, O2)
+        og = OpenGraph(G, I, O)
+        assert og.ordering_class == ag.ordering_class()
+        assert og.f == dict((j, int(ag.f[j])) for j in range(len(ag)) if ag.f[j] >= 0)
+        assert ag.check_flow()
+
+
+def test_grids_have_flow():
+    """
+    The layers of the lattices are those found by the flow search, and the
+    dependency CSR is the one of PauliFrame
+    """
+    for ag in [chain(7), cluster(3, 5), grid((2, 3, 4))]:
+        assert ag.check_flow()
+        G, I, O = ag.to_networkx()
+        og = OpenGraph(G, I, O)
+        assert og.ordering_class == ag.ordering_class()
+
+        frame = PauliFrame(G, dict((j, int(ag.f[j])) for j in range(len(ag)) if ag.f[j] >= 0))
+        (x_ptr, x_dep), (z_ptr, z_dep) = ag.dependencies()
+        for i in range(len(ag)):
+            assert set(x_dep[x_ptr[i]:x_ptr[i+1]]) == set(frame.x_dep[frame.x_ptr[i]:frame.x_ptr[i+1]])
+            assert set(z_dep[z_ptr[i]:z_ptr[i+1]]) == set(frame.z_dep[frame.z_ptr[i]:frame.z_ptr[i+1]])
+
+
+def test_known_flow_skips_search():
+    """
+    A wrapped graph is usable without the flow search, a wrong flow is caught
+    """
+    ag = cluster(2, 4)
+    lazyc = ag.to_opengraph(Lazy1WQC, dict((n, 0.) for n in range(6)))
+    assert lazyc.f == dict((j, j+2) for j in range(6))
+    psi, _ = lazyc.simulate_batch(np.zeros(8))
+    assert np.isclose(np.linalg.norm(psi), 1)
+
+    G, I, O = ag.to_networkx()
+    assert G[0][2] is G[2][0] and nx.utils.edges_equal(G.edges, nx.Graph(ag.edges().tolist()).edges)
+    assert lazyc.G.nodes[0]['ntypes'] == {'input'} and lazyc.G.nodes[0]['flow'] == 2
+
+    ag.f[0] = 3
+    assert not ag.check_flow()
+    with pytest.raises(FlowError):
+        ag.to_opengraph(check_flow=True)
+
+    #the flow is trusted unless checked
+    f = dict((j, int(ag.f[j])) for j in range(6))
+    OpenGraph(G, I, O, known_flow=(f, ag.ordering_class()))
+    with pytest.raises(FlowError):
+        OpenGraph(G, I, O, known_flow=(f, ag.ordering_class()), check_flow=True)
+    f[0] = 2
+    assert OpenGraph(G, I, O, known_flow=(f, ag.ordering_class()), check_flow=True).f == f
@@ -18,7 +18,7 @@ __email__ = "cicagustiani@gmail.com"
 #standard libraries
 
 #non-standard libraries
-from mbqc.qres import OpenGraph
+from mbqc.qres import OpenGraph, StabilizerTableau
 
 
 class GraphState(OpenGraph):
@@ -26,7 +26,7 @@ class GraphState(OpenGraph):
     Create a graph state as a quantum resouce for 1WQC computation. Only
     parties with quantum computer has access to this; that guy is Bob.
     """
-    def __init__(self, G, I, O):
+    def __init__(self, G, I, O, known_flow=None, check_flow=False):
         """ Instantiation of the OpenGraph object. That is the resource of
         1WQC computations. Only works with a class of graphs that have flow.
         Everything here is classical. It is the parent of all classess here.
@@ -35,11 +35,14 @@ class GraphState(OpenGraph):
             :G: networkx.graph, an open simple graph
             :I: set, a set input nodes
             :O: set, a set of output nodes
+            :known_flow: (dict, dict), see OpenGraph
+            :check_flow: bool, see OpenGraph
 
         Methods related to graph state in QUANTUM sense
         """
-        super().__init__(G, I, O)
+        super().__init__(G, I, O, known_flow, check_flow)
         self.qreg = False
+        self.qmap = dict()
 
 
     def init_nodes_plus(self, nqubit):
@@ -73,3 +76,33 @@ class GraphState(OpenGraph):
         """
         pass
 
+
+    ## stabilizer backend, only for Pauli measurements
+    def init_stabilizer(self, nodes=None):
+        """
+        Initialize the graph state |G> on the given nodes as a stabilizer
+        tableau, directly from the adjacency. Set attributes qreg and
+        qmap {node: qubit}.
+
+        :nodes: iterable, the nodes to be initialized, default all nodes in G
+        """
+        nodes = self.G.nodes if nodes is None else nodes
+        self.qreg, self.qmap = StabilizerTableau.from_graph(self.G, nodes)
+
+
+    def measure_pauli(self, node, angle, rng=None):
+        """
+        Measure the qubit of a node in the XY-plane with a Pauli angle,
+        i.e. a multiple of pi/2. Requires init_stabilizer() first.
+
+        :node: node in G
+        :angle: float, the measurement angle
+        :rng: numpy.random.RandomState, source of the random outcomes
+
+        return
+            int, the outcome
+        """
+        if not isinstance(self.qreg, StabilizerTableau):
+            raise RuntimeError('no stabilizer register. Try method init_stabilizer()')
+        outcome, _ = self.qreg.measure_angle(self.qmap[node], angle, rng)
+        return outcome
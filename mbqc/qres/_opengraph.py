@@ -21,23 +21,27 @@ __email__ = "cicagustiani@gmail.com"
 
 #standard libraries
 import networkx as nx
-import pygraphviz as pgv
 import random
 import json
-from multiprocessing import Pool, cpu_count
 from itertools import product, combinations
+from multiprocessing import Pool, cpu_count
 from time import time
 
 #non-standard libraries
-from mbqc.lib import FlowError
-from mbqc.qres import flow
+from mbqc.lib import FlowError, instrument
+from mbqc.qres import flow, gflow, flow_rounds, GraphExecutor
+from mbqc.qres._flow_measurement import _criteria_f0, _criteria_f1, _criteria_f2
+
+#(input, output): ntypes
+_NTYPES = {(True, True): frozenset(['input', 'output']), (True, False): frozenset(['input']),
+           (False, True): frozenset(['output']), (False, False): frozenset(['aux'])}
 
 
 class OpenGraph:
     """
     Create an open-graph as a hypothetical resouce for 1WQC computation.
     """
-    def __init__(self, G, I, O):
+    def __init__(self, G, I, O, known_flow=None, check_flow=False):
         """ Instantiation of the OpenGraph object. That is the resource of
         1WQC computations. Only works with a class of graphs that have flow.
         Everything here is classical. It is the parent of all classess here.
@@ -47,6 +51,11 @@ class OpenGraph:
             :G: networkx.graph, an open simple graph
             :I: set, a set input nodes
             :O: set, a set of output nodes
+            :known_flow: (dict, dict), the flow f and its ordering_class when
+                         they are known, e.g. from ArrayOpenGraph; the flow
+                         search is skipped and the flow is trusted
+            :check_flow: bool, check known_flow against the flow criteria,
+                         FlowError if it fails
         """
         #input checking
         if not isinstance(G, nx.classes.graph.Graph):
@@ -69,46 +78,78 @@ class OpenGraph:
         self.ordering_class = False
         self.f = False
         self._set_nodetypes_()
-        self._set_flow_()
+        self._set_flow_(known_flow, check_flow)
 
     def __copy__(self):
         return OpenGraph(self.G, self.I, self.O)
 
     def _set_nodetypes_(self):
         """
-        Set attribute ntypes for every node: {input, output, aux(iliary)}
+        Set attribute ntypes for every node: {input, output, aux(iliary)},
+        one shared frozenset per kind of node
         """
-        types = dict([(n, list()) for n in self.G.nodes])
-        for i in self.I :
-            types[i] +=  ['input']
-
-        for i in self.O :
-            types[i] +=  ['output']
+        I, O = self.I, self.O
+        for node, data in self.G.nodes(data=True):
+            data['ntypes'] = _NTYPES[node in I, node in O]
 
-        for i in set(self.G.nodes)-self.I-self.O:
-            types[i] +=  ['aux']
-
-        #assign it to the nodes
-        for node in self.G.nodes:
-            self.G.add_node(node, ntypes = set(types[node]))
-
-    def _set_flow_(self):
+    def _set_flow_(self, known_flow=None, check_flow=False):
         """
         set flow by adding flow attribute to every node and
         set attribute partial_ordering to the graph
         """
-        f_exist, f, poset = flow(self.G, self.I, self.O)
+        if known_flow is None :
+            f_exist, f, poset = flow(self.G, self.I, self.O)
+        else :
+            f_exist, (f, poset) = True, known_flow
+            if check_flow :
+                f_exist = self._is_flow(f, poset)
 
         if not f_exist :
             raise FlowError('graph does not have a flow. Sorry, find another Graph')
 
-        for dom, cod in f.items():
-            self.G.add_node(dom, flow=cod)
+        for node, data in self.G.nodes(data=True):
+            if node in f :
+                data['flow'] = f[node]
 
         self.ordering_class = poset
         self.f = f
 
 
+    def _is_flow(self, f, poset):
+        """
+        Whether (f, poset) is a flow of the open graph: f is defined on the
+        non-outputs, never maps to an input, and meets the flow criteria of
+        mbqc.qres._flow_measurement with the classes of poset as ordering
+        """
+        ordering = dict((n, k) for k, part in poset.items() for n in part)
+        measured = set(self.G.nodes) - self.O
+        if set(f) != measured or set(ordering) != set(self.G.nodes) or self.I & set(f.values()):
+            return False
+        return (_criteria_f0(self.G, measured, f) and _criteria_f1(self.G, measured, f, ordering)
+                and _criteria_f2(self.G, measured, f, ordering))
+
+
+    def measurement_rounds(self, kind='flow'):
+        """
+        Rounds of parallel measurements of the maximally delayed flow or
+        gflow; both have the minimum depth among their kind. Every graph with
+        flow has a gflow, which may need fewer rounds.
+
+        param
+            :kind: str('flow'|'gflow')
+
+        return
+            dict{'round', 'rounds', 'depth', 'critical_path'}, see flow_rounds()
+        """
+        if kind == 'flow':
+            g, poset = self.f, self.ordering_class
+        elif kind == 'gflow':
+            _, g, poset = gflow(self.G, self.I, self.O)
+        else :
+            raise ValueError('kind must be flow or gflow')
+        return flow_rounds(self.G, self.O, g, poset)
+
+
 ## aesthetic-related methods
     def draw_graph(self, outfile='out.png', title='', **options):
         """
@@ -118,88 +159,161 @@ class OpenGraph:
         title : str, the title of the graph
         options : { flow : True,
                     total_order : False,
-                    partial_order : False
+                    partial_order : False,
+                    pos : False, place the nodes at positions() and skip the
+                          layout (neato -n2), for large graphs
                   }
         """
+        import pygraphviz as pgv
+
+        graphv = pgv.AGraph(self.to_dot(title, **options))
+        if options.get('pos'):
+            graphv.draw(outfile, prog='neato', args='-n2')
+        else :
+            graphv.layout(prog='dot')
+            graphv.draw(outfile)
+
+
+    def positions(self):
+        """
+        The positions of the nodes: the 'pos' attributes when every node has
+        one, as in example_graphstates, otherwise the partial order class
+        along x and the rank within the class along y
+
+        return
+            dict{node: (float, float)}
+        """
+        pos = dict(self.G.nodes(data='pos'))
+        if all(p is not None for p in pos.values()):
+            return pos
+        res = dict()
+        for x, k in enumerate(sorted(self.ordering_class)):
+            for y, n in enumerate(sorted(self.ordering_class[k], key=str)):
+                res[n] = (x, y)
+        return res
+
+
+    def to_dot(self, title='', **options):
+        """
+        The DOT string drawn by draw_graph, with the same options; with pos,
+        the nodes are pinned at positions() times scale (default 72 points)
+        """
         opt = {'flow': True, #done
                'total_order': False, #not yet
                'partial_order': False, #not yet
-               'color': True
+               'color': True,
+               'pos': False,
+               'scale': 72
                }
         for k,v in opt.items():
             if k in options :
                 opt[k] = options[k]
 
-        directed, undirected = list(), list(self.G.edges)
         if opt['flow']:
-            for dom, cod  in self.f.items():
-                try:
-                    idx = undirected.index((dom, cod))
-                except ValueError:
-                    idx = undirected.index((cod, dom))
-                directed += [(dom,cod)]
-                undirected[idx] = False
-
-            undirected = [edge for edge in undirected if edge]
+            directed = list(self.f.items())
+            fedges = set(directed) | set((b, a) for a, b in directed)
+            undirected = [edge for edge in self.G.edges if edge not in fedges]
         else :
-            undirected = self.G.edges #list
+            directed, undirected = [], self.G.edges
 
         ## creating a dot string
 
         # nodes part
-        snodes = list()
         shape = {'input': 'shape=diamond', 'output': 'shape=circle', 'aux':'shape=circle'}
         style = {'input': '', 'output':'style=filled fillcolor=gray', 'aux':''}
-        for n, attr in self.G.nodes.items() :
-            natt = ' '.join([shape[t] for t in attr['ntypes']])
-            natt += ' '+' '.join([style[t] for t in attr['ntypes']])
-            snodes+= ['%s [%s];'%(str(n),natt)  ]
+        natt = dict()
+        for n, types in self.G.nodes(data='ntypes'):
+            key = frozenset(types)
+            if key not in natt :
+                natt[key] = ' '.join([shape[t] for t in types]) + ' ' + ' '.join([style[t] for t in types])
+        if opt['pos']:
+            scale = opt['scale']
+            pos = self.positions()
+            snodes = ['%s [%s pos="%g,%g!"];'%(n, natt[frozenset(t)], scale*pos[n][0], scale*pos[n][1])
+                      for n, t in self.G.nodes(data='ntypes')]
+        else :
+            snodes = ['%s [%s];'%(n, natt[frozenset(t)]) for n, t in self.G.nodes(data='ntypes')]
 
         # edges part
-        sedges = list()
-        for a,b in undirected :
-            sedges += ['%s->%s [arrowhead=none];'%(str(a),str(b))]
-        if opt['flow'] :
-            for a,b in directed :
-                sedges += ['%s->%s;'%(str(a),str(b))]
+        sedges = ['%s->%s [arrowhead=none];'%(a, b) for a, b in undirected]
+        sedges += ['%s->%s;'%(a, b) for a, b in directed]
 
         #combine the strings
-        sdot = 'digraph{ labelloc="t"; label="%s";'%title+\
-               ''.join(snodes)+'rankdir=LR;'+''.join(sedges)+\
-               '{rank=same;'+ ';'.join(str(i) for i in self.I)+';}'+\
-               '{rank=same;'+ ';'.join(str(i) for i in self.O - self.I)+';}'+\
-               '}'
-        graphv = pgv.AGraph(sdot)
-        graphv.layout(prog='dot')
-        graphv.draw(outfile)
+        return ''.join(['digraph{ labelloc="t"; label="%s";'%title,
+                        ''.join(snodes), 'rankdir=LR;', ''.join(sedges),
+                        '{rank=same;', ';'.join(str(i) for i in self.I), ';}',
+                        '{rank=same;', ';'.join(str(i) for i in self.O - self.I), ';}',
+                        '}'])
+
+
+    @staticmethod
+    def _render(opengraph, outfile, title, options):
+        """ Worker of draw_graphs
+        """
+        if outfile.endswith('.dot'):
+            with open(outfile, 'w') as f :
+                f.write(opengraph.to_dot(title, **options))
+        else :
+            opengraph.draw_graph(outfile, title, **options)
+        return outfile
+
+
+    @classmethod
+    def draw_graphs(cls, opengraphs, outfiles, titles=None, ncpu=None, **options):
+        """
+        Draw many open graphs on a pool of processes
+
+        param
+            :opengraphs: list(OpenGraph)
+            :outfiles: list(str), a .dot file gets the DOT text, other
+                       extensions, e.g. .svg or .png, are drawn by graphviz
+            :titles: list(str)
+            :ncpu: int, default cpu_count()
+            :options: as draw_graph, e.g. pos=True for large graphs
+
+        return
+            list(str) : the files written
+        """
+        titles = titles if titles is not None else ['']*len(opengraphs)
+        args = [(og, out, title, options) for og, out, title in zip(opengraphs, outfiles, titles)]
+        if ncpu == 1 or len(args) < 2 :
+            return [cls._render(*a) for a in args]
+        with Pool(ncpu if ncpu else cpu_count()) as pool :
+            return pool.starmap(cls._render, args, chunksize=1)
 
 
 ## open graphs generation-related method
 
     @classmethod
-    def generate_all(cls, nodes, I, O, ncpu=False, parallel=True):
+    def generate_all(cls, nodes, I, O, ncpu=False, parallel=True, executor=None, masks=False):
         """
         Generate all possible open graphs. This does not consider isomorphism, since
         graph isomorphism is NP, while flow assessment is in P. Since this is a
-        brute-force approach, I recommend you to estimate the resources first.
+        brute-force approach, I recommend you to estimate the resources first,
+        with mbqc.qcomp.estimate_generate_all or estimate_resources.py.
         param
             :nodes: list(int, str), the complete list of nodes
             :I: set
             :O: set
             :ncpu: int
             :parallel: boolean
+            :executor: GraphExecutor, a pool to reuse across calls, by
+                       default a pool is opened and closed for this call
+            :masks: bool, return the edge bitmasks instead of the graphs
+        return
+            list((nx.Graph, set, set)), or (list(tuple), numpy.ndarray) the
+            edges and the bitmasks when masks, see GraphExecutor.flow_masks
         """
-        #initialization
-        G = nx.complete_graph(nodes)
-        nset = cls.get_power_set(G.nodes)
-
-        ncpu = ncpu if ncpu else cpu_count()
-        P = Pool(ncpu)
-        edges_pset = cls.get_power_set(G.edges)
+        nodes = list(nodes)
+        if executor is None :
+            with GraphExecutor(ncpu, parallel) as executor :
+                edges, found = executor.flow_masks(nodes, I, O)
+        else :
+            edges, found = executor.flow_masks(nodes, I, O)
 
-        p_args = [(edges,G.nodes, I,O) for edges in edges_pset]
-        results = P.starmap(cls._try_graph, p_args)
-        opengraphs = [(res, I, O) for res in results if res]
+        if masks :
+            return edges, found
+        return [(G, I, O) for G in GraphExecutor.decode(nodes, edges, found)]
 
 
     @classmethod
@@ -241,6 +355,7 @@ class OpenGraph:
 
 
     @staticmethod
+    @instrument.timed('opengraph._try_graph')
     def _try_graph(edges, nodes, I, O):
         """
         Try to obtain a graph with flow by removing edges of graph G
@@ -257,10 +372,12 @@ class OpenGraph:
         G.add_nodes_from(nodes)
 
         if not nx.is_connected(G):
+            instrument.count('opengraph._try_graph.disconnected')
             return False
         else :
             flow_exist, f, vs = flow(G,I,O)
             if flow_exist :
+                instrument.count('opengraph._try_graph.flow')
                 return G
             else :
                 return False
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qres._opengraph.py, the drawing part
+"""
+
+import re
+
+from example_graphstates import graph_example_boqc, graph_brickwork
+from mbqc.qres import OpenGraph
+
+
+def test_to_dot():
+    """
+    The flow edges are directed and the others not, each edge once; with
+    pos the nodes are pinned at the pos attributes, or at the partial order
+    classes when the graph has none
+    """
+    og = OpenGraph(*graph_brickwork(3, 6))
+    sdot = og.to_dot('title')
+    directed = set(re.findall(r'(\d+)->(\d+);', sdot))
+    undirected = set(re.findall(r'(\d+)->(\d+) \[arrowhead=none\];', sdot))
+    assert directed == set((str(a), str(b)) for a, b in og.f.items())
+    assert len(directed) + len(undirected) == og.G.number_of_edges()
+    assert 'pos=' not in sdot
+
+    pos = og.positions()
+    assert all(pos[n][0] == pos[og.f[n]][0] - 1 for n in og.f)
+    assert '4 [shape=circle  pos="72,72!"];' in og.to_dot(pos=True)
+
+    og = OpenGraph(*graph_example_boqc())
+    assert og.positions() == dict(og.G.nodes(data='pos'))
+    assert '3 [shape=circle  pos="10,15!"];' in og.to_dot(pos=True, scale=10)
+
+
+def test_draw_graphs(tmp_path):
+    """ The DOT files of a batch are those of to_dot
+    """
+    ogs = [OpenGraph(*graph_brickwork(2, w)) for w in (2, 3, 4)]
+    outs = [str(tmp_path/('g%i.dot'%i)) for i in range(3)]
+    assert OpenGraph.draw_graphs(ogs, outs, ['a', 'b', 'c'], ncpu=2, pos=True) == outs
+    for og, out, title in zip(ogs, outs, 'abc'):
+        with open(out) as f :
+            assert f.read() == og.to_dot(title, pos=True)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Batches of open graphs in shared memory, for workers that read them without
+a copy and write their results in place.
+
+implemented:
+
+    SharedGraphBatch --- the arrays of many open graphs, concatenated in one
+        multiprocessing.shared_memory segment:
+
+            indptr  : the CSR row pointers of graph k, n_k+1 of them, at
+                      node_ptr[k]+k
+            indices : the neighbours, local node numbers, at edge_ptr[k]
+            io      : 1 for an input, 2 for an output, 3 for both
+            f       : the flow, -1 for the outputs
+            layer   : the partial order class, see ArrayOpenGraph
+            order   : a total ordering, the nodes in the order of
+                      measurement
+            phi     : the angles, nan without one
+            results : one array (ngraph, *shape) per result, zeros
+
+        The handle, the name of the segment and the offsets of the arrays,
+        is all a worker gets; attach() maps the segment and graph(k) is an
+        ArrayOpenGraph on views of it. map() runs a function on every graph
+        in a process pool whose workers attach once.
+
+        The batch that created the segment owns it: close() unlinks it, as
+        does the exit of the with block, also after an exception, a
+        BrokenProcessPool of a crashed worker included, and the garbage
+        collection of the batch. A killed owner leaves the segment to the
+        resource tracker of multiprocessing, which unlinks it.
+"""
+
+#standard libraries
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count, shared_memory
+
+#non-standard libraries
+import numpy as np
+from mbqc.lib import FlowError
+from mbqc.qres import flow, ArrayOpenGraph
+
+
+_ALIGN = 64
+_worker = {'name': None, 'batch': None}     #the batch attached by this worker
+
+
+def _arrays(graph):
+    """
+    The arrays of one graph and its node labels
+
+    param
+        :graph: ArrayOpenGraph, OpenGraph (e.g. Lazy1WQC) or (G, I, O)
+
+    return
+        (list, dict) : the labels of the nodes 0..n-1 and the arrays
+    """
+    if isinstance(graph, ArrayOpenGraph):
+        io = np.zeros(graph.nnode, dtype=np.int8)
+        io[graph.inputs] |= 1
+        io[graph.outputs] |= 2
+        order = np.argsort(graph.layer, kind='stable')
+        return list(range(graph.nnode)), {'indptr': graph.indptr, 'indices': graph.indices, 'io': io,
+                                          'f': graph.f, 'layer': graph.layer, 'order': order,
+                                          'phi': np.full(graph.nnode, np.nan)}
+
+    if isinstance(graph, tuple):
+        G, I, O = graph
+        found, f, poset = flow(G, I, O)
+        if not found :
+            raise FlowError('graph does not have a flow. Sorry, find another Graph')
+        phi, total = dict(), False
+    else :
+        G, I, O, f, poset = graph.G, graph.I, graph.O, graph.f, graph.ordering_class
+        phi, total = getattr(graph, 'phi', dict()), getattr(graph, 'total_ordering', False)
+
+    labels = list(G.nodes)
+    index = dict((n, i) for i, n in enumerate(labels))
+    n = len(labels)
+    neighbors = [sorted(index[m] for m in G.neighbors(u)) for u in labels]
+    indptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum([len(m) for m in neighbors], out=indptr[1:])
+    io = np.array([(u in I) | (u in O) << 1 for u in labels], dtype=np.int8)
+    fa = np.array([index[f[u]] if u in f else -1 for u in labels], dtype=np.int64)
+    layer = np.zeros(n, dtype=np.int64)
+    for k, part in poset.items():
+        layer[[index[u] for u in part]] = k
+    order = [index[u] for u in total] if total else np.argsort(layer, kind='stable')
+    return labels, {'indptr': indptr, 'indices': [m for nb in neighbors for m in nb], 'io': io,
+                    'f': fa, 'layer': layer, 'order': order,
+                    'phi': [np.nan if phi.get(u) is None else phi[u] for u in labels]}
+
+
+_DTYPES = {'node_ptr': 'int64', 'edge_ptr': 'int64', 'indptr': 'int64', 'indices': 'int64',
+           'io': 'int8', 'f': 'int64', 'layer': 'int64', 'order': 'int64', 'phi': 'float64'}
+
+
+def _release(shm, owner):
+    """ Close the mapping, and unlink the segment if owner
+    """
+    try :
+        shm.close()
+    except BufferError :
+        pass        #views are still alive, the mapping goes with them
+    if owner :
+        try :
+            shm.unlink()
+        except FileNotFoundError :
+            pass
+
+
+def _attach_worker(handle):
+    if _worker['name'] != handle[0]:
+        if _worker['batch'] is not None :
+            _worker['batch'].close()
+        _worker['name'], _worker['batch'] = handle[0], SharedGraphBatch.attach(handle)
+
+
+def _run(handle, func, lo, hi, args):
+    """ func(batch, k, *args) for the graphs lo..hi-1, in a worker
+    """
+    _attach_worker(handle)
+    for k in range(lo, hi):
+        func(_worker['batch'], k, *args)
+    return hi - lo
+
+
+class SharedGraphBatch:
+    """
+    Open graphs and result arrays in a shared memory segment.
+
+        with SharedGraphBatch.create(graphs, results={'bound': ('int64', (2,))}) as batch :
+            batch.map(worker, ncpu=4)       #worker(batch, k) writes batch.result('bound')[k]
+            bounds = batch.result('bound').copy()
+    """
+    def __init__(self, handle, owner=False, labels=None):
+        """
+        Map the segment of handle, see create and attach
+
+        param
+            :handle: (str, dict), the name of the segment and the layout
+                     {key: (dtype, shape, offset)}
+            :owner: bool, whether close() unlinks the segment
+            :labels: list(list), the node labels of every graph, in the
+                     owner only
+        """
+        self.handle = handle
+        self.owner = owner
+        self.labels = labels
+        self._shm = shared_memory.SharedMemory(name=handle[0])
+        self._finalize = weakref.finalize(self, _release, self._shm, owner)
+        self._arrays = dict((key, np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset))
+                            for key, (dtype, shape, offset) in handle[1].items())
+        self.ngraph = len(self._arrays['node_ptr']) - 1
+
+
+    @classmethod
+    def create(cls, graphs, results=None):
+        """
+        A new segment with the graphs and zeroed result arrays
+
+        param
+            :graphs: iterable, of ArrayOpenGraph, OpenGraph (e.g. Lazy1WQC,
+                     whose phi and total ordering are kept) or (G, I, O)
+                     whose flow is searched
+            :results: dict{str: (dtype, tuple)}, the dtype and the shape of
+                      the result of one graph
+
+        return
+            SharedGraphBatch : the owner of the segment
+
+        raise
+            FlowError for a graph without flow
+        """
+        labels, parts = list(), list()
+        for graph in graphs :
+            lab, arr = _arrays(graph)
+            labels.append(lab)
+            parts.append(arr)
+        sizes = [len(lab) for lab in labels]
+        data = {'node_ptr': np.concatenate([[0], np.cumsum(sizes)]),
+                'edge_ptr': np.concatenate([[0], np.cumsum([len(p['indices']) for p in parts])])}
+        for key in ('indptr', 'indices', 'io', 'f', 'layer', 'order', 'phi'):
+            data[key] = np.concatenate([np.asarray(p[key], dtype=_DTYPES[key]) for p in parts]
+                                       if parts else [np.zeros(0, dtype=_DTYPES[key])])
+
+        layout, offset = dict(), 0
+        specs = [(key, _DTYPES[key], d.shape) for key, d in data.items()]
+        specs += [('result.'+name, np.dtype(dtype).name, (len(parts),)+tuple(shape))
+                  for name, (dtype, shape) in (results or dict()).items()]
+        for key, dtype, shape in specs :
+            layout[key] = (dtype, shape, offset)
+            nbytes = int(np.prod(shape, dtype=np.int64))*np.dtype(dtype).itemsize
+            offset += -(-nbytes//_ALIGN)*_ALIGN
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        try :
+            batch = cls((shm.name, layout), owner=True, labels=labels)
+        finally :
+            shm.close()
+        for key, d in data.items():
+            batch._arrays[key][...] = d
+        for name in (results or dict()):
+            batch._arrays['result.'+name][...] = 0
+        return batch
+
+
+    @classmethod
+    def attach(cls, handle):
+        """ The batch of handle, in a worker; close() does not unlink
+        """
+        return cls(handle)
+
+
+    def __len__(self):
+        return self.ngraph
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def close(self):
+        """ Drop the views and the mapping, and unlink the segment if owner
+        """
+        self._arrays = dict()
+        self._finalize()
+
+
+    @property
+    def closed(self):
+        return not self._finalize.alive
+
+
+    def _slice(self, key, k, extra=0):
+        """ The array key of graph k, a view
+        """
+        ptr = self._arrays['edge_ptr' if key == 'indices' else 'node_ptr']
+        shift = k if extra else 0
+        return self._arrays[key][ptr[k]+shift:ptr[k+1]+shift+extra]
+
+
+    def graph(self, k):
+        """
+        The open graph k, on the nodes 0..n-1; indptr, indices, f and layer
+        are views of the segment
+
+        return
+            ArrayOpenGraph
+        """
+        io = self._slice('io', k)
+        return ArrayOpenGraph(self._slice('indptr', k, 1), self._slice('indices', k),
+                              np.flatnonzero(io & 1), np.flatnonzero(io & 2),
+                              self._slice('f', k), self._slice('layer', k))
+
+
+    def order(self, k):
+        """ The total ordering of graph k, a view
+        """
+        return self._slice('order', k)
+
+
+    def phi(self, k):
+        """ The angles of graph k, a view, nan without angle
+        """
+        return self._slice('phi', k)
+
+
+    def result(self, name):
+        """ The result array name (ngraph, *shape), writable
+        """
+        return self._arrays['result.'+name]
+
+
+    def map(self, func, args=(), ncpu=None, chunksize=None):
+        """
+        func(batch, k, *args) for every graph k, in a pool of processes that
+        attach to the segment; func returns nothing, it writes the results
+
+        param
+            :func: a function of a module, picklable
+            :args: tuple, the same for every graph
+            :ncpu: int, default cpu_count(); 1 runs in this process
+            :chunksize: int, graphs per task, default about 4 tasks per
+                        worker
+
+        raise
+            concurrent.futures.process.BrokenProcessPool when a worker dies,
+            the segment is still unlinked by the owner
+        """
+        ncpu = ncpu if ncpu else cpu_count()
+        if ncpu == 1 or self.ngraph < 2 :
+            for k in range(self.ngraph):
+                func(self, k, *args)
+            return
+        if chunksize is None :
+            chunksize = max(1, -(-self.ngraph//(4*ncpu)))
+        with ProcessPoolExecutor(min(ncpu, self.ngraph)) as pool :
+            tasks = [pool.submit(_run, self.handle, func, lo, min(lo+chunksize, self.ngraph), args)
+                     for lo in range(0, self.ngraph, chunksize)]
+            for task in tasks :
+                task.result()
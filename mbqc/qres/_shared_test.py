@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qres._shared.py
+"""
+
+import os
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from example_graphstates import graph_brickwork, graph_example_boqc
+from mbqc.lib import FlowError
+from mbqc.qres import SharedGraphBatch, brickwork, flow
+from mbqc.qcomp import Lazy1WQC
+
+
+def _degree(batch, k):
+    g = batch.graph(k)
+    batch.result('degree')[k] = g.degree().sum()
+    batch.result('flow')[k] = g.check_flow()
+
+
+def _crash(batch, k):
+    if k == 3 :
+        os._exit(1)
+    batch.result('degree')[k] = 1
+
+
+def _graphs():
+    G, I, O = graph_brickwork(3, 4)
+    lazyc = Lazy1WQC(G, I, O, dict((n, 0.1*n) for n in G.nodes if n not in O))
+    lazyc.set_total_order_random(random_seed=2)
+    return [brickwork(3, 8), graph_example_boqc(), lazyc]
+
+
+def _gone(name):
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_batch():
+    """
+    The graphs read back from the segment, without copy, an attached batch
+    sees the same arrays, and close() unlinks the segment
+    """
+    graphs = _graphs()
+    with SharedGraphBatch.create(graphs, results={'degree': ('int64', ()), 'flow': ('bool', ())}) as batch :
+        name = batch.handle[0]
+        a = batch.graph(0)
+        assert np.array_equal(a.indptr, graphs[0].indptr) and np.array_equal(a.f, graphs[0].f)
+        assert np.shares_memory(a.indices, batch._arrays['indices'])
+
+        G, I, O = graphs[1]
+        H, hI, hO = batch.graph(1).to_networkx()
+        labels = batch.labels[1]
+        assert set(frozenset((labels[u], labels[v])) for u, v in H.edges) == set(map(frozenset, G.edges))
+        assert set(labels[i] for i in hI) == I and set(labels[i] for i in hO) == O
+        assert flow(H, hI, hO)[0] and batch.graph(1).check_flow()
+
+        lazyc = graphs[2]
+        assert [batch.labels[2][i] for i in batch.order(2)] == list(lazyc.total_ordering)
+        assert np.allclose(np.nan_to_num(batch.phi(2)), np.nan_to_num(lazyc.phi_array()))
+
+        other = SharedGraphBatch.attach(batch.handle)
+        other.result('degree')[1] = 7
+        assert batch.result('degree')[1] == 7 and not other.owner
+        other.close()
+        assert other.closed and not batch.closed
+    assert batch.closed
+    _gone(name)
+
+
+def test_map():
+    """ The pool writes the same results as the serial loop
+    """
+    graphs = _graphs()*3
+    results = list()
+    for ncpu in (1, 2):
+        with SharedGraphBatch.create(graphs, results={'degree': ('int64', ()), 'flow': ('bool', ())}) as batch :
+            batch.map(_degree, ncpu=ncpu, chunksize=2)
+            results.append(batch.result('degree').copy())
+            assert batch.result('flow').all()
+    assert np.array_equal(*results)
+    assert results[0][0] == 2*brickwork(3, 8).edges().shape[0]
+
+
+def test_cleanup():
+    """ A worker that dies breaks the pool and the segment is unlinked
+    """
+    with pytest.raises(BrokenProcessPool):
+        with SharedGraphBatch.create(_graphs()*2, results={'degree': ('int64', ())}) as batch :
+            name = batch.handle[0]
+            batch.map(_crash, ncpu=2, chunksize=1)
+    _gone(name)
+
+    batch = SharedGraphBatch.create(_graphs())
+    name = batch.handle[0]
+    del batch
+    _gone(name)
+
+    with pytest.raises(FlowError):
+        SharedGraphBatch.create([(nx.Graph([(0, 1), (1, 2), (0, 2)]), {0}, {1})])
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Stabilizer tableau simulation of Clifford patterns.
+
+implemented:
+
+    StabilizerTableau --- Aaronson-Gottesman tableau (destabilizers and
+    stabilizers) with the qubit columns bit-packed into uint64 words, see:
+    https://arxiv.org/abs/quant-ph/0406196
+
+    Gates are column operations over all rows at once, Pauli measurements are
+    row operations. A graph state is written directly from the adjacency:
+    stabilizer K_a = X_a Z_N(a) and destabilizer Z_a.
+"""
+
+#standard libraries
+from math import pi
+
+#non-standard libraries
+import numpy as np
+
+
+_WORD = 64
+_ONE = np.uint64(1)
+
+
+def _popcount(words):
+    """ Number of set bits of every uint64 word
+
+    param
+        :words: numpy.ndarray(uint64)
+
+    return
+        numpy.ndarray(int)
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).astype(np.int64)
+    bytes_ = words.view(np.uint8).reshape(words.shape+(8,))
+    return np.unpackbits(bytes_, axis=-1).sum(axis=-1).astype(np.int64)
+
+
+def pauli_index(angle, atol=1e-9):
+    """ Return k such that angle = k*pi/2 (mod 2pi), k in {0,1,2,3}. Those are
+    the Pauli measurements in the XY-plane: X, Y, -X, -Y.
+    Return None if the angle is not a multiple of pi/2.
+
+    param
+        :angle: float, measurement angle
+        :atol: float, absolute tolerance
+    """
+    k = angle/(pi/2)
+    kr = round(k)
+    if abs(k-kr)*(pi/2) > atol:
+        return None
+    return int(kr) % 4
+
+
+class StabilizerTableau:
+    """
+    Bit-packed stabilizer tableau of n qubits. Rows 0..n-1 are the
+    destabilizers and rows n..2n-1 are the stabilizers.
+    """
+    def __init__(self, nqubit):
+        """ Tableau of the state |0>^nqubit
+
+        param
+            :nqubit: int, number of qubits
+        """
+        if nqubit < 1 :
+            raise ValueError('nqubit must be a positive integer')
+        self.n = nqubit
+        self.nword = (nqubit-1)//_WORD + 1
+        self.x = np.zeros((2*nqubit, self.nword), dtype=np.uint64)
+        self.z = np.zeros((2*nqubit, self.nword), dtype=np.uint64)
+        self.r = np.zeros(2*nqubit, dtype=np.uint8)
+
+        idx = np.arange(nqubit)
+        bits = _ONE << (idx % _WORD).astype(np.uint64)
+        self.x[idx, idx//_WORD] = bits
+        self.z[idx+nqubit, idx//_WORD] = bits
+
+
+    @classmethod
+    def from_graph(cls, G, nodelist=None):
+        """ Tableau of the graph state |G>, built directly from the adjacency.
+        Qubit q corresponds to nodelist[q].
+
+        param
+            :G: networkx.Graph, the graph
+            :nodelist: list(node), ordering of the nodes, default list(G.nodes)
+
+        return
+            (StabilizerTableau, dict{node:qubit})
+        """
+        nodelist = list(G.nodes) if nodelist is None else list(nodelist)
+        qmap = dict((node, q) for q, node in enumerate(nodelist))
+        tab = cls(len(nodelist))
+        n = tab.n
+
+        #destabilizers Z_a, stabilizers X_a
+        tab.x[:] = 0
+        tab.z[:] = 0
+        idx = np.arange(n)
+        bits = _ONE << (idx % _WORD).astype(np.uint64)
+        tab.z[idx, idx//_WORD] = bits
+        tab.x[idx+n, idx//_WORD] = bits
+
+        #stabilizers Z_N(a)
+        edges = np.array([(qmap[a], qmap[b]) for a, b in G.subgraph(nodelist).edges],
+                         dtype=np.int64).reshape(-1, 2)
+        rows = np.concatenate([edges[:,0], edges[:,1]]) + n
+        cols = np.concatenate([edges[:,1], edges[:,0]])
+        np.bitwise_or.at(tab.z, (rows, cols//_WORD), _ONE << (cols % _WORD).astype(np.uint64))
+
+        return tab, qmap
+
+
+    def copy(self):
+        """ Return a deep copy of the tableau
+        """
+        tab = StabilizerTableau.__new__(StabilizerTableau)
+        tab.n, tab.nword = self.n, self.nword
+        tab.x, tab.z, tab.r = self.x.copy(), self.z.copy(), self.r.copy()
+        return tab
+
+
+    def _col(self, arr, q):
+        """ Column q of arr as a boolean array over rows
+        """
+        return ((arr[:, q//_WORD] >> np.uint64(q % _WORD)) & _ONE).astype(bool)
+
+
+    def _toggle(self, arr, q, rows):
+        """ Flip bit q of arr in the selected rows
+        """
+        arr[rows, q//_WORD] ^= _ONE << np.uint64(q % _WORD)
+
+
+    ## Clifford gates, column operations
+    def h(self, q):
+        """ Hadamard on qubit q
+        """
+        xq, zq = self._col(self.x, q), self._col(self.z, q)
+        self.r ^= (xq & zq).astype(np.uint8)
+        swap = xq ^ zq
+        self._toggle(self.x, q, swap)
+        self._toggle(self.z, q, swap)
+
+    def s(self, q):
+        """ Phase gate S on qubit q
+        """
+        xq, zq = self._col(self.x, q), self._col(self.z, q)
+        self.r ^= (xq & zq).astype(np.uint8)
+        self._toggle(self.z, q, xq)
+
+    def sdg(self, q):
+        """ Phase gate S^dagger = S Z on qubit q
+        """
+        self.s(q)
+        self.z_gate(q)
+
+    def x_gate(self, q):
+        """ Pauli X on qubit q
+        """
+        self.r ^= self._col(self.z, q).astype(np.uint8)
+
+    def z_gate(self, q):
+        """ Pauli Z on qubit q
+        """
+        self.r ^= self._col(self.x, q).astype(np.uint8)
+
+    def cz(self, a, b):
+        """ Controlled-Z between qubits a and b
+        """
+        xa, xb = self._col(self.x, a), self._col(self.x, b)
+        za, zb = self._col(self.z, a), self._col(self.z, b)
+        self.r ^= (xa & xb & (za ^ zb)).astype(np.uint8)
+        self._toggle(self.z, a, xb)
+        self._toggle(self.z, b, xa)
+
+
+    ## row operations
+    def _phase(self, xs, zs, rs, xt, zt, rt):
+        """ Sign bits of the products (target rows)*(source rows), the function
+        g of Aaronson-Gottesman summed with bitmasks.
+
+        param
+            :xs, zs, rs: the source row, or rows matching the targets
+            :xt, zt, rt: the target rows, 2d arrays
+        """
+        plus = (xs & zs & ~xt & zt) | (xs & ~zs & xt & zt) | (~xs & zs & xt & ~zt)
+        minus = (xs & zs & xt & ~zt) | (xs & ~zs & ~xt & zt) | (~xs & zs & xt & zt)
+        g = _popcount(plus).sum(axis=-1) - _popcount(minus).sum(axis=-1)
+        return (((2*rt.astype(np.int64) + 2*np.asarray(rs, dtype=np.int64) + g) % 4) // 2).astype(np.uint8)
+
+
+    def _rowsum(self, targets, source):
+        """ Multiply every row in targets by the row source, in place
+        """
+        if len(targets) == 0 :
+            return
+        self.r[targets] = self._phase(self.x[source], self.z[source], self.r[source],
+                                      self.x[targets], self.z[targets], self.r[targets])
+        self.x[targets] ^= self.x[source]
+        self.z[targets] ^= self.z[source]
+
+
+    def measure_z(self, q, rng=None):
+        """ Measure qubit q in the computational basis.
+
+        param
+            :q: int, qubit
+            :rng: numpy.random.RandomState, source of the random outcomes
+
+        return
+            (int, bool): (outcome, whether the outcome was random)
+        """
+        n = self.n
+        xq = self._col(self.x, q)
+        stab = np.flatnonzero(xq[n:])
+        if len(stab) > 0 :
+            p = stab[0] + n
+            rows = np.flatnonzero(xq)
+            rows = rows[(rows != p) & (rows != p-n)]
+            self._rowsum(rows, p)
+
+            self.x[p-n], self.z[p-n], self.r[p-n] = self.x[p], self.z[p], self.r[p]
+            self.x[p], self.z[p] = 0, 0
+            self.z[p, q//_WORD] = _ONE << np.uint64(q % _WORD)
+            rng = np.random if rng is None else rng
+            self.r[p] = rng.randint(2)
+            return int(self.r[p]), True
+
+        #deterministic outcome: product of the stabilizers paired with the
+        #destabilizers that anticommute with Z_q. Stabilizers commute, so the
+        #product is taken pairwise in log rounds
+        rows = np.flatnonzero(xq[:n]) + n
+        x, z, r = self.x[rows], self.z[rows], self.r[rows]
+        while len(r) > 1 :
+            m = len(r)//2
+            rp = self._phase(x[1:2*m:2], z[1:2*m:2], r[1:2*m:2], x[0:2*m:2], z[0:2*m:2], r[0:2*m:2])
+            xp, zp = x[0:2*m:2] ^ x[1:2*m:2], z[0:2*m:2] ^ z[1:2*m:2]
+            x, z, r = np.concatenate([xp, x[2*m:]]), np.concatenate([zp, z[2*m:]]), np.concatenate([rp, r[2*m:]])
+        return int(r[0]), False
+
+
+    def measure(self, q, basis='Z', rng=None):
+        """ Measure qubit q in the Pauli basis X, Y or Z. The qubit is left in
+        the eigenstate of the measured observable.
+
+        param
+            :q: int, qubit
+            :basis: str('X'|'Y'|'Z')
+            :rng: numpy.random.RandomState
+
+        return
+            (int, bool): (outcome, whether the outcome was random)
+        """
+        if basis == 'Z':
+            return self.measure_z(q, rng)
+        elif basis == 'X':
+            self.h(q)
+            res = self.measure_z(q, rng)
+            self.h(q)
+        elif basis == 'Y':
+            self.sdg(q)
+            self.h(q)
+            res = self.measure_z(q, rng)
+            self.h(q)
+            self.s(q)
+        else :
+            raise ValueError('basis must be X, Y or Z')
+        return res
+
+
+    def measure_angle(self, q, angle, rng=None):
+        """ Measure qubit q in the basis |+-_angle> = |0> +- e^{i angle}|1>,
+        the angle must be a multiple of pi/2.
+
+        param
+            :q: int, qubit
+            :angle: float, the angle in the XY-plane
+            :rng: numpy.random.RandomState
+
+        return
+            (int, bool): (outcome, whether the outcome was random)
+        """
+        k = pauli_index(angle)
+        if k is None :
+            raise ValueError('angle %s is not a Pauli measurement'%str(angle))
+        s, rand = self.measure(q, 'XY'[k % 2], rng)
+        return s ^ (k//2), rand
+
+
+    def reset(self, q, rng=None):
+        """ Reset qubit q to |0>
+        """
+        s, _ = self.measure_z(q, rng)
+        if s :
+            self.x_gate(q)
+
+
+    def stabilizers(self):
+        """ Return the stabilizer generators as strings, e.g. '+XZI'
+        """
+        gens = list()
+        n = self.n
+        for row in range(n, 2*n):
+            xr = [(int(self.x[row, q//_WORD]) >> (q % _WORD)) & 1 for q in range(n)]
+            zr = [(int(self.z[row, q//_WORD]) >> (q % _WORD)) & 1 for q in range(n)]
+            paulis = ''.join('IXZY'[a+2*b] for a, b in zip(xr, zr))
+            gens.append(('-' if self.r[row] else '+') + paulis)
+        return gens
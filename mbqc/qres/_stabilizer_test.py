@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Test for mbqc.qres._stabilizer.py
+"""
+
+from math import pi
+import networkx as nx
+import numpy as np
+
+from mbqc.qres import StabilizerTableau
+from mbqc.qres._stabilizer import pauli_index
+
+
+def test_graph_state_stabilizers():
+    """
+    The generators of |G> are X_a Z_N(a)
+    """
+    G = nx.path_graph(3)
+    tab, qmap = StabilizerTableau.from_graph(G)
+    assert tab.stabilizers() == ['+XZI', '+ZXZ', '+IZX']
+
+
+def test_graph_state_gates():
+    """
+    |+>^n followed by CZ on the edges gives the same tableau as from_graph
+    """
+    G = nx.cycle_graph(5)
+    tab = StabilizerTableau(5)
+    for q in range(5):
+        tab.h(q)
+    for a, b in G.edges:
+        tab.cz(a, b)
+    assert tab.stabilizers() == StabilizerTableau.from_graph(G)[0].stabilizers()
+
+
+def test_measurement_outcomes():
+    """
+    Random outcomes collapse the state, repeated measurements are deterministic
+    """
+    rng = np.random.RandomState(7)
+    tab = StabilizerTableau(2)
+    assert tab.measure_z(0, rng) == (0, False)
+    tab.h(0)
+    s, rand = tab.measure(0, 'X', rng)
+    assert (s, rand) == (0, False)
+    s, rand = tab.measure(0, 'Y', rng)
+    assert rand
+    assert tab.measure(0, 'Y', rng) == (s, False)
+    assert tab.measure_angle(0, pi/2, rng) == (s, False)
+    assert tab.measure_angle(0, 3*pi/2, rng) == (1-s, False)
+
+
+def test_bell_correlation():
+    """
+    Both halves of |Phi+> give the same Z outcome
+    """
+    for seed in range(10):
+        rng = np.random.RandomState(seed)
+        tab = StabilizerTableau(2)
+        tab.h(0)
+        tab.h(1)
+        tab.cz(0, 1)
+        tab.h(1)
+        s0, r0 = tab.measure_z(0, rng)
+        s1, r1 = tab.measure_z(1, rng)
+        assert r0 and not r1 and s0 == s1
+
+
+def test_pauli_index():
+    assert pauli_index(0.) == 0
+    assert pauli_index(-pi/2) == 3
+    assert pauli_index(5*pi) == 2
+    assert pauli_index(pi/4) is None
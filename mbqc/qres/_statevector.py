@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Statevector simulation of 1WQC patterns with a leading batch dimension.
+
+implemented:
+
+    BatchedStateVector --- a register of qubits labelled by graph nodes. The
+    state has shape (B, 2, .., 2), one axis per live node, so B patterns that
+    share the graph but not the angles are simulated by the same numpy calls.
+    Preparation and entangling are done once on a batch of size 1, which is
+    broadcast only when the first batch of angles is measured.
+"""
+
+#standard libraries
+from math import sqrt
+
+#non-standard libraries
+import numpy as np
+
+
+class BatchedStateVector:
+    """
+    Batched statevector, the qubits are addressed by the nodes of a graph.
+    """
+    def __init__(self, batch=1):
+        """ Empty register, the state is the scalar 1 for every batch element
+
+        param
+            :batch: int, the batch size B
+        """
+        if batch < 1 :
+            raise ValueError('batch must be a positive integer')
+        self.batch = batch
+        self.psi = np.ones((1,), dtype=complex)
+        self.nodes = list()
+
+
+    def _axis(self, node):
+        """ The axis of node in psi
+        """
+        try :
+            return 1 + self.nodes.index(node)
+        except ValueError :
+            raise ValueError('node %s is not allocated'%str(node))
+
+
+    def _select(self, node, bit):
+        """ Index tuple selecting value bit on the axis of node
+        """
+        idx = [slice(None)]*self.psi.ndim
+        idx[self._axis(node)] = bit
+        return tuple(idx)
+
+
+    def _mask(self, mask, ndim):
+        """ Reshape a batch mask to broadcast against an array of ndim axes
+        """
+        return np.asarray(mask, dtype=bool).reshape((-1,)+(1,)*(ndim-1))
+
+
+    def _expand(self):
+        """ Broadcast psi to the full batch size, before batch dependent gates
+        """
+        if self.psi.shape[0] != self.batch :
+            self.psi = np.repeat(self.psi, self.batch, axis=0)
+
+
+    def allocate_plus(self, node):
+        """ Add the qubit of node in state |+>
+        """
+        self.allocate_state([node], np.ones(2)/sqrt(2))
+
+
+    def allocate_state(self, nodes, psi_in):
+        """ Add qubits of nodes in state psi_in
+
+        param
+            :nodes: list(node), the new nodes, the first one is the most
+                    significant qubit of psi_in
+            :psi_in: numpy.ndarray of shape (2**k,) or (B, 2**k)
+        """
+        nodes = list(nodes)
+        if set(nodes).intersection(self.nodes):
+            raise ValueError('node is already allocated')
+        psi_in = np.asarray(psi_in, dtype=complex)
+        psi_in = psi_in.reshape((-1,)+(2,)*len(nodes))
+        if psi_in.shape[0] not in (1, self.batch):
+            raise ValueError('psi_in has a wrong batch size')
+
+        psi = self.psi[(Ellipsis,)+(None,)*len(nodes)]
+        psi_in = psi_in.reshape((psi_in.shape[0],)+(1,)*(self.psi.ndim-1)+(2,)*len(nodes))
+        self.psi = psi*psi_in
+        self.nodes += nodes
+
+
+    def cz(self, a, b):
+        """ Controlled-Z between nodes a and b
+        """
+        idx = [slice(None)]*self.psi.ndim
+        idx[self._axis(a)], idx[self._axis(b)] = 1, 1
+        self.psi[tuple(idx)] *= -1
+
+
+    def x_gate(self, node, mask=True):
+        """ Pauli X on node, only for the batch elements where mask is true
+        """
+        flipped = np.flip(self.psi, axis=self._axis(node))
+        if np.ndim(mask):
+            self.psi = np.where(self._mask(mask, self.psi.ndim), flipped, self.psi)
+        elif mask :
+            self.psi = flipped.copy()
+
+
+    def z_gate(self, node, mask=True):
+        """ Pauli Z on node, only for the batch elements where mask is true
+        """
+        if np.ndim(mask):
+            self._expand()
+            self.psi[self._select(node, 1)] *= np.where(self._mask(mask, self.psi.ndim-1), -1, 1)
+        elif mask :
+            self.psi[self._select(node, 1)] *= -1
+
+
+    def measure(self, node, angles, rng=None):
+        """ Measure node in the basis |+-_angle> = |0> +- e^{i angle}|1>, one
+        angle per batch element, and remove its axis.
+
+        param
+            :node: node, the measured node
+            :angles: float or numpy.ndarray (B,), the measurement angles
+            :rng: numpy.random.RandomState, if None the outcome 0 is
+                  postselected, otherwise the outcomes are sampled
+
+        return
+            numpy.ndarray (B,) of int, the outcomes
+        """
+        angles = np.asarray(angles, dtype=float).reshape(-1)
+        phase = np.exp(-1j*angles).reshape((-1,)+(1,)*(self.psi.ndim-2))
+        psi0, psi1 = self.psi[self._select(node, 0)], self.psi[self._select(node, 1)]
+
+        plus = (psi0 + phase*psi1)/sqrt(2)
+        axes = tuple(range(1, plus.ndim))
+        if rng is None :
+            outcomes = np.zeros(plus.shape[0], dtype=np.int8)
+            new = plus
+        else :
+            minus = (psi0 - phase*psi1)/sqrt(2)
+            p_plus = np.sum(np.abs(plus)**2, axis=axes)
+            p_minus = np.sum(np.abs(minus)**2, axis=axes)
+            size = max(plus.shape[0], self.batch)
+            outcomes = (rng.random_sample(size)*(p_plus+p_minus) >= p_plus).astype(np.int8)
+            new = np.where(outcomes.reshape((-1,)+(1,)*len(axes)).astype(bool), minus, plus)
+
+        norm = np.sqrt(np.sum(np.abs(new)**2, axis=axes, keepdims=True))
+        self.psi = new/np.where(norm > 0, norm, 1)
+        self.nodes.remove(node)
+        return np.broadcast_to(outcomes, (self.batch,)).copy()
+
+
+    def state(self, nodes=None):
+        """ Return the state vectors of the register
+
+        param
+            :nodes: list(node), the order of qubits, the first one is the most
+                    significant. Default, the allocation order.
+
+        return
+            numpy.ndarray (B, 2**k)
+        """
+        nodes = self.nodes if nodes is None else list(nodes)
+        if len(nodes) != len(self.nodes) or set(nodes) != set(self.nodes):
+            raise ValueError('nodes must be all allocated nodes')
+        perm = [0] + [self._axis(n) for n in nodes]
+        psi = np.transpose(self.psi, perm)
+        psi = np.broadcast_to(psi, (self.batch,)+psi.shape[1:])
+        return psi.reshape(self.batch, -1).copy()
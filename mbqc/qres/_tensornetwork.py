@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+__doc__="""
+Tensor-network simulation of 1WQC patterns.
+
+implemented:
+
+    GraphTensorNetwork --- the postselected pattern as a network of small
+    tensors over one binary index b_v per node:
+
+        psi_out(b_O) = sum_{b_v, v not in O}  psi_in(b_I)
+                        prod_{(u,v) in E} (-1)^{b_u b_v}
+                        prod_{v measured} e^{-i phi_v b_v}
+
+    The measured indices are summed one node at a time (variable
+    elimination). The contraction order starts from the flow partial order
+    and is refined greedily, inside a window of layers, by the size of the
+    intermediate tensor. The cost is estimated before anything is contracted.
+"""
+
+#standard libraries
+from math import sqrt
+
+#non-standard libraries
+import numpy as np
+from mbqc.lib import ResourceError
+
+
+_BYTES = np.dtype(complex).itemsize
+
+
+class GraphTensorNetwork:
+    """
+    Tensor network of a pattern on an open graph, with the measured nodes
+    projected onto |+_phi>.
+    """
+    def __init__(self, G, I, O, phi, psi_in=None):
+        """
+        param
+            :G: networkx.Graph, the graph
+            :I: set, input nodes
+            :O: set, output nodes, the open indices
+            :phi: dict{node: float}, angles of all nodes not in O
+            :psi_in: numpy.ndarray (2**|I|,), the input state ordered by
+                     sorted(I, key=list(G.nodes).index). Default |+>.
+        """
+        missing = set(G.nodes) - set(O) - set(phi.keys())
+        if missing :
+            raise ValueError('phi has no angle for nodes %s'%str(missing))
+
+        self.G, self.I, self.O = G, set(I), set(O)
+        col = dict((n, i) for i, n in enumerate(G.nodes))
+        self.inputs = sorted(self.I, key=lambda n: col[n])
+        self.outputs = sorted(self.O, key=lambda n: col[n])
+
+        cz = np.array([[1, 1], [1, -1]], dtype=complex)
+        self.tensors = [((a, b), cz) for a, b in G.edges if a != b]
+        for node in set(G.nodes) - self.O :
+            self.tensors.append(((node,), np.array([1, np.exp(-1j*phi[node])])/sqrt(2)))
+        if psi_in is not None :
+            psi_in = np.asarray(psi_in, dtype=complex).reshape((2,)*len(self.inputs))
+            self.tensors.append((tuple(self.inputs), psi_in))
+
+
+    def plan(self, ordering_class, lookahead=1):
+        """
+        Contraction order and its cost, without contracting. The candidates
+        at every step are the remaining measured nodes of the first
+        (1+lookahead) layers of ordering_class; the one giving the smallest
+        intermediate tensor is summed first, ties are broken by the flow order.
+
+        param
+            :ordering_class: dict{int: set}, the flow partial order
+            :lookahead: int, number of further layers considered
+
+        return
+            (list(node), int, int) : (order, flops, peak memory in bytes)
+        """
+        layers = [set(ordering_class[k]) - self.O for k in sorted(ordering_class)]
+        rank = dict((n, k) for k, layer in enumerate(layers) for n in layer)
+
+        scopes = dict((t, frozenset(vars_)) for t, (vars_, _) in enumerate(self.tensors))
+        touching = dict((n, set()) for n in self.G.nodes)
+        for t, scope in scopes.items():
+            for n in scope :
+                touching[n].add(t)
+
+        def width(n):
+            return len(frozenset().union(*[scopes[t] for t in touching[n]]))
+
+        live = sum(2**len(s) for s in scopes.values())
+        flops, peak, order = 0, live, list()
+        fresh, head = len(scopes), 0
+        while True :
+            while head < len(layers) and not layers[head] :
+                head += 1
+            if head == len(layers):
+                break
+            candidates = set().union(*layers[head:head+1+lookahead])
+            node = min(candidates, key=lambda n: (width(n), rank[n], str(n)))
+            layers[rank[node]].discard(node)
+
+            merged = touching.pop(node)
+            scope = frozenset().union(*[scopes[t] for t in merged])
+            new = scope - {node}
+            flops += max(len(merged), 1)*2**len(scope)
+            peak = max(peak, live + 2**len(new))
+            live += 2**len(new) - sum(2**len(scopes[t]) for t in merged)
+            for t in merged :
+                for n in scopes.pop(t):
+                    if n != node :
+                        touching[n].discard(t)
+            scopes[fresh] = new
+            for n in new :
+                touching[n].add(fresh)
+            fresh += 1
+            order.append(node)
+
+        flops += len(scopes)*2**len(self.O)
+        peak = max(peak, live + 2**len(self.O))
+        return order, flops, peak*_BYTES
+
+
+    def contract(self, order, max_memory=2**30, max_flops=2**40, ordering_class=None):
+        """
+        Contract the network, after checking the estimated cost of the order.
+
+        param
+            :order: list(node) or None, the elimination order. If None, it is
+                    planned from ordering_class.
+            :max_memory: int, the largest accepted peak memory in bytes
+            :max_flops: int, the largest accepted number of operations
+            :ordering_class: dict{int: set}, the flow partial order
+
+        return
+            (numpy.ndarray (2**|O|,), dict) : the normalised output state,
+            ordered by self.outputs, and the cost {'flops', 'memory', 'order'}
+        """
+        if order is None :
+            order, flops, memory = self.plan(ordering_class)
+        else :
+            flops, memory = _order_cost(self, order)
+        report = {'flops': flops, 'memory': memory, 'order': order}
+        if memory > max_memory :
+            raise ResourceError('contraction needs %i bytes, limit %i'%(memory, max_memory))
+        if flops > max_flops :
+            raise ResourceError('contraction needs %i flops, limit %i'%(flops, max_flops))
+
+        tensors = dict(enumerate(self.tensors))
+        touching = dict((n, set()) for n in self.G.nodes)
+        for t, (vars_, _) in tensors.items():
+            for n in vars_ :
+                touching[n].add(t)
+
+        fresh = len(tensors)
+        for node in order :
+            merged = [tensors.pop(t) for t in touching.pop(node)]
+            new = tuple(set().union(*[vars_ for vars_, _ in merged]) - {node})
+            for vars_, _ in merged :
+                for n in vars_ :
+                    if n != node :
+                        touching[n] -= {t for t in touching[n] if t not in tensors}
+            tensors[fresh] = (new, _einsum(merged, new))
+            for n in new :
+                touching[n].add(fresh)
+            fresh += 1
+
+        psi = _einsum(list(tensors.values()), tuple(self.outputs))
+        psi = psi.reshape(-1)
+        norm = np.linalg.norm(psi)
+        if norm == 0 :
+            raise ValueError('the postselected branch has zero amplitude')
+        return psi/norm, report
+
+
+def _order_cost(tn, order):
+    """
+    Cost (flops, peak memory in bytes) of a given elimination order
+    """
+    return tn.plan({k: {n} for k, n in enumerate(order)}, lookahead=0)[1:]
+
+
+def _einsum(tensors, out):
+    """
+    Product of tensors [(vars, array)] summed to the indices out
+    """
+    labels = dict()
+    for vars_, _ in tensors :
+        for v in vars_ :
+            labels.setdefault(v, len(labels))
+    for v in out :
+        labels.setdefault(v, len(labels))
+    operands = list()
+    for vars_, arr in tensors :
+        operands += [arr, [labels[v] for v in vars_]]
+    if not operands :
+        return np.ones((2,)*len(out), dtype=complex)/2**(len(out)/2)
+    return np.einsum(*operands, [labels[v] for v in out], optimize=len(tensors) > 2)
@@ -9,21 +9,21 @@ __doc__: """
         - Lemma 3
         - Lemma 4
         - Conjecture 1
+        - Conjecture 1, annealing search for counterexamples
 
     """
 
-from itertools import product
 import sys
 from subprocess import run
 import networkx as nx
-import json
 
 
 #non standard library
 from example_graphstates import *
-from mbqc.qcomp import Lazy1WQC
+from mbqc.qcomp import Lazy1WQC, anneal_conj1
+from mbqc.qcomp._lazy1wqc import IOTYPES
 from mbqc.qres import OpenGraph
-from mbqc.lib import FlowError
+from mbqc.lib import FlowError, read_graphs, GraphWriter, instrument
 
 def get_graphs_fun():
     """
@@ -33,6 +33,19 @@ def get_graphs_fun():
     return [graph_example_boqc, graph_H, graph_exact3grover]
 
 
+class GraphCorpus:
+    """
+    The open graphs of a corpus file as [(G,I,O,graph_name)], streamed from the
+    file at every loop, see mbqc.lib.read_graphs
+    """
+    def __init__(self, path, start=0):
+        self.path, self.start = path, start
+
+    def __iter__(self):
+        for i, (G, I, O, _) in enumerate(read_graphs(self.path, start=self.start), self.start):
+            yield (G, I, O, '%s:%i'%(self.path, i))
+
+
 def test_lemma2(gio_list):
     """
     Test lemma 2 from BOQC paper by trying out different graphs
@@ -40,17 +53,17 @@ def test_lemma2(gio_list):
     :gio_list: list of open graph [(G,I,O,graph_name)]
     """
     print("Start testing Lemma 2 with repetition, different random orderings")
-    iotypes = {'classical', 'quantum'}
-    for i_type, o_type in product(iotypes, repeat=2):
-        print('input:%s ;  output:%s'%(i_type, o_type))
-        for graphf in gio_list:
-            try :
-                lazyc = Lazy1WQC(*graphf[0:3], dict())
-                lazyc.set_total_order_random()
-                lazyc.set_io_type(i_type, o_type)
-                print(lazyc.lemma2(), graphf[3])
-            except FlowError :
-                print('no flow', graphf[3])
+    print("the io types share the flow and the ordering of a graph")
+    for graphf in gio_list:
+        try :
+            lazyc = Lazy1WQC(*graphf[0:3], dict())
+        except FlowError :
+            print('no flow', graphf[3])
+            continue
+        lazyc.set_total_order_random()
+        for i_type, o_type in IOTYPES :
+            lazyc.set_io_type(i_type, o_type)
+            print(lazyc.lemma2(), 'input:%s ;  output:%s'%(i_type, o_type), graphf[3])
 
 
 def test_lemma3(gio_list):
@@ -60,21 +73,20 @@ def test_lemma3(gio_list):
     :gio_list: list of open graph [(G,I,O, graph_name)]
     """
     print("Start testing Lemma 3 , different random orderings")
-
-    iotypes = {'classical', 'quantum'}
-    for i_type, o_type in product(iotypes, repeat=2):
-        print('input:%s ;  output:%s'%(i_type, o_type))
-        for graphf in gio_list:
-            lazyc = Lazy1WQC(*graphf[0:3], dict())
-            lazyc.set_total_order_random()
+    print("the io types share the flow and the ordering of a graph")
+    for graphf in gio_list:
+        lazyc = Lazy1WQC(*graphf[0:3], dict())
+        lazyc.set_total_order_random()
+        for i_type, o_type in IOTYPES :
             lazyc.set_io_type(i_type, o_type)
-            print(lazyc.lemma3(), graphf[3])
+            print(lazyc.lemma3(), 'input:%s ;  output:%s'%(i_type, o_type), graphf[3])
 
 
-def test_lemma4(gio_list):
+def test_lemma4(gio_list, repeat=1):
     """
     Test lemma 4 from BOQC paper by trying out different graphs
     :gio_list: list of open graph [(G,I,O, graph_name)]
+    :repeat: int, number of random orderings per graph
     """
     print("Start testing Lemma 4, different random orderings")
 
@@ -85,21 +97,20 @@ def test_lemma4(gio_list):
             print(lazyc.lemma4(), graphf[3])
 
 
-def test_conj1(gio_list, show='print', n_sampling=10):
+def test_conj1(gio_list, show='print', n_sampling=10, outpath='.'):
     """
     Test conjecture 1 from BOQC paper by trying out different graphs.
-    Check the upper bound for every graph is |O|+1
+    Check the upper bound for every graph is |O|+1, the four io types are
+    counted on the same orderings
     :gio_list: list of open graph [(G,I,O, graph_name)]
     :show: str(print|draw), the means to show the result
+    :outpath: str, folder of the drawings
     """
     print('Conjecture 1: bound of #physical qubit=|O|+1.  Sampling number %i'%n_sampling)
-    for i,res in enumerate(results):
-        bounds, iotypes = [], ('classical', 'quantum')
-        for i_type, o_type in product(iotypes, repeat=2):
-            lazyc = Lazy1WQC(*res,dict())
-            lazyc.set_io_type(i_type, o_type)
-            bounds.append(lazyc.bound_physical_qubit(nsampling=10))
-        upper_bound, conj1 = max(bounds), len(res[2])+1
+    for i,res in enumerate(gio_list):
+        lazyc = Lazy1WQC(*res[0:3],dict())
+        bounds = lazyc.bound_physical_qubit_iotypes(nsampling=n_sampling)
+        upper_bound, conj1 = max(upper for _, upper in bounds.values()), len(res[2])+1
         if upper_bound > conj1 :
             print("Conjecture 1 fails at graph with edges",lazyc.G.edges)
 
@@ -109,6 +120,24 @@ def test_conj1(gio_list, show='print', n_sampling=10):
             lazyc.draw_graph('%s/%s'%(outpath,fname), title=title)
 
 
+def search_conj1(n_I, n_O, n_aux, nrestart, nstep, outpath):
+    """
+    Search counterexamples of conjecture 1 by simulated annealing, with
+    restarts on all cpus; the graphs above |O|+1 are written to outpath with
+    their orderings, see mbqc.qcomp.replay_conj1
+    :nrestart: int, number of independent runs
+    :nstep: int, moves per run
+    :outpath: str, .json or .edgelist file
+    """
+    print('Conjecture 1: annealing search, %i runs of %i moves'%(nrestart, nstep))
+    results = anneal_conj1(n_I, n_O, n_aux, nrestart=nrestart, nstep=nstep, outpath=outpath)
+    for res in results :
+        print('seed %i: most qubits %i, %i graphs above %i, %.1f s'%(
+              res['seed'], res['best'], len(res['found']), n_O+1, res['seconds']))
+        if res['found']:
+            print("Conjecture 1 fails, see", outpath)
+
+
 def get_random_graphs(n_I, n_O, n_aux, outpath, ngraph=False, draw_only_untight_bounds=True, ncpu=False):
     """
     Obtain random graphs with flow in folder 'graphf'. This also tests conjecture 1
@@ -116,31 +145,26 @@ def get_random_graphs(n_I, n_O, n_aux, outpath, ngraph=False, draw_only_untight_
     :n_O: int, number of output
     :n_aux: int, number of n_aux
     :outpath: str, output folder
-    :not_equal_bound_only:boolean, only draw if it is not a tight bound
-    :conj1:boolean, also test the conjecture
+    :draw_only_untight_bounds:boolean, only draw if it is not a tight bound
     """
     run(['mkdir', '-p', outpath])
     results = OpenGraph.random_open_graph(n_I, n_O, n_aux, ngraph=ngraph, random_seed=None, ncpu=ncpu)
-    dicress =  []
-    for i,res in enumerate(results) :
-        dres = dict()
-        dres['nodes']=list(res[0].nodes())
-        dres['edges']=list(res[0].edges())
-        dres['I'] = list(res[1])
-        dres['O'] = list(res[2])
-        dres['bound']=n_O+1
-
-        lazyc = Lazy1WQC(*res,dict())
-        dres['nqubit']=lazyc.bound_physical_qubit(nsampling=10)
+    drawings = list()
+    with GraphWriter(outpath+'/random_graphs.json') as outf :
+        for i,res in enumerate(results) :
+            bound = n_O+1
+            lazyc = Lazy1WQC(*res,dict())
+            nqubit = lazyc.bound_physical_qubit(nsampling=10)[1]
 
-        if not_tight_bound_draw and dres['bound'] != dres['nqubit']:
-            title = 'nqubit: %i, conj1: %i'%(dres['nqubit'], dres['bound'])
-            lazyc.draw_graph('%s/graph%i.png'%(outpath,i), title=title)
+            if draw_only_untight_bounds and bound != nqubit:
+                title = 'nqubit: %i, conj1: %i'%(nqubit, bound)
+                drawings.append((lazyc, '%s/graph%i.png'%(outpath,i), title))
 
-        dicress.append(dres)
+            outf.write(*res, bound=bound, nqubit=nqubit)
 
-    with open(outpath+'/random_graphs.json', 'w') as outf :
-        json.dump(dicress, outf)
+    #all drawings at once, on a process pool
+    if drawings :
+        OpenGraph.draw_graphs(*zip(*drawings), ncpu=ncpu)
 
 
 
@@ -152,12 +176,19 @@ if __name__ == "__main__" :
     You did it wrong, try this:
 
         test.py kind (repeat)/[n_sampling] [n_I, n_O, n_aux, outpath, graph_list_json]
+        test.py kind repeat {n_sampling} <graph_file> <start>
+        test.py anneal nrestart n_I n_O n_aux nstep outfile
 
-    where kind = conj1 | lemma2 | lemma3 | lemma4 | random
+    where kind = conj1 | lemma2 | lemma3 | lemma4 | random | anneal
 
     note:
+        with MBQC_INSTRUMENT=1 the timers and counters of the run are
+        written to instrument_report.json
         argument inside () is needed for 'conj1' kind
         arguments inside []  are needed for 'random' kind
+        argument inside {} is needed for 'conj1' kind
+        arguments inside <> are optional: the graphs are streamed from a
+        corpus file (.json or .edgelist) from record start on
 
     """
     try :
@@ -167,6 +198,10 @@ if __name__ == "__main__" :
         sys.exit(err_message)
 
     gio_list = [(*func(),func.__name__) for func in get_graphs_fun()]
+    corpus_args = args[3:] if kind == 'conj1' else args[2:]
+    if kind not in ('random', 'anneal') and corpus_args :
+        start = int(corpus_args[1]) if len(corpus_args) > 1 else 0
+        gio_list = GraphCorpus(corpus_args[0], start=start)
 
     if kind == 'conj1' :
         try :
@@ -189,8 +224,7 @@ if __name__ == "__main__" :
         print('')
 
     elif kind == 'lemma4':
-        for i in range(repeat):
-            test_lemma4(gio_list)
+        test_lemma4(gio_list, repeat)
         print('')
 
     elif kind == 'random' :
@@ -206,6 +240,19 @@ if __name__ == "__main__" :
             pass
 
         get_random_graphs(n_I, n_O, n_aux, folder_name)
+
+    elif kind == 'anneal' :
+        try :
+            n_I, n_O, n_aux, nstep = map(int, args[2:6])
+            outfile = args[6]
+        except (IndexError, ValueError):
+            sys.exit(err_message)
+        search_conj1(n_I, n_O, n_aux, repeat, nstep, outfile)
     else :
         raise ValueError(err_message)
 
+    #timers and counters of the run, with MBQC_INSTRUMENT=1
+    if instrument.is_enabled():
+        instrument.export('instrument_report.json')
+        print('instrumentation report written to instrument_report.json')
+